@@ -0,0 +1,149 @@
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Dict, Optional
+from fastapi import HTTPException, Request
+from core.services.admission import ClientDisconnected, Overloaded, Ticket, current_ticket
+
+# Weight of the latest request in an endpoint's latency estimate
+EWMA_ALPHA = 0.2
+
+
+def overloaded(e: Overloaded) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+
+class AdmissionControl:
+    """
+    Admission in front of the model executor.
+
+    Each endpoint has a policy from config: a ``priority`` class for its
+    executor calls, a ``deadline_s`` after which its answer is no longer worth
+    computing, and ``max_in_flight`` requests at a time. A request over the
+    limit, or whose calls could not meet the deadline, is answered 503 with a
+    Retry-After estimated from recent latencies instead of waiting in a queue.
+    Once the request body has been read, a disconnected client cancels the
+    request's queued and running calls.
+    """
+
+    def __init__(self, policies: Dict[str, dict] | None = None, poll_s: float = 0.25):
+        self.policies = policies or {}
+        self.poll_s = poll_s
+        self._in_flight: Dict[str, int] = {}
+        self._latency_s: Dict[str, float] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._watchers: Dict[Ticket, asyncio.Task] = {}
+
+    def _count(self, endpoint: str, counter: str):
+        counters = self._counters.setdefault(endpoint, {"admitted": 0, "rejected": 0, "disconnected": 0})
+        counters[counter] += 1
+
+    def ticket(self, endpoint: str) -> Ticket:
+        """A ticket under the endpoint's policy, without taking a slot (background work)."""
+        policy = self.policies.get(endpoint, {})
+        return Ticket(endpoint, policy.get("priority", "normal"), policy.get("deadline_s"))
+
+    def enter(self, endpoint: str) -> Ticket:
+        """Take one of the endpoint's slots, or answer 503 if they are all taken."""
+        in_flight = self._in_flight.get(endpoint, 0)
+        limit = self.policies.get(endpoint, {}).get("max_in_flight")
+        if limit is not None and in_flight >= limit:
+            self._count(endpoint, "rejected")
+            # One slot frees up after about a request's latency
+            retry_after = max(1, math.ceil(self._latency_s.get(endpoint, 1.0)))
+            raise HTTPException(
+                status_code=503,
+                detail=f"Too many {endpoint} requests in progress",
+                headers={"Retry-After": str(retry_after)},
+            )
+        self._in_flight[endpoint] = in_flight + 1
+        self._count(endpoint, "admitted")
+        return self.ticket(endpoint)
+
+    def leave(self, ticket: Ticket, completed: bool = True):
+        """Give the slot back once the request has been answered, turned away or abandoned."""
+        self._in_flight[ticket.endpoint] -= 1
+        watcher = self._watchers.pop(ticket, None)
+        if watcher is not None:
+            watcher.cancel()
+        if ticket.cancelled:
+            self._count(ticket.endpoint, "disconnected")
+        if not completed or ticket.cancelled:
+            # Only answered requests count towards the latency estimate
+            return
+        elapsed = time.monotonic() - ticket.started
+        latency = self._latency_s.get(ticket.endpoint)
+        self._latency_s[ticket.endpoint] = elapsed if latency is None else latency + EWMA_ALPHA * (elapsed - latency)
+
+    @contextmanager
+    def bind(self, ticket: Ticket):
+        """Make ``ticket`` the current one, so executor calls made here inherit it."""
+        token = current_ticket.set(ticket)
+        try:
+            yield ticket
+        finally:
+            current_ticket.reset(token)
+
+    def watch(self, request: Request, ticket: Optional[Ticket] = None):
+        """
+        Cancel the ticket when the client disconnects. Only call this once the
+        request body has been read: checking for a disconnect consumes messages.
+        """
+        ticket = ticket or current_ticket.get()
+        if ticket is not None and ticket not in self._watchers:
+            self._watchers[ticket] = asyncio.create_task(self._watch(request, ticket))
+
+    async def _watch(self, request: Request, ticket: Ticket):
+        while not await request.is_disconnected():
+            await asyncio.sleep(self.poll_s)
+        ticket.cancel()
+
+    @asynccontextmanager
+    async def admit(self, endpoint: str, request: Optional[Request] = None):
+        """
+        Serve one request of ``endpoint`` under its policy. Pass ``request`` to
+        watch for a disconnect right away (endpoints whose body is already read).
+        """
+        ticket = self.enter(endpoint)
+        completed = False
+        try:
+            with self.bind(ticket):
+                if request is not None:
+                    self.watch(request, ticket)
+                yield ticket
+            completed = True
+        except Overloaded as e:
+            raise overloaded(e) from None
+        except ClientDisconnected:
+            # Nobody is left to read this; the status only shows up in the access log
+            raise HTTPException(status_code=499, detail="Client closed request") from None
+        finally:
+            self.leave(ticket, completed)
+
+    async def stream(self, ticket: Ticket, body: AsyncIterator) -> AsyncIterator:
+        """
+        Run a streamed response ``body`` under ``ticket``, keeping the endpoint's
+        slot until the stream ends. A stream closed early (the client went away)
+        cancels the ticket, which stops whatever its calls are still doing.
+        """
+        completed = False
+        try:
+            with self.bind(ticket):
+                async for part in body:
+                    yield part
+            completed = True
+        finally:
+            if not completed:
+                ticket.cancel()
+            self.leave(ticket, completed)
+
+    def stats(self) -> dict:
+        return {
+            endpoint: {
+                **counters,
+                "in_flight": self._in_flight.get(endpoint, 0),
+                "latency_ms": round(self._latency_s[endpoint] * 1000, 1) if endpoint in self._latency_s else None,
+            }
+            for endpoint, counters in self._counters.items()
+        }
@@ -0,0 +1,76 @@
+"""
+Preforking server: load the models once, then fork uvicorn workers that share them.
+
+Forked workers start with the parent's memory mapped copy-on-write, so model
+weights loaded before the fork are held once in RAM however many workers
+run, as long as nobody writes to them. Warm-ups run afterwards in each worker,
+since any thread pools or inference state created before the fork would not
+survive it.
+"""
+import gc
+import os
+import signal
+import socket
+import time
+import uvicorn
+from core.services.registry import ModelRegistry
+
+
+def serve_preforked(app, registry: ModelRegistry, host: str, port: int, workers: int):
+    """Load every model in this process, then run ``workers`` forked uvicorn workers on one socket."""
+    start = time.perf_counter()
+    registry.start(warmup=False)
+    registry.wait()
+    print(f"Models loaded in {time.perf_counter() - start:.1f}s; forking {workers} workers")
+    # Keep the garbage collector from touching (and so copying) every preloaded object page
+    gc.collect()
+    gc.freeze()
+
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    children = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            code = 0
+            try:
+                uvicorn.Server(uvicorn.Config(app, log_level="info")).run(sockets=[sock])
+            except BaseException:
+                code = 1
+            finally:
+                os._exit(code)
+        children.add(pid)
+        print(f"Started worker {pid}")
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for _ in range(workers):
+        spawn()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        children.discard(pid)
+        if not stopping:
+            print(f"Worker {pid} exited with status {status}; restarting")
+            time.sleep(1)  # don't spin if workers crash on start
+            spawn()
+    sock.close()
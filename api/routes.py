@@ -1,11 +1,30 @@
-from fastapi import APIRouter, Query, UploadFile, File, Form
-from pathlib import Path
+from fastapi import APIRouter, Query, Form, Request, HTTPException, WebSocket
 from core.services.phonemizer_service import PhonemizerService
 from core.services.speech_service import SpeechService
 from core.services.scoring_service import ScoringService
 from core.services.feedback_service import FeedbackService
+from core.services.feedback_cache import FeedbackCache
+from core.services.feedback_jobs import FeedbackJobs
+from core.services.strategies.feedback.base_strategy import FeedbackStrategy
+from core.services.strategies.feedback.rb_strategy import RuleBasedFeedbackStrategy
 from core.services.tts_service import TTSService
-from fastapi.responses import FileResponse
+from core.services.tts_cache import TTSCache
+from core.audio.encoding import OggOpusEncoder, pcm16_bytes
+from core.services.executor import ModelExecutor
+from core.services.admission import Overloaded, Ticket
+from core.services.registry import ModelNotReady, ModelRegistry
+from core.services.process_pool import ProcessPool
+from core.services.pooled_services import PooledPhonemizerService, PooledSpeechService, build_worker_services
+from core.memory import process_memory
+from api.uploads import StreamingAudioForm
+from api.admission import AdmissionControl, overloaded
+from core.audio.ingest import AudioIngestError, AudioLimitError
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel
+from typing import AsyncIterator, Callable, Dict, List, Optional
+import asyncio
+import base64
+import itertools
 import time
 import json
 
@@ -15,56 +34,235 @@ router = APIRouter()
 with open('config.json') as f:
     config = json.load(f)
 
-# Initialize feedback service based on config
-feedback_strategy = config['feedback_strategy']
-if feedback_strategy == 'llama-cpp':
-    from core.services.strategies.feedback.llama_cpp_strategy import LLamaCppFeedbackStrategy
-    feedback_instance = LLamaCppFeedbackStrategy(config['feedback_model'])
-elif feedback_strategy == 'llama':
-    from core.services.strategies.feedback.llama_strategy import LlamaFeedbackStrategy
-    feedback_instance = LlamaFeedbackStrategy()
-elif feedback_strategy == 'rb':
-    from core.services.strategies.feedback.rb_strategy import RuleBasedFeedbackStrategy
-    feedback_instance = RuleBasedFeedbackStrategy()
-else:
-    raise ValueError(f"Unknown feedback strategy: {feedback_strategy}")
-
-llm_feedback_service = FeedbackService(feedback_instance)
-
-# Initialize TTS service based on config
-tts_strategy = config['tts_strategy']
-if tts_strategy == 'hf':
-    from core.services.strategies.tts.hf_strategy import HuggingStrategy
-    tts_instance = HuggingStrategy(config.get('tts_model', 'facebook/mms-tts-fra'))
-elif tts_strategy == 'coqui':
-    from core.services.strategies.tts.coqui_strategy import CoquiTTSStrategy
-    tts_instance = CoquiTTSStrategy()
-elif tts_strategy == 'kyutai':
-    from core.services.strategies.tts.kyutai_strategy import KyutaiTTSStrategy
-    tts_instance = KyutaiTTSStrategy()
-else:
-    raise ValueError(f"Unknown TTS strategy: {tts_strategy}")
-
-tts_service = TTSService(tts_instance)
-
-# Initialize other services
-speech_service = SpeechService()
-phonemizer_service = PhonemizerService()
+def build_feedback_strategy(feedback_strategy: str) -> FeedbackStrategy:
+    """Build a feedback strategy by its config name."""
+    if feedback_strategy == 'llama-cpp':
+        from core.services.strategies.feedback.llama_cpp_strategy import LLamaCppFeedbackStrategy
+        llama_cpp_config = config.get('llama_cpp', {})
+        feedback_instance = LLamaCppFeedbackStrategy(
+            config['feedback_model'],
+            max_tokens=llama_cpp_config.get('max_tokens', 512),
+            n_contexts=llama_cpp_config.get('contexts', 1),
+            n_threads=llama_cpp_config.get('n_threads'),
+            n_ctx=llama_cpp_config.get('n_ctx'),
+        )
+    elif feedback_strategy == 'llama':
+        from core.services.strategies.feedback.llama_strategy import LlamaFeedbackStrategy
+        feedback_instance = LlamaFeedbackStrategy(batching=config.get('feedback_batching'))
+    elif feedback_strategy == 'rb':
+        feedback_instance = RuleBasedFeedbackStrategy()
+    else:
+        raise ValueError(f"Unknown feedback strategy: {feedback_strategy}")
+    return feedback_instance
+
+
+def load_feedback_service() -> FeedbackService:
+    """Build the feedback service selected in config (the LLM tier with tiered feedback)."""
+    feedback_instance = build_feedback_strategy(llm_feedback_strategy)
+
+    feedback_cache_config = config.get('feedback_cache', {})
+    feedback_cache = None
+    if feedback_cache_config.get('enabled', True):
+        feedback_cache = FeedbackCache(
+            feedback_cache_config.get('path', 'cache/feedback.sqlite'),
+            memory_size=feedback_cache_config.get('memory_size', 2048),
+            max_entries=feedback_cache_config.get('max_entries', 100000),
+            ttl_s=feedback_cache_config.get('ttl_s', 30 * 24 * 3600),
+        )
+    return FeedbackService(feedback_instance, feedback_cache)
+
+
+# Tiered feedback: rule-based tips right away (``instant_feedback``), LLM feedback
+# from the registry's feedback service as a background job
+tiered_feedback_config = config.get('tiered_feedback', {})
+instant_feedback = None
+llm_feedback_strategy = config['feedback_strategy']
+if llm_feedback_strategy == 'tiered':
+    instant_feedback = RuleBasedFeedbackStrategy()
+    llm_feedback_strategy = tiered_feedback_config.get('llm_strategy', 'llama-cpp')
+    if llm_feedback_strategy in ('rb', 'tiered'):
+        raise ValueError(f"tiered_feedback.llm_strategy must be an LLM strategy, got {llm_feedback_strategy}")
+
+
+def load_tts_service() -> TTSService:
+    """Build the TTS service selected in config."""
+    tts_strategy = config['tts_strategy']
+    if tts_strategy == 'hf':
+        from core.services.strategies.tts.hf_strategy import HuggingStrategy
+        tts_instance = HuggingStrategy(
+            config.get('tts_model', 'facebook/mms-tts-fra'),
+            batching=config.get('tts_batching'),
+        )
+    elif tts_strategy == 'coqui':
+        from core.services.strategies.tts.coqui_strategy import CoquiTTSStrategy
+        tts_instance = CoquiTTSStrategy()
+    elif tts_strategy == 'kyutai':
+        from core.services.strategies.tts.kyutai_strategy import KyutaiTTSStrategy
+        tts_instance = KyutaiTTSStrategy()
+    else:
+        raise ValueError(f"Unknown TTS strategy: {tts_strategy}")
+
+    tts_cache_config = config.get('tts_cache', {})
+    tts_cache = None
+    if tts_cache_config.get('enabled', True):
+        tts_cache = TTSCache(
+            tts_cache_config.get('directory', 'cache/tts'),
+            tts_cache_config.get('max_bytes', 256 * 1024 * 1024),
+        )
+    return TTSService(tts_instance, tts_cache)
+
+
+phonemizer_config = {
+    "batching": config.get('phonemizer_batching'),
+    "ingest": config.get('audio_ingest'),
+    "vad": config.get('vad'),
+    "chunking": config.get('chunking'),
+    "live": config.get('live_recognition'),
+    "backend": config.get('phoneme_backend'),
+}
+
+# Optionally run recognition and G2P in dedicated worker processes
+process_pool_config = config.get('process_pool', {})
+inference_pool = None
+if process_pool_config.get('enabled', False):
+    inference_pool = ProcessPool(
+        build_worker_services,
+        (config.get('lexicon'), phonemizer_config),
+        workers=process_pool_config.get('workers', 2),
+        concurrency=process_pool_config.get('concurrency', 8),
+        pin_cpus=process_pool_config.get('pin_cpus', True),
+        threads_per_worker=process_pool_config.get('threads_per_worker'),
+    )
+
+
+def load_phonemizer_service() -> PhonemizerService:
+    if inference_pool is not None:
+        inference_pool.start()
+        return PooledPhonemizerService(inference_pool, config.get('audio_ingest'), config.get('live_recognition'))
+    return PhonemizerService(**phonemizer_config)
+
+
+# Models load concurrently in the background once the app starts (see app.py);
+# endpoints that need one answer 503 until it is ready.
+registry = ModelRegistry()
+registry.register("phonemizer", load_phonemizer_service, warmup=lambda service: service.warmup())
+registry.register("tts", load_tts_service, warmup=lambda service: service.strategy.warmup())
+registry.register("feedback", load_feedback_service, warmup=lambda service: service.strategy.warmup())
+
+# Services without a model are ready immediately
+# (with the process pool, G2P calls wait until the workers' speech services are up)
+speech_service = PooledSpeechService(inference_pool) if inference_pool else SpeechService(config.get('lexicon'))
 scoring_service = ScoringService()
 
+# LLM feedback jobs of tiered feedback
+feedback_jobs = FeedbackJobs(
+    ttl_s=tiered_feedback_config.get('job_ttl_s', 600),
+    max_jobs=tiered_feedback_config.get('max_jobs', 1000),
+)
+
+# Each model runs on its own bounded threads so handlers never block the event loop.
+# Admission control bounds each endpoint and fast-fails work that would miss its deadline.
+admission_config = config.get('admission', {})
+executor_limits = dict(config.get('executors') or {})
+if llm_feedback_strategy == 'llama':
+    # The HF LLM batches concurrent calls: a batch can only fill with as many callers
+    batch_size = (config.get('feedback_batching') or {}).get('max_batch_size', 4)
+    executor_limits['feedback'] = max(executor_limits.get('feedback', 1), batch_size)
+executor = ModelExecutor(executor_limits, admission_config.get('queues'))
+admission = AdmissionControl(
+    admission_config.get('endpoints'),
+    poll_s=admission_config.get('disconnect_poll_ms', 250) / 1000,
+)
+
+
+def require(name: str):
+    """Return a loaded model service, or answer 503 while it is still loading."""
+    try:
+        return registry.get(name)
+    except ModelNotReady as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+
+def admit_stream(endpoint: str, *executors: str) -> Ticket:
+    """
+    Admit a streamed request up front, while a 503 can still be sent: take an
+    endpoint slot and check that the executors it needs can meet its deadline.
+    Serve the body with ``admission.stream(ticket, body)``.
+    """
+    ticket = admission.enter(endpoint)
+    try:
+        with admission.bind(ticket):
+            for name in executors:
+                executor.check(name)
+    except Overloaded as e:
+        admission.leave(ticket, completed=False)
+        raise overloaded(e) from None
+    return ticket
+
+
+# Liveness: the process is up and serving
+@router.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+
+# Readiness: every model is loaded and warm; per-model state either way
+@router.get("/readyz")
+async def readyz():
+    ready = registry.is_ready()
+    return JSONResponse(
+        {"ready": ready, "models": registry.status()},
+        status_code=200 if ready else 503,
+    )
+
 
 # Text → IPA
 @router.get("/ipa")
 async def get_ipa(word: str):
-    ipa = speech_service.get_ipa(word)
+    ipa = await executor.run("speech", speech_service.get_ipa, word)
     return {"word": word, "ipa": ipa}
 
 
+class IPABatchRequest(BaseModel):
+    texts: List[str]
+
+
+# Many texts → IPA, streamed back as NDJSON in input order
+@router.post("/ipa/batch")
+async def get_ipa_batch(body: IPABatchRequest):
+    batch_config = config.get('ipa_batch', {})
+    max_items = batch_config.get('max_items', 10000)
+    chunk_size = batch_config.get('chunk_size', 500)
+    if len(body.texts) > max_items:
+        raise HTTPException(status_code=413, detail=f"At most {max_items} texts per batch")
+    ticket = admit_stream("ipa-batch", "speech")
+
+    results = speech_service.get_ipa_many(
+        body.texts,
+        njobs=batch_config.get('njobs', 4),
+        chunk_size=chunk_size,
+    )
+
+    async def ndjson():
+        index = 0
+        while True:
+            # Each chunk is phonemized on the speech executor, off the event loop
+            chunk = await executor.run("speech", list, itertools.islice(results, chunk_size))
+            if not chunk:
+                break
+            for ipa in chunk:
+                yield json.dumps({"index": index, "text": body.texts[index], "ipa": ipa}, ensure_ascii=False) + "\n"
+                index += 1
+
+    return StreamingResponse(admission.stream(ticket, ndjson()), media_type="application/x-ndjson")
+
+
 # IPA scoring
 @router.get("/score")
 async def get_score(word: str, attempt: str = Query(...)):
-    correct_ipa = speech_service.get_ipa(word)
-    score = scoring_service.score(correct_ipa, attempt)
+    correct_ipa = await executor.run("speech", speech_service.get_ipa, word)
+    # Scoring runs off the event loop; attempts come straight from the query string
+    score = await executor.run("speech", scoring_service.score, correct_ipa, attempt)
     return {
         "word": word,
         "correct_ipa": correct_ipa,
@@ -73,37 +271,281 @@ async def get_score(word: str, attempt: str = Query(...)):
     }
 
 
-# Audio → phonemes
+async def read_audio_form(
+    request: Request,
+    phonemizer_service: PhonemizerService,
+    on_field: Optional[Callable[[str, str], None]] = None,
+):
+    """
+    Stream a multipart upload into an in-memory decoder.
+    Returns the text fields and the decoded 16 kHz mono waveform.
+    """
+    decoder = phonemizer_service.decoder()
+    form = StreamingAudioForm(decoder, on_field=on_field)
+    fields = await form.parse(request)
+    try:
+        waveform = await executor.run("audio", decoder.finish)
+    except AudioLimitError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except AudioIngestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return fields, waveform
+
+
+# Audio → phonemes (multipart form with a `file` field)
 @router.post("/audio-phonemes")
-async def audio_to_phonemes(file: UploadFile = File(...)):
-    save_path = phonemizer_service.save_audio(file, Path("temp_audio"))
-    phonemes = phonemizer_service.audio_to_phonemes(save_path)
+async def audio_to_phonemes(request: Request):
+    phonemizer_service = require("phonemizer")
+    async with admission.admit("audio-phonemes"):
+        _, waveform = await read_audio_form(request, phonemizer_service)
+        # The upload is in; from here on a disconnect cancels the work
+        admission.watch(request)
+        phonemes = await executor.run("phonemizer", phonemizer_service.audio_to_phonemes, waveform)
     return {"phonemes": phonemes}
 
 
 
+# Audio scoring (multipart form with `text` and `file` fields)
 @router.post("/audio-score")
-async def score_audio_basic(
-    text: str = Form(...),
-    file: UploadFile = File(...)
-):
-    save_path = phonemizer_service.save_audio(file, Path("temp_audio"))
+async def score_audio_basic(request: Request):
+    phonemizer_service = require("phonemizer")
+    async with admission.admit("audio-score"):
+        fields, waveform = await read_audio_form(request, phonemizer_service)
+        text = fields.get("text")
+        if not text:
+            raise HTTPException(status_code=422, detail="Missing form field: text")
+        admission.watch(request)
+        # A learner scoring a new word no longer needs LLM feedback on the previous one
+        feedback_jobs.moved_on(fields.get("session"), text)
 
-    correct_ipa = speech_service.get_ipa(text)
-    attempt_ipa = phonemizer_service.audio_to_phonemes(save_path)
-    score = scoring_service.score(correct_ipa, attempt_ipa)
+        correct_ipa, transcription = await asyncio.gather(
+            executor.run("speech", speech_service.get_ipa, text),
+            executor.run("phonemizer", phonemizer_service.transcribe, waveform),
+        )
+        attempt_ipa = transcription.phonemes
+        score = await executor.run("speech", scoring_service.score, correct_ipa, attempt_ipa)
+        # Forced alignment reuses the recognizer's log-probabilities; no second model run
+        phonemes = await executor.run("audio", phonemizer_service.align, transcription, correct_ipa)
 
     return {
         "text": text,
         "correct_ipa": correct_ipa,
         "attempt_ipa": attempt_ipa,
-        "score": round(score, 2)
+        "score": round(score, 2),
+        "phonemes": phonemes,
     }
 
 
+# One round trip for a practice attempt (multipart form with `text`, then `file`;
+# optional `feedback=false` skips the LLM, optional `session` for tiered feedback).
+# Streams NDJSON events as each part is ready: `score`, `tts` (base64 WAV) and
+# `feedback` (twice with tiered feedback: `rule-based`, then `llm`), then `done`.
+# TTS and G2P start as soon as the `text` field arrives, recognition as soon as the
+# upload ends, feedback once scored.
+@router.post("/practice")
+async def practice(request: Request):
+    phonemizer_service = require("phonemizer")
+    ticket = admission.enter("practice")
+    started: Dict[str, asyncio.Task] = {}
+
+    def on_field(name: str, value: str):
+        if name == "text" and value and "ipa" not in started:
+            started["ipa"] = asyncio.create_task(executor.run("speech", speech_service.get_ipa, value))
+            started["tts"] = asyncio.create_task(practice_tts(value))
+
+    try:
+        # Every part of the attempt runs under the request's ticket, tasks included
+        with admission.bind(ticket):
+            fields, waveform = await read_audio_form(request, phonemizer_service, on_field)
+            text = fields.get("text")
+            if not text:
+                raise HTTPException(status_code=422, detail="Missing form field: text")
+            executor.check("phonemizer")
+    except BaseException as e:
+        for task in started.values():
+            task.cancel()
+        admission.leave(ticket, completed=False)
+        if isinstance(e, Overloaded):
+            raise overloaded(e) from None
+        raise
+    admission.watch(request, ticket)
+    session = fields.get("session")
+    feedback_jobs.moved_on(session, text)
+
+    async def recognize() -> dict:
+        correct_ipa, transcription = await asyncio.gather(
+            started["ipa"],
+            executor.run("phonemizer", phonemizer_service.transcribe, waveform),
+        )
+        attempt_ipa = transcription.phonemes
+        return {
+            "type": "score",
+            "text": text,
+            "correct_ipa": correct_ipa,
+            "attempt_ipa": attempt_ipa,
+            "score": round(await executor.run("speech", scoring_service.score, correct_ipa, attempt_ipa), 2),
+            "phonemes": await executor.run("audio", phonemizer_service.align, transcription, correct_ipa),
+        }
+
+    async def feedback(scored: asyncio.Task) -> dict:
+        result = await scored
+        if result["score"] == 1:
+            return {"type": "feedback", "feedback": "Perfect pronunciation! Well done!"}
+        if instant_feedback is not None:
+            tips = await executor.run(
+                "speech", instant_feedback.generate_feedback, text, result["correct_ipa"], result["attempt_ipa"]
+            )
+            return {"type": "feedback", "tier": "rule-based", "feedback": tips}
+        feedback_service = registry.get("feedback")
+        args = (text, result["correct_ipa"], result["attempt_ipa"])
+        # Memoized feedback is served without queueing behind the LLM
+        feedback = await executor.run("cache", feedback_service.lookup, *args)
+        if feedback is None:
+            feedback = await executor.run("feedback", feedback_service.generate, *args)
+        return {"type": "feedback", "feedback": feedback}
+
+    async def upgraded_feedback(scored: asyncio.Task) -> Optional[dict]:
+        result = await scored
+        if result["score"] == 1:
+            return None
+        upgrade = await start_llm_feedback(session, text, result["correct_ipa"], result["attempt_ipa"])
+        if not upgrade:
+            raise ModelNotReady("Model 'feedback' is not ready")
+        if "job" in upgrade:
+            # Leaving this stream doesn't drop the job; it can still be polled
+            job = feedback_jobs.get(upgrade["job"]["job_id"])
+            async for _ in feedback_jobs.updates(job):
+                pass
+            if job.state != "done":
+                raise RuntimeError(job.error or f"LLM feedback {job.state}")
+            upgrade = {"tier": "llm", "feedback": job.feedback, "job_id": job.id}
+        return {"type": "feedback", **upgrade}
+
+    with admission.bind(ticket):
+        scored = asyncio.create_task(recognize())
+        parts = {scored: "score", started["tts"]: "tts"}
+        if fields.get("feedback", "true").lower() != "false":
+            parts[asyncio.create_task(feedback(scored))] = "feedback"
+            if instant_feedback is not None:
+                parts[asyncio.create_task(upgraded_feedback(scored))] = "feedback"
+
+    async def ndjson():
+        start_time = time.time()
+        pending = set(parts)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        event = task.result()
+                    except Exception as e:
+                        # One failed part (e.g. a model still loading) doesn't fail the others
+                        event = {"type": "error", "part": parts[task], "detail": str(e)}
+                    print(f"Practice {parts[task]} ready after {time.time() - start_time:.2f} seconds")
+                    if event is not None:
+                        yield json.dumps(event, ensure_ascii=False) + "\n"
+            yield json.dumps({"type": "done"}) + "\n"
+        finally:
+            # Client went away: stop waiting on the remaining parts
+            for task in [*pending, started["ipa"]]:
+                task.cancel()
+
+    return StreamingResponse(admission.stream(ticket, ndjson()), media_type="application/x-ndjson")
+
+
+async def practice_tts(text: str) -> dict:
+    """Reference audio for /practice, from the TTS cache or freshly synthesized."""
+    tts_service = registry.get("tts")
+    audio = await executor.run("cache", tts_service.lookup, text)
+    if audio is None:
+        audio = await executor.run("tts", tts_service.synthesize, text)
+    return {"type": "tts", "media_type": "audio/wav", "audio": base64.b64encode(audio).decode("ascii")}
+
+
+# Live recognition while the learner speaks. Query: `text` (optional, enables scoring)
+# and `format` (`webm` for MediaRecorder chunks, `pcm` for 16 kHz s16le mono).
+# Binary messages carry audio; the text message "stop" ends the recording.
+@router.websocket("/ws/recognize")
+async def recognize_live(websocket: WebSocket, text: str | None = None, format: str = "webm"):
+    await websocket.accept()
+    try:
+        phonemizer_service = registry.get("phonemizer")
+    except ModelNotReady as e:
+        await websocket.send_json({"type": "error", "detail": str(e)})
+        await websocket.close(code=1013)  # Try again later
+        return
+    session = phonemizer_service.live_session("pcm" if format == "pcm" else "webm")
+    correct_ipa = None
+    update = None
+
+    async def push_partial():
+        # Partials are best effort: a pass that fails or is turned away is skipped,
+        # and the final pass reports the error
+        try:
+            phonemes = await executor.run("phonemizer", session.update)
+            message = {"type": "partial", "attempt_ipa": phonemes}
+            if correct_ipa:
+                message["score"] = round(await executor.run("speech", scoring_service.score_prefix, correct_ipa, phonemes), 2)
+            await websocket.send_json(message)
+        except Overloaded:
+            pass
+        except Exception as e:
+            print(f"Skipped a live partial: {type(e).__name__}: {e}")
+
+    async def close_with_error(detail: str, code: int):
+        session.abort()
+        if update is not None:
+            update.cancel()
+        try:
+            await websocket.send_json({"type": "error", "detail": detail})
+            await websocket.close(code=code)
+        except Exception:
+            # The client has gone already
+            pass
+
+    try:
+        correct_ipa = await executor.run("speech", speech_service.get_ipa, text) if text else None
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                session.abort()
+                if update is not None:
+                    update.cancel()
+                return
+            if message.get("bytes"):
+                session.feed(message["bytes"])
+                # At most one pass in flight; audio that arrives meanwhile is picked up by the next one
+                if (update is None or update.done()) and session.due():
+                    update = asyncio.create_task(push_partial())
+            elif message.get("text") == "stop":
+                break
+        if update is not None:
+            await update
+        transcription = await executor.run("phonemizer", session.finish)
+
+        result = {"type": "final", "text": text, "attempt_ipa": transcription.phonemes}
+        if correct_ipa:
+            result.update({
+                "correct_ipa": correct_ipa,
+                "score": round(await executor.run("speech", scoring_service.score, correct_ipa, transcription.phonemes), 2),
+                "phonemes": await executor.run("audio", phonemizer_service.align, transcription, correct_ipa),
+            })
+    except AudioIngestError as e:
+        await close_with_error(str(e), 1009 if isinstance(e, AudioLimitError) else 1003)
+        return
+    except Overloaded as e:
+        await close_with_error(str(e), 1013)  # Try again later
+        return
+    except Exception as e:
+        await close_with_error(str(e), 1011)  # Internal error
+        raise
+    await websocket.send_json(result)
+    await websocket.close()
+
 
 @router.post("/llm-feedback")
 async def llm_feedback(
+    request: Request,
     text: str = Form(...),
     correct_ipa: str = Form(...),
     attempt_ipa: str = Form(...),
@@ -112,11 +554,18 @@ async def llm_feedback(
     time_start = time.time()
     if score == 1:
         return {"feedback": "Perfect pronunciation! Well done!"}
-    feedback = llm_feedback_service.get_feedback(
-        word=text,
-        expected_phonemes=correct_ipa,
-        user_phonemes=attempt_ipa
-    )
+    llm_feedback_service = require("feedback")
+    async with admission.admit("llm-feedback", request):
+        # Memoized feedback is served without queueing behind the LLM
+        feedback = await executor.run("cache", llm_feedback_service.lookup, text, correct_ipa, attempt_ipa)
+        if feedback is None:
+            feedback = await executor.run(
+                "feedback",
+                llm_feedback_service.generate,
+                word=text,
+                expected_phonemes=correct_ipa,
+                user_phonemes=attempt_ipa
+            )
     time_end = time.time()
     print(f"LLM feedback generation took {time_end - time_start:.2f} seconds")
     return {"feedback": feedback}
@@ -124,12 +573,211 @@ async def llm_feedback(
 
 
 
+# Token-by-token LLM feedback as Server-Sent Events
+@router.post("/llm-feedback/stream")
+async def llm_feedback_stream(
+    text: str = Form(...),
+    correct_ipa: str = Form(...),
+    attempt_ipa: str = Form(...),
+    score: float = Form(...)
+):
+    llm_feedback_service = require("feedback") if score != 1 else None
+    ticket = admit_stream("llm-feedback", "feedback")
+
+    async def events():
+        if score == 1:
+            yield sse_event({"token": "Perfect pronunciation! Well done!"})
+        elif (cached := await executor.run("cache", llm_feedback_service.lookup, text, correct_ipa, attempt_ipa)) is not None:
+            yield sse_event({"token": cached})
+        else:
+            tokens = executor.iterate(
+                "feedback",
+                llm_feedback_service.stream_feedback,
+                word=text,
+                expected_phonemes=correct_ipa,
+                user_phonemes=attempt_ipa,
+            )
+            async for token in tokens:
+                yield sse_event({"token": token})
+        yield sse_event({}, event="done")
+
+    return StreamingResponse(
+        admission.stream(ticket, events()),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def sse_event(data: dict, event: str | None = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def start_llm_feedback(session: str | None, text: str, correct_ipa: str, attempt_ipa: str) -> dict:
+    """
+    The LLM tier of tiered feedback: memoized feedback if there is some, otherwise
+    a background job (dropping the session's previous one). Empty while the LLM loads.
+    """
+    try:
+        llm_feedback_service = registry.get("feedback")
+    except ModelNotReady:
+        return {}
+    cached = await executor.run("cache", llm_feedback_service.lookup, text, correct_ipa, attempt_ipa)
+    if cached is not None:
+        return {"tier": "llm", "feedback": cached}
+
+    async def tokens() -> AsyncIterator[str]:
+        # The job outlives the request that started it, so it runs under its own ticket
+        with admission.bind(admission.ticket("feedback-job")):
+            async for token in executor.iterate(
+                "feedback",
+                llm_feedback_service.stream_feedback,
+                word=text,
+                expected_phonemes=correct_ipa,
+                user_phonemes=attempt_ipa,
+            ):
+                yield token
+
+    job = feedback_jobs.submit(session, text, tokens)
+    return {"job": job.to_dict()}
+
+
+# Tiered feedback (feedback_strategy "tiered"): rule-based feedback in the response,
+# LLM feedback under `job` to poll at /feedback/jobs/{id} or subscribe to at .../events.
+# `session` identifies the learner so their stale jobs can be dropped.
+@router.post("/feedback")
+async def tiered_feedback(
+    request: Request,
+    text: str = Form(...),
+    correct_ipa: str = Form(...),
+    attempt_ipa: str = Form(...),
+    score: float = Form(...),
+    session: str | None = Form(None),
+):
+    if instant_feedback is None:
+        raise HTTPException(status_code=404, detail="Tiered feedback is off; set feedback_strategy to 'tiered'")
+    if score == 1:
+        return {"tier": "rule-based", "feedback": "Perfect pronunciation! Well done!"}
+    tips = await executor.run("speech", instant_feedback.generate_feedback, text, correct_ipa, attempt_ipa)
+    result = {"tier": "rule-based", "feedback": tips}
+    # The LLM feedback replaces the rule-based one if it is already memoized
+    async with admission.admit("feedback", request):
+        upgrade = await start_llm_feedback(session, text, correct_ipa, attempt_ipa)
+    return {**result, **upgrade}
+
+
+def get_feedback_job(job_id: str):
+    job = feedback_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired feedback job")
+    return job
+
+
+@router.get("/feedback/jobs/{job_id}")
+async def poll_feedback_job(job_id: str):
+    return get_feedback_job(job_id).to_dict()
+
+
+# Server-Sent Events: `{"state", "token"}` as the LLM generates, then `event: done` with the job
+@router.get("/feedback/jobs/{job_id}/events")
+async def feedback_job_events(job_id: str):
+    job = get_feedback_job(job_id)
+
+    async def events():
+        sent = 0
+        async for update in feedback_jobs.updates(job):
+            if not update.finished:
+                yield sse_event({"state": update.state, "token": update.feedback[sent:]})
+                sent = len(update.feedback)
+        # The final event carries the whole (trimmed) feedback, or why there is none
+        yield sse_event(job.to_dict(), event="done")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.delete("/feedback/jobs/{job_id}")
+async def drop_feedback_job(job_id: str):
+    job = get_feedback_job(job_id)
+    feedback_jobs.drop(job)
+    return {"job_id": job.id}
+
+
+
+
 @router.post("/tts")
-async def tts_endpoint(text: str = Form(...)):
-    start_time = time.time()
-    path = tts_service.synthesize(text)
+async def tts_endpoint(
+    request: Request,
+    text: str = Form(...),
+    stream: bool = Query(False),
+    format: str = Query("pcm", pattern="^(pcm|opus)$"),
+):
+    tts_service = require("tts")
+    if stream:
+        return stream_tts(tts_service, text, format)
 
+    start_time = time.time()
+    async with admission.admit("tts", request):
+        # Cache hits are served without queueing behind the TTS model
+        audio = await executor.run("cache", tts_service.lookup, text)
+        if audio is None:
+            audio = await executor.run("tts", tts_service.synthesize, text)
 
     elapsed_time = time.time() - start_time
     print(f"TTS generation took {elapsed_time:.2f} seconds")
-    return FileResponse(path, media_type="audio/wav", filename=str(path))
\ No newline at end of file
+    return Response(content=audio, media_type="audio/wav")
+
+
+def stream_tts(tts_service: TTSService, text: str, format: str) -> StreamingResponse:
+    """
+    Stream synthesized speech as chunks are generated: raw 16-bit little-endian
+    mono PCM (sample rate in the X-Sample-Rate header) or Ogg/Opus.
+    """
+    sample_rate = tts_service.sample_rate
+    encoder = OggOpusEncoder(sample_rate) if format == "opus" else None
+    ticket = admit_stream("tts", "tts")
+
+    async def body():
+        start_time = time.time()
+        first = True
+        # Closing this iterator (client went away) stops generation
+        async for chunk in executor.iterate("tts", tts_service.synthesize_stream, text):
+            if first:
+                print(f"TTS first audio after {time.time() - start_time:.2f} seconds")
+                first = False
+            yield encoder.encode(chunk) if encoder else pcm16_bytes(chunk)
+        if encoder:
+            yield encoder.flush()
+        print(f"TTS stream finished in {time.time() - start_time:.2f} seconds")
+
+    if encoder:
+        return StreamingResponse(admission.stream(ticket, body()), media_type="audio/ogg")
+    return StreamingResponse(
+        admission.stream(ticket, body()),
+        media_type="application/octet-stream",
+        headers={"X-Sample-Rate": str(sample_rate), "X-Sample-Format": "s16le", "X-Channels": "1"},
+    )
+
+
+
+# Runtime statistics (batching, VAD savings, lexicon and TTS caches, queues, worker memory, ...)
+@router.get("/stats")
+async def get_stats():
+    # Models still loading report their loading state instead
+    def model_stats(name: str) -> dict:
+        return registry.get(name).stats() if registry.is_ready(name) else registry.status()[name]
+
+    # Pooled services ask their worker processes, so these go through the executor
+    return {
+        "phonemizer": await executor.run("phonemizer", model_stats, "phonemizer"),
+        "speech": await executor.run("speech", speech_service.stats),
+        "tts": model_stats("tts"),
+        "feedback": model_stats("feedback"),
+        "feedback_jobs": feedback_jobs.stats(),
+        "executors": executor.stats(),
+        "admission": admission.stats(),
+        "process": process_memory(),
+    }
@@ -0,0 +1,112 @@
+from typing import Callable, Dict, Optional
+from fastapi import HTTPException, Request
+from core.audio.ingest import AudioIngestError, AudioLimitError, StreamingDecoder
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+MAX_FIELD_BYTES = 64 * 1024
+
+
+def _decode(value: bytes, what: str) -> str:
+    try:
+        return value.decode("utf-8")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail=f"Malformed upload: {what} is not UTF-8") from None
+
+
+class StreamingAudioForm:
+    """
+    Parse a multipart form while the request body is still arriving.
+
+    Text fields are collected in ``fields``; the bytes of the audio part are
+    fed straight into a ``StreamingDecoder`` so decoding overlaps the upload
+    and nothing is written to disk. ``on_field(name, value)`` is called as
+    soon as each text field is complete, so work that only needs the text can
+    start while the audio is still uploading.
+    """
+
+    def __init__(
+        self,
+        decoder: StreamingDecoder,
+        file_field: str = "file",
+        on_field: Optional[Callable[[str, str], None]] = None,
+    ):
+        self.decoder = decoder
+        self.file_field = file_field
+        self.on_field = on_field
+        self.fields: Dict[str, str] = {}
+        self.has_file = False
+
+        self._header_field = b""
+        self._header_value = b""
+        self._name: Optional[str] = None
+        self._is_file = False
+        self._value = bytearray()
+
+    async def parse(self, request: Request) -> Dict[str, str]:
+        content_type, params = parse_options_header(request.headers.get("content-type", ""))
+        if content_type != b"multipart/form-data" or b"boundary" not in params:
+            raise HTTPException(status_code=415, detail="Expected multipart/form-data")
+        content_length = int(request.headers.get("content-length") or 0)
+        if content_length > self.decoder.max_bytes + MAX_FIELD_BYTES:
+            raise HTTPException(status_code=413, detail="Audio upload too large")
+
+        parser = MultipartParser(params[b"boundary"], {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+        try:
+            async for chunk in request.stream():
+                parser.write(chunk)
+            parser.finalize()
+        except AudioLimitError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except AudioIngestError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception:
+            self.decoder.abort()
+            raise
+
+        if not self.has_file:
+            self.decoder.abort()
+            raise HTTPException(status_code=422, detail=f"Missing form field: {self.file_field}")
+        return self.fields
+
+    def _on_part_begin(self):
+        self._name, self._is_file = None, False
+        self._value = bytearray()
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        if self._header_field.lower() == b"content-disposition":
+            _, options = parse_options_header(self._header_value)
+            self._name = _decode(options.get(b"name", b""), "form field name")
+            self._is_file = self._name == self.file_field
+            self.has_file = self.has_file or self._is_file
+        self._header_field, self._header_value = b"", b""
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._is_file:
+            self.decoder.feed(data[start:end])
+        elif self._name is not None:
+            self._value += data[start:end]
+            if len(self._value) > MAX_FIELD_BYTES:
+                raise HTTPException(status_code=413, detail=f"Form field too large: {self._name}")
+
+    def _on_part_end(self):
+        if self._name is not None and not self._is_file:
+            self.fields[self._name] = _decode(self._value, f"form field {self._name}")
+            if self.on_field is not None:
+                self.on_field(self._name, self.fields[self._name])
@@ -1,11 +1,21 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
-from api.routes import router
+from api.routes import config, registry, router
 import pathlib
 import uvicorn
 
-app = FastAPI(title="French Pronunciation Tutor API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load models in the background; the app serves requests meanwhile.
+    # In a preforked worker the models are already loaded and only warm up here.
+    registry.start()
+    yield
+
+
+app = FastAPI(title="French Pronunciation Tutor API", lifespan=lifespan)
 
 # Include your API router
 app.include_router(router)
@@ -21,9 +31,28 @@ def index():
 
 # Entry point
 if __name__ == "__main__":
+    server_config = config.get("server", {})
+    workers = server_config.get("workers", 1)
+    if workers > 1 and config.get("feedback_strategy") == "tiered":
+        # Jobs live in the worker that started them; polls and drops reach any worker
+        raise SystemExit("feedback_strategy 'tiered' needs server.workers = 1: feedback jobs are kept per process")
+    if workers > 1 and server_config.get("preload", False):
+        if config.get("process_pool", {}).get("enabled", False):
+            raise SystemExit("server.preload cannot be combined with process_pool: forked workers cannot share the pool")
+        from api.prefork import serve_preforked
+
+        serve_preforked(
+            app,
+            registry,
+            host=server_config.get("host", "0.0.0.0"),
+            port=server_config.get("port", 8000),
+            workers=workers,
+        )
+        raise SystemExit
     uvicorn.run(
         "app:app",
-        host="0.0.0.0",   # accessible on local network
-        port=8000,
-        reload=True       # auto-reload on code changes
-    )
\ No newline at end of file
+        host=server_config.get("host", "0.0.0.0"),  # accessible on local network
+        port=server_config.get("port", 8000),
+        reload=server_config.get("reload", False),  # auto-reload on code changes; reloads every model
+        workers=workers,  # each worker loads its own copy of every model
+    )
@@ -0,0 +1,163 @@
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from core.phonemes import FRENCH
+
+# Longest phoneme sequence scored; longer input (a whole paragraph in a form field) is cut here
+MAX_PHONEMES = 512
+
+# One aligned position: ("equal" | "sub" | "del" | "ins", expected phoneme, produced phoneme)
+AlignmentOp = Tuple[str, Optional[str], Optional[str]]
+
+
+def _pad(sequences: Sequence[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    lengths = np.array([len(s) for s in sequences], dtype=np.int64)
+    padded = np.zeros((len(sequences), max(lengths.max(initial=0), 1)), dtype=np.int64)
+    for row, seq in zip(padded, sequences):
+        row[:len(seq)] = seq
+    return padded, lengths
+
+
+def _rows(
+    refs: Sequence[np.ndarray],
+    hyps: Sequence[np.ndarray],
+    substitution: np.ndarray,
+    indel: np.ndarray,
+) -> Iterator[np.ndarray]:
+    """
+    Yield the rows D[:, 0], D[:, 1], ... of the batched weighted edit-distance DP.
+
+    Sequences are padded to a common length and the whole batch advances one
+    reference row at a time. Within a row, the insertion chain
+    D[i, j] = min(D[i, j - 1] + ins(j), ...) is a running minimum of
+    (candidate - cumulative insertion cost), so it vectorizes with
+    np.minimum.accumulate instead of a loop over columns. Padding never
+    influences D[b, :n_b + 1, :m_b + 1].
+    """
+    ref, _ = _pad(refs)
+    hyp, _ = _pad(hyps)
+    batch, n, m = len(refs), ref.shape[1], hyp.shape[1]
+
+    # C[:, j] = cost of inserting the first j hypothesis phonemes
+    insert_cumulative = np.zeros((batch, m + 1), dtype=np.float64)
+    np.cumsum(indel[hyp], axis=1, out=insert_cumulative[:, 1:])
+
+    previous = insert_cumulative
+    yield previous
+    for i in range(1, n + 1):
+        symbols = ref[:, i - 1]
+        delete = indel[symbols][:, None]
+        candidate = np.empty((batch, m + 1), dtype=np.float64)
+        candidate[:, 0] = previous[:, 0] + delete[:, 0]
+        np.minimum(
+            previous[:, :-1] + substitution[symbols[:, None], hyp],
+            previous[:, 1:] + delete,
+            out=candidate[:, 1:],
+        )
+        previous = insert_cumulative + np.minimum.accumulate(candidate - insert_cumulative, axis=1)
+        yield previous
+
+
+def edit_distance_matrix(
+    refs: Sequence[np.ndarray],
+    hyps: Sequence[np.ndarray],
+    substitution: np.ndarray = FRENCH.substitution,
+    indel: np.ndarray = FRENCH.indel,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Weighted edit-distance DP for a batch of (reference, hypothesis) ID
+    sequences, keeping every row for a backtrace.
+
+    Returns the (B, N + 1, M + 1) cost matrix and the reference and hypothesis lengths.
+    """
+    ref_lengths = np.array([len(r) for r in refs], dtype=np.int64)
+    hyp_lengths = np.array([len(h) for h in hyps], dtype=np.int64)
+    d = np.stack(list(_rows(refs, hyps, substitution, indel)), axis=1)
+    return d, ref_lengths, hyp_lengths
+
+
+def distances(
+    refs: Sequence[np.ndarray],
+    hyps: Sequence[np.ndarray],
+    substitution: np.ndarray = FRENCH.substitution,
+    indel: np.ndarray = FRENCH.indel,
+) -> np.ndarray:
+    """
+    Weighted edit distance of each (reference, hypothesis) pair. Only two rows
+    of the DP are alive at a time; each pair's distance is read off the row of
+    its own reference length.
+    """
+    ref_lengths = np.array([len(r) for r in refs], dtype=np.int64)
+    hyp_lengths = np.array([len(h) for h in hyps], dtype=np.int64)
+    result = np.empty(len(refs), dtype=np.float64)
+    for i, row in enumerate(_rows(refs, hyps, substitution, indel)):
+        done = ref_lengths == i
+        result[done] = row[done, hyp_lengths[done]]
+    return result
+
+
+def backtrace(
+    d: np.ndarray,
+    ref: np.ndarray,
+    hyp: np.ndarray,
+    tables: Tuple[np.ndarray, np.ndarray, List[str]] = FRENCH.tables({}),
+) -> List[AlignmentOp]:
+    """Recover one optimal alignment from a single pair's cost matrix."""
+    substitution, indel, symbols = tables
+    ops: List[AlignmentOp] = []
+    i, j = len(ref), len(hyp)
+    while i > 0 or j > 0:
+        if i > 0 and j > 0 and np.isclose(d[i, j], d[i - 1, j - 1] + substitution[ref[i - 1], hyp[j - 1]]):
+            op = "equal" if ref[i - 1] == hyp[j - 1] else "sub"
+            ops.append((op, symbols[ref[i - 1]], symbols[hyp[j - 1]]))
+            i, j = i - 1, j - 1
+        elif i > 0 and np.isclose(d[i, j], d[i - 1, j] + indel[ref[i - 1]]):
+            ops.append(("del", symbols[ref[i - 1]], None))
+            i -= 1
+        else:
+            ops.append(("ins", None, symbols[hyp[j - 1]]))
+            j -= 1
+    ops.reverse()
+    return ops
+
+
+def similarity(distance: float, ref_length: int, hyp_length: int) -> float:
+    """Map a weighted distance onto a 0..1 score, like the old normalized Levenshtein."""
+    if ref_length == 0:
+        return 0.0
+    return max(0.0, 1 - float(distance) / max(ref_length, hyp_length))
+
+
+def score_many(pairs: Sequence[Tuple[str, str]]) -> List[float]:
+    """Score a batch of (expected IPA, attempted IPA) pairs in one vectorized pass."""
+    if not pairs:
+        return []
+    extra: Dict[str, int] = {}
+    refs = [FRENCH.encode(expected, extra, MAX_PHONEMES) for expected, _ in pairs]
+    hyps = [FRENCH.encode(attempt, extra, MAX_PHONEMES) for _, attempt in pairs]
+    substitution, indel, _ = FRENCH.tables(extra)
+    return [
+        similarity(distance, len(ref), len(hyp))
+        for distance, ref, hyp in zip(distances(refs, hyps, substitution, indel), refs, hyps)
+    ]
+
+
+@lru_cache(maxsize=4096)
+def score(expected: str, attempt: str) -> float:
+    """Score one attempt, without keeping the DP matrix an alignment needs."""
+    return score_many([(expected, attempt)])[0]
+
+
+@lru_cache(maxsize=4096)
+def align(expected: str, attempt: str) -> Tuple[float, Tuple[AlignmentOp, ...]]:
+    """
+    Score one attempt and return its phoneme alignment.
+
+    Memoized, so explaining an attempt that was just aligned (rule-based
+    feedback) doesn't run the DP again.
+    """
+    extra: Dict[str, int] = {}
+    ref, hyp = FRENCH.encode(expected, extra, MAX_PHONEMES), FRENCH.encode(attempt, extra, MAX_PHONEMES)
+    tables = FRENCH.tables(extra)
+    d, _, _ = edit_distance_matrix([ref], [hyp], *tables[:2])
+    return similarity(d[0, len(ref), len(hyp)], len(ref), len(hyp)), tuple(backtrace(d[0], ref, hyp, tables))
@@ -0,0 +1,52 @@
+import io
+import av
+import numpy as np
+
+OPUS_SAMPLE_RATE = 48000
+
+
+def pcm16_bytes(waveform: np.ndarray) -> bytes:
+    """Convert a float waveform in [-1, 1] to raw little-endian 16-bit PCM."""
+    return (np.clip(waveform, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+
+class OggOpusEncoder:
+    """
+    Incremental Ogg/Opus encoder for streaming responses.
+
+    ``encode`` accepts float PCM chunks at any sample rate and returns the Ogg
+    pages completed so far; ``flush`` returns the rest of the stream.
+    """
+
+    def __init__(self, sample_rate: int, bitrate: int = 32000):
+        self.sample_rate = sample_rate
+        self._buffer = io.BytesIO()
+        self._position = 0
+        self._container = av.open(self._buffer, mode="w", format="ogg")
+        self._stream = self._container.add_stream("libopus", rate=OPUS_SAMPLE_RATE, layout="mono")
+        self._stream.bit_rate = bitrate
+        self._resampler = av.AudioResampler(format="flt", layout="mono", rate=OPUS_SAMPLE_RATE)
+
+    def encode(self, waveform: np.ndarray) -> bytes:
+        frame = av.AudioFrame.from_ndarray(
+            np.ascontiguousarray(waveform, dtype=np.float32)[None, :], format="flt", layout="mono"
+        )
+        frame.sample_rate = self.sample_rate
+        for resampled in self._resampler.resample(frame):
+            for packet in self._stream.encode(resampled):
+                self._container.mux(packet)
+        return self._read()
+
+    def flush(self) -> bytes:
+        for resampled in self._resampler.resample(None):
+            for packet in self._stream.encode(resampled):
+                self._container.mux(packet)
+        for packet in self._stream.encode(None):
+            self._container.mux(packet)
+        self._container.close()
+        return self._read()
+
+    def _read(self) -> bytes:
+        data = self._buffer.getbuffer()[self._position:].tobytes()
+        self._position += len(data)
+        return data
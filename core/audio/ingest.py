@@ -0,0 +1,181 @@
+import queue
+import threading
+from typing import Optional
+import av
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+class AudioIngestError(ValueError):
+    """The uploaded audio could not be decoded."""
+
+
+class AudioLimitError(AudioIngestError):
+    """The uploaded audio is larger or longer than allowed."""
+
+
+class _ChunkReader:
+    """Blocking, non-seekable file object over chunks pushed from another thread."""
+
+    def __init__(self):
+        self._chunks: "queue.Queue[Optional[bytes]]" = queue.Queue()
+        self._buffer = bytearray()
+        self._eof = False
+
+    def push(self, data: Optional[bytes]):
+        self._chunks.put(data)
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            chunk = self._chunks.get()
+            if chunk is None:
+                self._eof = True
+            else:
+                self._buffer += chunk
+        if size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+
+class StreamingDecoder:
+    """
+    Decode uploaded audio (WebM/Opus, WAV, OGG) into a 16 kHz mono float32 buffer in memory.
+
+    Bytes are handed over with ``feed`` as they arrive; decoding runs in a
+    background thread from the first chunk on, so most of the work is done by
+    the time the upload completes. ``finish`` returns the decoded samples as a
+    view on the internal buffer, without an extra copy.
+    """
+
+    def __init__(self, max_bytes: int = 10 * 1024 * 1024, max_seconds: float = 30.0, sample_rate: int = SAMPLE_RATE):
+        self.max_bytes = max_bytes
+        self.max_samples = int(max_seconds * sample_rate)
+        self.sample_rate = sample_rate
+        self.bytes_received = 0
+
+        self._reader = _ChunkReader()
+        self._buffer = np.empty(sample_rate * 4, dtype=np.float32)
+        self._samples = 0
+        self._error: Optional[Exception] = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._decode, name="audio-decoder", daemon=True)
+
+    def feed(self, data: bytes):
+        """Hand the next chunk of the upload to the decoder."""
+        if self._error is not None:
+            raise self._error
+        if not data:
+            return
+        self.bytes_received += len(data)
+        if self.bytes_received > self.max_bytes:
+            self.abort()
+            raise AudioLimitError(f"Audio upload exceeds {self.max_bytes} bytes")
+        if self._thread.ident is None:
+            self._thread.start()
+        self._reader.push(bytes(data))
+
+    def finish(self) -> np.ndarray:
+        """Signal the end of the upload and wait for the decoded waveform. Blocks."""
+        self._close()
+        if self._thread.ident is not None:
+            self._thread.join()
+        if self._error is not None:
+            raise self._error
+        if self._samples == 0:
+            raise AudioIngestError("No audio found in upload")
+        return self._buffer[:self._samples]
+
+    def decoded(self) -> np.ndarray:
+        """Samples decoded so far, while the upload is still arriving. Does not block."""
+        # Read the count first: _append swaps in a larger copy of the buffer before raising it
+        samples = self._samples
+        return self._buffer[:samples]
+
+    def abort(self):
+        """Stop decoding and drop everything received so far."""
+        if self._error is None:
+            self._error = AudioIngestError("Upload aborted")
+        self._close()
+
+    def _close(self):
+        if not self._closed:
+            self._closed = True
+            self._reader.push(None)
+
+    def _append(self, samples: np.ndarray):
+        end = self._samples + samples.shape[0]
+        if end > self.max_samples:
+            raise AudioLimitError(f"Audio is longer than {self.max_samples / self.sample_rate:.0f} seconds")
+        if end > self._buffer.shape[0]:
+            grown = np.empty(max(end, self._buffer.shape[0] * 2), dtype=np.float32)
+            grown[:self._samples] = self._buffer[:self._samples]
+            self._buffer = grown
+        self._buffer[self._samples:end] = samples
+        self._samples = end
+
+    def _decode(self):
+        try:
+            with av.open(self._reader, mode="r") as container:
+                if not container.streams.audio:
+                    raise AudioIngestError("Upload contains no audio stream")
+                stream = container.streams.audio[0]
+                resampler = av.AudioResampler(format="flt", layout="mono", rate=self.sample_rate)
+                for frame in container.decode(stream):
+                    for out in resampler.resample(frame):
+                        self._append(out.to_ndarray()[0])
+                for out in resampler.resample(None):
+                    self._append(out.to_ndarray()[0])
+        except AudioIngestError as e:
+            self._error = e
+        except Exception as e:
+            if self._error is None:
+                self._error = AudioIngestError(f"Could not decode audio: {e}")
+
+
+class PCMDecoder(StreamingDecoder):
+    """
+    Raw 16-bit little-endian mono PCM at the target sample rate, with the same
+    interface and limits as ``StreamingDecoder``. Samples are converted as they
+    are fed, so there is no decoding thread.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._partial = b""
+
+    def feed(self, data: bytes):
+        if self._error is not None:
+            raise self._error
+        if not data:
+            return
+        self.bytes_received += len(data)
+        if self.bytes_received > self.max_bytes:
+            self.abort()
+            raise AudioLimitError(f"Audio upload exceeds {self.max_bytes} bytes")
+        # A frame may end in the middle of a sample
+        data = self._partial + bytes(data)
+        usable = len(data) - len(data) % 2
+        self._partial = data[usable:]
+        try:
+            self._append(np.frombuffer(data[:usable], dtype="<i2").astype(np.float32) / 32768.0)
+        except AudioLimitError as e:
+            self._error = e
+            raise
+
+    def finish(self) -> np.ndarray:
+        self._close()
+        if self._error is not None:
+            raise self._error
+        if self._samples == 0:
+            raise AudioIngestError("No audio found in upload")
+        return self._buffer[:self._samples]
+
+
+def decode_bytes(data: bytes, max_bytes: int = 10 * 1024 * 1024, max_seconds: float = 30.0) -> np.ndarray:
+    """Decode a complete audio file held in memory."""
+    decoder = StreamingDecoder(max_bytes=max_bytes, max_seconds=max_seconds)
+    decoder.feed(data)
+    return decoder.finish()
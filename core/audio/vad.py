@@ -0,0 +1,87 @@
+import threading
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+class VoiceActivityTrimmer:
+    """
+    Energy / zero-crossing voice activity detector that cuts leading and trailing silence.
+
+    A frame counts as speech when its energy is within ``threshold_db`` of the
+    loudest frame, or when it is up to ``fricative_margin_db`` quieter but has a
+    high zero-crossing rate (quiet fricatives such as /s/ or /ʃ/). Everything is
+    computed on all frames at once with NumPy; the trimmed audio is a view on
+    the input, so nothing is copied.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = SAMPLE_RATE,
+        frame_ms: float = 20.0,
+        threshold_db: float = -35.0,
+        min_energy_db: float = -60.0,
+        fricative_margin_db: float = 10.0,
+        zcr_threshold: float = 0.25,
+        padding_ms: float = 150.0,
+    ):
+        self.sample_rate = sample_rate
+        self.frame_length = max(1, int(sample_rate * frame_ms / 1000))
+        self.threshold_db = threshold_db
+        self.min_energy_db = min_energy_db
+        self.fricative_margin_db = fricative_margin_db
+        self.zcr_threshold = zcr_threshold
+        self.padding = int(sample_rate * padding_ms / 1000)
+
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._samples_in = 0
+        self._samples_removed = 0
+
+    def speech_bounds(self, waveform: np.ndarray) -> tuple[int, int]:
+        """Return the (start, end) sample indices of detected speech, padding included."""
+        n_frames = waveform.shape[0] // self.frame_length
+        if n_frames == 0:
+            return 0, waveform.shape[0]
+        frames = waveform[:n_frames * self.frame_length].reshape(n_frames, self.frame_length)
+
+        rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1) + 1e-12)
+        energy_db = 20 * np.log10(rms)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / self.frame_length
+
+        threshold = max(energy_db.max() + self.threshold_db, self.min_energy_db)
+        voiced = energy_db > threshold
+        fricative = (energy_db > threshold - self.fricative_margin_db) & (zcr > self.zcr_threshold)
+        speech = np.flatnonzero(voiced | fricative)
+        if speech.size == 0:
+            # Nothing stands out from the background: leave the audio alone
+            return 0, waveform.shape[0]
+
+        start = max(0, speech[0] * self.frame_length - self.padding)
+        end = min(waveform.shape[0], (speech[-1] + 1) * self.frame_length + self.padding)
+        return int(start), int(end)
+
+    def trim(self, waveform: np.ndarray) -> np.ndarray:
+        """Return ``waveform`` without its leading and trailing silence."""
+        start, end = self.trim_bounds(waveform)
+        return waveform[start:end]
+
+    def trim_bounds(self, waveform: np.ndarray) -> tuple[int, int]:
+        """Like ``speech_bounds``, but counted in the trimming stats."""
+        start, end = self.speech_bounds(waveform)
+        removed = waveform.shape[0] - (end - start)
+        with self._lock:
+            self._requests += 1
+            self._samples_in += waveform.shape[0]
+            self._samples_removed += removed
+        return start, end
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "seconds_in": round(self._samples_in / self.sample_rate, 2),
+                "seconds_removed": round(self._samples_removed / self.sample_rate, 2),
+                "removed_ratio": round(self._samples_removed / self._samples_in, 3) if self._samples_in else 0.0,
+            }
@@ -0,0 +1,138 @@
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+
+class MicroBatcher:
+    """
+    Group items submitted from many threads into batches for one worker thread.
+
+    The first pending item opens a window of ``max_wait_ms``; the batch is
+    dispatched when the window closes or ``max_batch_size`` items are waiting.
+    If ``size_of`` is given, pending items are sorted by size and split so that
+    the padding wasted in each batch stays below ``max_padding_ratio``.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[Any]], Sequence[Any]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+        size_of: Optional[Callable[[Any], int]] = None,
+        max_padding_ratio: float = 1.0,
+        name: str = "micro-batcher",
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.size_of = size_of
+        self.max_padding_ratio = max_padding_ratio
+
+        self.name = name
+
+        self._pending: List[Tuple[Any, Future, float]] = []
+        self._cond = threading.Condition()
+        self._batches = 0
+        self._items = 0
+        self._thread: Optional[threading.Thread] = None
+        # Threads do not survive os.fork(): a forked worker process starts its own
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self._pending = []
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def submit(self, item: Any) -> Future:
+        """Queue an item and return a future for its result."""
+        future: Future = Future()
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._pending.append((item, future, time.monotonic()))
+            self._cond.notify()
+        return future
+
+    def __call__(self, item: Any) -> Any:
+        """Queue an item and block until its result is ready."""
+        return self.submit(item).result()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "batches": self._batches,
+                "items": self._items,
+                "mean_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+                "pending": len(self._pending),
+            }
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                deadline = self._pending[0][2] + self.max_wait
+                while len(self._pending) < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                pending, self._pending = self._pending, []
+
+            # Skip callers that gave up while waiting
+            pending = [p for p in pending if p[1].set_running_or_notify_cancel()]
+            try:
+                batches = self._plan(pending)
+            except Exception as e:
+                # A bad item (size_of failed) fails this round, never the worker thread
+                self._fail(pending, e)
+                continue
+            for batch in batches:
+                self._dispatch(batch)
+
+    @staticmethod
+    def _fail(entries: list, error: BaseException):
+        for _, future, _ in entries:
+            if not future.done():
+                future.set_exception(error)
+
+    def _plan(self, pending: List[Tuple[Any, Future, float]]) -> List[list]:
+        if self.size_of is None:
+            return [pending[i:i + self.max_batch_size] for i in range(0, len(pending), self.max_batch_size)]
+
+        sized = sorted(((self.size_of(p[0]), p) for p in pending), key=lambda s: s[0], reverse=True)
+        batches, current, total, longest = [], [], 0, 0
+        for size, entry in sized:
+            if current:
+                padded = longest * (len(current) + 1)
+                waste = (padded - total - size) / padded if padded else 0.0
+                if len(current) >= self.max_batch_size or waste > self.max_padding_ratio:
+                    batches.append(current)
+                    current, total = [], 0
+            if not current:
+                longest = size
+            current.append(entry)
+            total += size
+        if current:
+            batches.append(current)
+        return batches
+
+    def _dispatch(self, batch: list):
+        items = [item for item, _, _ in batch]
+        try:
+            results = list(self.process_batch(items))
+            if len(results) != len(items):
+                raise RuntimeError(f"{self.name}: batch of {len(items)} items returned {len(results)} results")
+        except Exception as e:
+            self._fail(batch, e)
+            return
+        with self._cond:
+            self._batches += 1
+            self._items += len(items)
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
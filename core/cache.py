@@ -0,0 +1,161 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded in-memory LRU cache with hit/miss counters.
+    Entries older than ``ttl`` seconds (if set) count as misses.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                value, stored_at = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            if self.ttl is not None and time.time() - stored_at > self.ttl:
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = (value, time.time())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+class SQLiteCache:
+    """
+    Persistent key/value store backed by a single SQLite table.
+
+    One connection is shared between threads and guarded by a lock; SQLite
+    lookups on the primary key take microseconds, so contention is negligible.
+    With ``ttl`` set, older entries are ignored; with ``max_entries`` set, the
+    oldest entries are pruned every ``prune_every`` writes.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        table: str = "cache",
+        ttl: float | None = None,
+        max_entries: int | None = None,
+        prune_every: int = 100,
+    ):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.table = table
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.prune_every = prune_every
+        self._writes = 0
+        self.path = path
+        self._connect()
+        # SQLite connections must not be used across os.fork(): forked workers open their own
+        os.register_at_fork(after_in_child=self._connect)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL DEFAULT 0)"
+            )
+            columns = [row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")]
+            if "created" not in columns:
+                # Tables written before entries were timestamped
+                self._conn.execute(f"ALTER TABLE {table} ADD COLUMN created REAL NOT NULL DEFAULT 0")
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_created ON {table} (created)")
+
+    def _connect(self):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+
+    def _min_created(self) -> float:
+        return time.time() - self.ttl if self.ttl is not None else float("-inf")
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value FROM {self.table} WHERE key = ? AND created >= ?",
+                (key, self._min_created()),
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        found: Dict[str, str] = {}
+        # Stay below SQLite's limit on bound parameters
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM {self.table} WHERE key IN ({placeholders}) AND created >= ?",
+                    [*chunk, self._min_created()],
+                ).fetchall()
+            found.update(rows)
+        return found
+
+    def put(self, key: str, value: str):
+        self.put_many([(key, value)])
+
+    def put_many(self, items: Iterable[Tuple[str, str]]):
+        now = time.time()
+        rows = [(key, value, now) for key, value in items]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created) VALUES (?, ?, ?)", rows
+            )
+            self._writes += len(rows)
+            if self._writes >= self.prune_every:
+                self._writes = 0
+                self._prune()
+
+    def _prune(self):
+        if self.ttl is not None:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE created < ?", (self._min_created(),))
+        if self.max_entries is not None:
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
@@ -0,0 +1,137 @@
+import unicodedata
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from core.phonemes import CANONICAL, segment
+
+# A reference phoneme and the model tokens that spell it (empty if the vocabulary has none)
+ReferenceToken = Tuple[str, List[int]]
+
+
+def tokenize_reference(ipa: str, vocab: Dict[str, int]) -> List[ReferenceToken]:
+    """
+    Split a reference IPA string into phonemes and map each onto the CTC vocabulary.
+
+    A phoneme is looked up whole first (nasal vowels are usually single tokens),
+    then under its alternative spellings, then character by character.
+    """
+    aliases: Dict[str, List[str]] = {}
+    for alias, phoneme in CANONICAL.items():
+        aliases.setdefault(phoneme, []).append(alias)
+
+    reference: List[ReferenceToken] = []
+    for phoneme in segment(ipa):
+        ids: List[int] = []
+        for spelling in [phoneme, *aliases.get(phoneme, [])]:
+            for form in (unicodedata.normalize("NFC", spelling), unicodedata.normalize("NFD", spelling)):
+                if form in vocab:
+                    ids = [vocab[form]]
+                    break
+            if ids:
+                break
+        if not ids and all(ch in vocab for ch in phoneme):
+            ids = [vocab[ch] for ch in phoneme]
+        reference.append((phoneme, ids))
+    return reference
+
+
+def viterbi(log_probs: np.ndarray, tokens: Sequence[int], blank: int) -> Optional[np.ndarray]:
+    """
+    Best CTC path of ``tokens`` through ``log_probs`` (frames x vocab).
+
+    The usual blank-interleaved state sequence is scored for all states at
+    once per frame, so the Python loop runs over frames only. Returns, for
+    each frame, the index into ``tokens`` it emits (-1 for blank), or None if
+    the reference does not fit in the available frames.
+    """
+    frames, length = log_probs.shape[0], len(tokens)
+    if frames == 0 or length == 0:
+        return None
+    states = 2 * length + 1
+    extended = np.full(states, blank, dtype=np.int64)
+    extended[1::2] = tokens
+    # A token state may skip the blank before it unless it repeats the previous token
+    can_skip = np.zeros(states, dtype=bool)
+    can_skip[3::2] = extended[3::2] != extended[1:-2:2]
+
+    emissions = log_probs[:, extended]
+    candidates = np.full((3, states), -np.inf, dtype=np.float64)
+    backpointers = np.zeros((frames, states), dtype=np.int8)
+    alpha = np.full(states, -np.inf, dtype=np.float64)
+    alpha[:2] = emissions[0, :2]
+    columns = np.arange(states)
+    for t in range(1, frames):
+        candidates[0] = alpha
+        candidates[1, 1:] = alpha[:-1]
+        candidates[2, 2:] = np.where(can_skip[2:], alpha[:-2], -np.inf)
+        best = candidates.argmax(axis=0)
+        backpointers[t] = best
+        alpha = candidates[best, columns] + emissions[t]
+
+    state = states - 1 if alpha[-1] >= alpha[-2] else states - 2
+    if not np.isfinite(alpha[state]):
+        return None
+    path = np.empty(frames, dtype=np.int64)
+    for t in range(frames - 1, -1, -1):
+        path[t] = (state - 1) // 2 if state % 2 else -1
+        state -= backpointers[t, state]
+    return path
+
+
+def align_phonemes(
+    log_probs: np.ndarray,
+    reference: List[ReferenceToken],
+    blank: int,
+    frame_duration: float,
+    offset: float = 0.0,
+) -> List[dict]:
+    """
+    Force-align reference phonemes to CTC log-probabilities.
+
+    Each phoneme gets start/end times in seconds and a goodness-of-pronunciation
+    score: the mean, over the frames that emit it, of log P(expected token) minus
+    the log-probability of the best non-blank token. A GOP of 0 means the model
+    heard exactly the expected sound; ``score`` is exp(GOP), in (0, 1].
+    Phonemes missing from the model vocabulary are listed without timing or
+    GOP. Returns an empty list if the reference cannot be aligned.
+    """
+    tokens: List[int] = []
+    owner: List[int] = []
+    for index, (_, ids) in enumerate(reference):
+        tokens.extend(ids)
+        owner.extend([index] * len(ids))
+    path = viterbi(log_probs, tokens, blank)
+    if path is None:
+        return []
+
+    non_blank = log_probs.copy()
+    non_blank[:, blank] = -np.inf
+    best = non_blank.max(axis=1)
+    emitting = np.flatnonzero(path >= 0)
+    token_of_frame = path[emitting]
+    phoneme_of_frame = np.asarray(owner, dtype=np.int64)[token_of_frame]
+    ratios = log_probs[emitting, np.asarray(tokens, dtype=np.int64)[token_of_frame]] - best[emitting]
+
+    results = []
+    for index, (phoneme, ids) in enumerate(reference):
+        mask = phoneme_of_frame == index
+        if not ids or not mask.any():
+            results.append({"phoneme": phoneme, "start": None, "end": None, "gop": None, "score": None})
+            continue
+        frames = emitting[mask]
+        gop = float(ratios[mask].mean())
+        results.append({
+            "phoneme": phoneme,
+            "start": frames[0],
+            "end": frames[-1] + 1,
+            "gop": round(gop, 3),
+            "score": round(float(np.exp(gop)), 3),
+        })
+
+    # A phoneme lasts until the next one starts; the last one ends with its own frames
+    timed = [r for r in results if r["start"] is not None]
+    for current, following in zip(timed, timed[1:]):
+        current["end"] = following["start"]
+    for r in timed:
+        r["start"] = round(offset + int(r["start"]) * frame_duration, 3)
+        r["end"] = round(offset + int(r["end"]) * frame_duration, 3)
+    return results
@@ -0,0 +1,34 @@
+import os
+from typing import Dict
+
+_FIELDS = {
+    "Rss": "rss_mb",
+    "Pss": "pss_mb",
+    "Shared_Clean": "shared_clean_mb",
+    "Shared_Dirty": "shared_dirty_mb",
+    "Private_Clean": "private_clean_mb",
+    "Private_Dirty": "private_dirty_mb",
+}
+
+
+def process_memory() -> Dict[str, float]:
+    """
+    Resident memory of this process, split into shared and private pages.
+
+    ``pss_mb`` charges each shared page to the processes sharing it, so the
+    PSS of all workers adds up to their real footprint. Reads
+    ``/proc/self/smaps_rollup`` (Linux 4.14+); returns only the pid elsewhere.
+    """
+    stats: Dict[str, float] = {"pid": os.getpid()}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            lines = f.readlines()
+    except OSError:
+        return stats
+    for line in lines:
+        key, _, value = line.partition(":")
+        if key in _FIELDS:
+            stats[_FIELDS[key]] = round(int(value.split()[0]) / 1024, 1)
+    if "shared_clean_mb" in stats:
+        stats["shared_mb"] = round(stats["shared_clean_mb"] + stats.get("shared_dirty_mb", 0.0), 1)
+    return stats
@@ -1,7 +1,27 @@
 from abc import ABC, abstractmethod
+from typing import List, NamedTuple, Union
+import numpy as np
+
+# Either a path to an audio file or a 16 kHz mono float32 waveform
+AudioInput = Union[str, np.ndarray]
+
+class Transcription(NamedTuple):
+    """Greedy phoneme transcription plus the CTC log-probabilities it was decoded from."""
+    phonemes: str
+    log_probs: np.ndarray  # (frames, vocab) float32
+    frame_duration: float  # seconds per frame
+    offset: float = 0.0  # seconds between the start of the upload and frame 0
 
 class BasePhonemeModel(ABC):
     @abstractmethod
-    def transcribe(self, audio_path: str) -> str:
-        """Return the phonemes from the audio file"""
-        pass
\ No newline at end of file
+    def transcribe(self, audio: AudioInput) -> str:
+        """Return the phonemes from an audio file or a 16 kHz mono waveform"""
+        pass
+
+    def transcribe_batch(self, audios: List[AudioInput]) -> List[str]:
+        """Return the phonemes for several inputs. Models that can pad inputs should override this."""
+        return [self.transcribe(audio) for audio in audios]
+
+    def transcribe_with_logprobs(self, audio: AudioInput) -> Transcription:
+        """Return the phonemes together with the frame log-probabilities, for forced alignment."""
+        raise NotImplementedError(f"{type(self).__name__} does not expose frame log-probabilities")
@@ -0,0 +1,41 @@
+from typing import List
+from .base import BasePhonemeModel, AudioInput, Transcription
+from core.batching import MicroBatcher
+
+class BatchedPhonemeModel(BasePhonemeModel):
+    """
+    Batching front end for a phoneme model.
+
+    Requests that arrive within ``max_wait_ms`` of each other are padded into a
+    single forward pass of the wrapped model. Audio files are loaded in the
+    calling thread; only inference goes through the batching thread. The
+    wrapped model must provide ``load_audio`` and
+    ``transcribe_waveforms_with_logprobs``.
+    """
+
+    def __init__(
+        self,
+        model: BasePhonemeModel,
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+        max_padding_ratio: float = 0.25,
+    ):
+        self.model = model
+        self.batcher = MicroBatcher(
+            model.transcribe_waveforms_with_logprobs,
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_wait_ms,
+            size_of=len,
+            max_padding_ratio=max_padding_ratio,
+            name="phonemizer-batcher",
+        )
+
+    def transcribe(self, audio: AudioInput) -> str:
+        return self.transcribe_with_logprobs(audio).phonemes
+
+    def transcribe_with_logprobs(self, audio: AudioInput) -> Transcription:
+        return self.batcher(self.model.load_audio(audio))
+
+    def transcribe_batch(self, audios: List[AudioInput]) -> List[str]:
+        futures = [self.batcher.submit(self.model.load_audio(audio)) for audio in audios]
+        return [future.result().phonemes for future in futures]
@@ -0,0 +1,162 @@
+import os
+from pathlib import Path
+import numpy as np
+import torch
+from .wav2vec2_phonemizer import SAMPLE_RATE, Wav2Vec2Phonemizer
+
+
+def set_torch_threads(intra_op_threads: int | None, inter_op_threads: int | None):
+    """Apply thread settings for PyTorch CPU inference. Unset values keep the library defaults."""
+    if intra_op_threads:
+        torch.set_num_threads(intra_op_threads)
+    if inter_op_threads:
+        try:
+            torch.set_num_interop_threads(inter_op_threads)
+        except RuntimeError as e:
+            # Only allowed before the first parallel region has run
+            print(f"Could not set inter-op threads: {e}")
+
+
+class QuantizedWav2Vec2Phonemizer(Wav2Vec2Phonemizer):
+    """
+    CPU phonemizer with the transformer's linear layers dynamically quantized to int8.
+
+    Weights are quantized once at load time (a few seconds); activations are
+    quantized on the fly, so no calibration data is needed.
+    """
+
+    def __init__(
+        self,
+        model_name="Cnam-LMSSC/wav2vec2-french-phonemizer",
+        intra_op_threads: int | None = None,
+        inter_op_threads: int | None = None,
+        **kwargs,
+    ):
+        set_torch_threads(intra_op_threads, inter_op_threads)
+        super().__init__(model_name, device="cpu", **kwargs)
+        self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.model.eval()
+
+
+class OnnxWav2Vec2Phonemizer(Wav2Vec2Phonemizer):
+    """
+    CPU phonemizer running the exported model in ONNX Runtime with full graph optimization.
+
+    The first start exports the PyTorch model to ``cache_dir`` (and, with
+    ``quantize``, a dynamically int8-quantized copy); later starts reuse the
+    files. The PyTorch weights are only loaded for an export and released
+    right after, so only the ONNX Runtime session stays resident.
+    """
+
+    def __init__(
+        self,
+        model_name="Cnam-LMSSC/wav2vec2-french-phonemizer",
+        cache_dir: str = "cache/onnx",
+        quantize: bool = True,
+        intra_op_threads: int | None = None,
+        inter_op_threads: int | None = None,
+        **kwargs,
+    ):
+        import onnxruntime as ort
+
+        self.cache_dir = Path(cache_dir)
+        self.quantize = quantize
+        super().__init__(model_name, device="cpu", **kwargs)
+        path = self._export()
+        # The session has its own copy of the weights
+        self.model = None
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        if inter_op_threads:
+            options.inter_op_num_threads = inter_op_threads
+            options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+        self.session = ort.InferenceSession(str(path), sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        print(f"ONNX Runtime phonemizer ready: {path}")
+
+    def _paths(self) -> tuple[Path, Path, Path]:
+        """The fp32 and int8 export paths, and the one to load."""
+        stem = self.model_name.replace("/", "--")
+        fp32_path = self.cache_dir / f"{stem}.onnx"
+        int8_path = self.cache_dir / f"{stem}.int8.onnx"
+        return fp32_path, int8_path, int8_path if self.quantize else fp32_path
+
+    def _load_model(self):
+        # The PyTorch weights are only needed to export the fp32 model
+        fp32_path, _, target = self._paths()
+        if target.exists() or fp32_path.exists():
+            return None
+        return super()._load_model()
+
+    def _export(self) -> Path:
+        """Export (and optionally quantize) the model once; return the file to load."""
+        fp32_path, int8_path, target = self._paths()
+        if target.exists():
+            return target
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        if not fp32_path.exists():
+            print(f"Exporting {self.model_name} to ONNX...")
+            dummy = torch.zeros(1, SAMPLE_RATE, dtype=torch.float32)
+            inputs, input_names = (dummy,), ["input_values"]
+            dynamic_axes = {"input_values": {0: "batch", 1: "samples"}, "logits": {0: "batch", 1: "frames"}}
+            if self.use_attention_mask:
+                inputs += (torch.ones(1, SAMPLE_RATE, dtype=torch.long),)
+                input_names.append("attention_mask")
+                dynamic_axes["attention_mask"] = {0: "batch", 1: "samples"}
+            tmp_path = fp32_path.with_suffix(f".{os.getpid()}.tmp")
+            with torch.no_grad():
+                torch.onnx.export(
+                    self.model,
+                    inputs,
+                    str(tmp_path),
+                    input_names=input_names,
+                    output_names=["logits"],
+                    dynamic_axes=dynamic_axes,
+                    opset_version=17,
+                )
+            os.replace(tmp_path, fp32_path)
+
+        if self.quantize:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            print(f"Quantizing {fp32_path} to int8...")
+            tmp_path = int8_path.with_suffix(f".{os.getpid()}.tmp")
+            quantize_dynamic(str(fp32_path), str(tmp_path), weight_type=QuantType.QInt8)
+            os.replace(tmp_path, int8_path)
+        return target
+
+    def _logits(self, input_values: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        feed = {"input_values": input_values.numpy()}
+        if "attention_mask" in self.input_names:
+            feed["attention_mask"] = attention_mask.numpy().astype(np.int64)
+        return torch.from_numpy(self.session.run(["logits"], feed)[0])
+
+
+def load_phoneme_model(backend: dict | None = None, **kwargs) -> Wav2Vec2Phonemizer:
+    """
+    Build the phoneme model selected by the ``phoneme_backend`` config:
+    ``torch`` (default, fp32 on the best available device), ``torch-int8`` or ``onnx``.
+    """
+    backend = backend or {}
+    kind = backend.get("type", "torch")
+    threads = {
+        "intra_op_threads": backend.get("intra_op_threads"),
+        "inter_op_threads": backend.get("inter_op_threads"),
+    }
+    if kind == "torch":
+        set_torch_threads(**threads)
+        return Wav2Vec2Phonemizer(**kwargs)
+    if kind == "torch-int8":
+        return QuantizedWav2Vec2Phonemizer(**threads, **kwargs)
+    if kind == "onnx":
+        return OnnxWav2Vec2Phonemizer(
+            cache_dir=backend.get("cache_dir", "cache/onnx"),
+            quantize=backend.get("quantize", True),
+            **threads,
+            **kwargs,
+        )
+    raise ValueError(f"Unknown phoneme backend: {kind}")
@@ -0,0 +1,83 @@
+"""
+Compare a CPU phoneme backend against the fp32 PyTorch model.
+
+Reports the phoneme error rate of the candidate's output against the
+reference output, and the latency of both, on the same recordings:
+
+    python -m core.models.parity recordings/*.wav --backend onnx --threads 4
+"""
+import argparse
+import statistics
+import time
+from typing import Callable, List, Tuple
+import numpy as np
+from core.models.cpu_backends import load_phoneme_model
+from core.phonemes import segment
+
+
+def edit_distance(reference: List[str], hypothesis: List[str]) -> int:
+    """Unweighted Levenshtein distance between two phoneme sequences."""
+    previous = list(range(len(hypothesis) + 1))
+    for i, expected in enumerate(reference, 1):
+        current = [i]
+        for j, produced in enumerate(hypothesis, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (expected != produced)))
+        previous = current
+    return previous[-1]
+
+
+def timed(transcribe: Callable[[np.ndarray], str], waveform: np.ndarray, repeat: int) -> Tuple[str, float]:
+    """Transcribe ``repeat`` times after one warm-up run; return the output and the median seconds."""
+    output = transcribe(waveform)
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        transcribe(waveform)
+        durations.append(time.perf_counter() - start)
+    return output, statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", help="Audio files to transcribe")
+    parser.add_argument("--backend", choices=["torch-int8", "onnx"], default="onnx")
+    parser.add_argument("--no-quantize", action="store_true", help="Use the fp32 ONNX export")
+    parser.add_argument("--threads", type=int, default=None, help="Intra-op threads for both backends")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per file")
+    args = parser.parse_args()
+
+    backend = {
+        "type": args.backend,
+        "quantize": not args.no_quantize,
+        "intra_op_threads": args.threads,
+    }
+    reference = load_phoneme_model({"type": "torch", "intra_op_threads": args.threads}, device="cpu")
+    candidate = load_phoneme_model(backend)
+
+    errors = phonemes = 0
+    reference_times, candidate_times = [], []
+    print(f"{'file':40} {'PER':>6} {'fp32 ms':>9} {args.backend + ' ms':>12}")
+    for path in args.files:
+        waveform = reference.load_audio(path)
+        expected, reference_time = timed(reference.transcribe, waveform, args.repeat)
+        produced, candidate_time = timed(candidate.transcribe, waveform, args.repeat)
+        expected_phonemes = segment(expected)
+        distance = edit_distance(expected_phonemes, segment(produced))
+        errors += distance
+        phonemes += len(expected_phonemes)
+        reference_times.append(reference_time)
+        candidate_times.append(candidate_time)
+        per = distance / max(len(expected_phonemes), 1)
+        print(f"{path[-40:]:40} {per:6.3f} {reference_time * 1000:9.1f} {candidate_time * 1000:12.1f}")
+
+    mean_reference = statistics.mean(reference_times)
+    mean_candidate = statistics.mean(candidate_times)
+    print(
+        f"\nPER {errors / max(phonemes, 1):.3f} over {phonemes} phonemes; "
+        f"mean latency {mean_reference * 1000:.1f} ms (fp32) vs {mean_candidate * 1000:.1f} ms "
+        f"({args.backend}), {mean_reference / mean_candidate:.2f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,20 @@
-from .base import BasePhonemeModel
+from .base import BasePhonemeModel, AudioInput, Transcription
+from typing import List, Tuple
+import numpy as np
 import torch
 import torchaudio
-from transformers import Wav2Vec2ForCTC, Wav2Vec2Processor
+from transformers import Wav2Vec2Config, Wav2Vec2ForCTC, Wav2Vec2Processor
+
+SAMPLE_RATE = 16000
 
 class Wav2Vec2Phonemizer(BasePhonemeModel):
-    def __init__(self, model_name="Cnam-LMSSC/wav2vec2-french-phonemizer", device=None):
+    def __init__(
+        self,
+        model_name="Cnam-LMSSC/wav2vec2-french-phonemizer",
+        device=None,
+        chunk_s: float | None = None,
+        stride_s: float = 2.0,
+    ):
         if device:
             self.device = device
         elif torch.backends.mps.is_available():
@@ -13,27 +23,175 @@ class Wav2Vec2Phonemizer(BasePhonemeModel):
             self.device = "cuda"
         else:
             self.device = "cpu"
+        self.model_name = model_name
         self.processor = Wav2Vec2Processor.from_pretrained(model_name)
-        self.model = Wav2Vec2ForCTC.from_pretrained(model_name).to(self.device)
-        self.model.eval()
+        self.config = Wav2Vec2Config.from_pretrained(model_name)
+        self.model = self._load_model()
+        # Checkpoints with layer norm in the feature encoder expect an attention mask
+        # when padded; group-norm checkpoints are meant to see zero padding only.
+        self.use_attention_mask = bool(getattr(self.processor.feature_extractor, "return_attention_mask", False))
+        self.do_normalize = bool(getattr(self.processor.feature_extractor, "do_normalize", True))
+        # One logit frame per conv-stride product of input samples (20 ms for wav2vec2)
+        self.samples_per_frame = int(np.prod(self.config.conv_stride))
+        self.frame_duration = self.samples_per_frame / SAMPLE_RATE
+        # CTC blank is the tokenizer's pad token
+        self.blank_id = self.processor.tokenizer.pad_token_id
+        self.vocab = self.processor.tokenizer.get_vocab()
+        self.vocab_size = self.config.vocab_size
+        # Long recordings are transcribed in overlapping windows of chunk_s seconds,
+        # with stride_s seconds of context on each side, so memory stays flat.
+        # Window sizes are kept on frame boundaries so window frames line up exactly.
+        samples_per_frame = self.samples_per_frame
+        self.chunk_length = None
+        if chunk_s:
+            # At least one frame of context, so the receptive field never runs off a window's end
+            self.stride_length = max(1, int(stride_s * SAMPLE_RATE) // samples_per_frame) * samples_per_frame
+            self.chunk_length = int(chunk_s * SAMPLE_RATE) // samples_per_frame * samples_per_frame
+            if self.chunk_length <= 2 * self.stride_length:
+                raise ValueError("chunk_s must be more than twice stride_s")
+
+    def _load_model(self) -> Wav2Vec2ForCTC | None:
+        """The PyTorch model. Backends that run the network elsewhere may skip it."""
+        model = Wav2Vec2ForCTC.from_pretrained(self.model_name).to(self.device)
+        model.eval()
+        return model
+
+    def _frame_lengths(self, sample_lengths):
+        """Logit frames for inputs of ``sample_lengths`` samples: the feature encoder's conv arithmetic."""
+        for kernel, stride in zip(self.config.conv_kernel, self.config.conv_stride):
+            sample_lengths = (sample_lengths - kernel) // stride + 1
+        if getattr(self.config, "add_adapter", False):
+            for _ in range(self.config.num_adapter_layers):
+                sample_lengths = (sample_lengths - 1) // self.config.adapter_stride + 1
+        return sample_lengths
 
-    def transcribe(self, audio_path: str) -> str:
-        # Load audio
-        waveform, sample_rate = torchaudio.load(audio_path)
+    def load_audio(self, audio: AudioInput) -> np.ndarray:
+        """Return a 16 kHz mono float32 waveform. Decoded buffers are passed through untouched."""
+        if isinstance(audio, np.ndarray):
+            return audio
+        waveform, sample_rate = torchaudio.load(audio)
         # Resample if needed
-        if sample_rate != 16000:
-            resampler = torchaudio.transforms.Resample(orig_freq=sample_rate, new_freq=16000)
+        if sample_rate != SAMPLE_RATE:
+            resampler = torchaudio.transforms.Resample(orig_freq=sample_rate, new_freq=SAMPLE_RATE)
             waveform = resampler(waveform)
         # Convert to mono
         if waveform.shape[0] > 1:
             waveform = waveform.mean(dim=0, keepdim=True)
-        # Get input values
-        input_values = self.processor(waveform.squeeze().numpy(), sampling_rate=16000, return_tensors="pt").input_values
+        return waveform.squeeze(0).numpy()
+
+    def transcribe(self, audio: AudioInput) -> str:
+        return self.transcribe_waveforms([self.load_audio(audio)])[0]
+
+    def transcribe_with_logprobs(self, audio: AudioInput) -> Transcription:
+        return self.transcribe_waveforms_with_logprobs([self.load_audio(audio)])[0]
+
+    def transcribe_batch(self, audios: List[AudioInput]) -> List[str]:
+        return self.transcribe_waveforms([self.load_audio(audio) for audio in audios])
+
+    def _prepare_inputs(self, waveforms: List[np.ndarray]) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Normalize and pad waveforms like the feature extractor does, but read the
+        NumPy buffers through ``torch.from_numpy`` instead of copying them first.
+        """
+        if len(waveforms) == 1:
+            x = self._normalize(waveforms[0])
+            return x.unsqueeze(0), torch.ones(1, x.shape[0], dtype=torch.long)
+
+        lengths = [w.shape[0] for w in waveforms]
+        input_values = torch.zeros(len(waveforms), max(lengths), dtype=torch.float32)
+        attention_mask = torch.zeros(len(waveforms), max(lengths), dtype=torch.long)
+        for i, waveform in enumerate(waveforms):
+            input_values[i, :lengths[i]] = self._normalize(waveform)
+            attention_mask[i, :lengths[i]] = 1
+        return input_values, attention_mask
+
+    def _normalize(self, waveform: np.ndarray) -> torch.Tensor:
+        x = torch.from_numpy(np.ascontiguousarray(waveform, dtype=np.float32))
+        if self.do_normalize:
+            x = (x - x.mean()) / torch.sqrt(x.var(unbiased=False) + 1e-7)
+        return x
+
+    def transcribe_waveforms(self, waveforms: List[np.ndarray]) -> List[str]:
+        """
+        Transcribe several 16 kHz mono waveforms in a single padded forward pass.
+        """
+        return [t.phonemes for t in self.transcribe_waveforms_with_logprobs(waveforms)]
+
+    def transcribe_waveforms_with_logprobs(self, waveforms: List[np.ndarray]) -> List[Transcription]:
+        """
+        Transcribe several waveforms in one forward pass and keep each item's
+        CTC log-probabilities, trimmed to its own length, for forced alignment.
+        Waveforms longer than the chunk length are transcribed window by window instead.
+        """
+        transcriptions: List[Transcription | None] = [None] * len(waveforms)
+        short = []
+        for i, waveform in enumerate(waveforms):
+            if self.chunk_length and waveform.shape[0] > self.chunk_length:
+                transcriptions[i] = self.decode_log_probs(self._chunked_log_probs(waveform))
+            else:
+                short.append(i)
+        if short:
+            for i, log_probs in zip(short, self._log_probs([waveforms[i] for i in short])):
+                transcriptions[i] = self.decode_log_probs(log_probs)
+        return transcriptions
+
+    def _log_probs(self, waveforms: List[np.ndarray]) -> List[np.ndarray]:
+        """One padded forward pass; each item's log-probabilities up to its own length."""
+        input_values, attention_mask = self._prepare_inputs(waveforms)
+        logits = self._logits(input_values, attention_mask)
+        log_probs = torch.log_softmax(logits.float(), dim=-1).cpu().numpy()
+        # Trim each item to its own length so padding never leaks into the output
+        frame_lengths = self._frame_lengths(attention_mask.sum(-1))
+        return [log_probs[i, :int(frame_lengths[i])] for i in range(log_probs.shape[0])]
+
+    def _logits(self, input_values: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        """The acoustic model's forward pass. Other backends override this."""
         input_values = input_values.to(self.device)
-        # Forward pass
+        attention_mask = attention_mask.to(self.device)
         with torch.no_grad():
-            logits = self.model(input_values).logits
-        # Decode
-        predicted_ids = torch.argmax(logits, dim=-1)
-        transcription = self.processor.batch_decode(predicted_ids)
-        return transcription[0]
\ No newline at end of file
+            if self.use_attention_mask:
+                return self.model(input_values, attention_mask=attention_mask).logits
+            return self.model(input_values).logits
+
+    def _chunked_log_probs(self, waveform: np.ndarray) -> np.ndarray:
+        """
+        Log-probabilities of a long waveform from overlapping windows.
+
+        Each window covers ``chunk_length - 2 * stride_length`` samples of its
+        own plus ``stride_length`` of context on either side; only the frames of
+        its own span are kept, so every frame comes from a window that saw
+        context around it and the spans join without gaps or duplicates.
+        CTC decoding then runs over the joined frames, so a phoneme cut by a
+        window boundary collapses into one token.
+        """
+        total = waveform.shape[0]
+        total_frames = int(self._frame_lengths(total))
+        step = self.chunk_length - 2 * self.stride_length
+        pieces = []
+        core_start = 0
+        while core_start < total:
+            core_end = core_start + step
+            # A tail that fits in this window's right context is folded into it
+            if total - core_end <= self.stride_length:
+                core_end = total
+            window_start = max(0, core_start - self.stride_length)
+            window_end = min(total, core_end + self.stride_length)
+            log_probs = self._log_probs([waveform[window_start:window_end]])[0]
+            first = core_start // self.samples_per_frame
+            last = total_frames if core_end == total else core_end // self.samples_per_frame
+            offset = window_start // self.samples_per_frame
+            pieces.append(log_probs[first - offset:last - offset])
+            core_start = core_end
+        return np.concatenate(pieces)
+
+    def frame_log_probs(self, waveform: np.ndarray) -> np.ndarray:
+        """CTC log-probabilities (frames x vocab) of one waveform, without chunking."""
+        return self._log_probs([waveform])[0]
+
+    def decode_log_probs(self, log_probs: np.ndarray) -> Transcription:
+        """Greedy CTC decoding of log-probabilities, e.g. ones stitched together from several passes."""
+        return Transcription(
+            phonemes=self.processor.decode(log_probs.argmax(axis=-1)),
+            log_probs=log_probs,
+            frame_duration=self.frame_duration,
+        )
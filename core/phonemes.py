@@ -0,0 +1,149 @@
+import unicodedata
+from typing import Dict, List, Tuple
+import numpy as np
+
+# Symbols that carry no phonemic information for scoring
+IGNORED = set(" \t\n/[].ˈˌː‿|-")
+# Diacritics and modifiers that belong to the preceding base symbol
+MODIFIERS = set("ʰʲʷˠˤ̪̥̬͡")
+# Alternative spellings mapped onto the inventory (keys in NFD form)
+CANONICAL: Dict[str, str] = {
+    "ɡ": "g",
+    "ã": "ɑ̃",
+    "õ": "ɔ̃",
+    "ẽ": "ɛ̃",
+    "ɐ̃": "ɑ̃",
+    "ø̃": "œ̃",
+}
+
+# Vowels: (height 0=close .. 3=open, backness 0=front .. 1=back, rounded, nasal)
+VOWELS: Dict[str, Tuple[float, float, int, int]] = {
+    "i": (0, 0, 0, 0), "y": (0, 0, 1, 0), "u": (0, 1, 1, 0),
+    "ɪ": (0.5, 0.1, 0, 0), "ʊ": (0.5, 0.9, 1, 0),
+    "e": (1, 0, 0, 0), "ø": (1, 0, 1, 0), "o": (1, 1, 1, 0),
+    "ə": (1.5, 0.5, 0, 0),
+    "ɛ": (2, 0, 0, 0), "œ": (2, 0, 1, 0), "ɔ": (2, 1, 1, 0), "ʌ": (2, 1, 0, 0),
+    "æ": (2.5, 0, 0, 0),
+    "a": (3, 0, 0, 0), "ɑ": (3, 1, 0, 0),
+    "ɛ̃": (2, 0, 0, 1), "œ̃": (2, 0, 1, 1), "ɔ̃": (2, 1, 1, 1), "ɑ̃": (3, 1, 0, 1),
+}
+
+# Places of articulation, front to back
+PLACES = ["bilabial", "labiodental", "dental", "alveolar", "postalveolar", "palatal", "velar", "uvular", "glottal"]
+# Consonants: (place, manner, voiced)
+CONSONANTS: Dict[str, Tuple[str, str, int]] = {
+    "p": ("bilabial", "stop", 0), "b": ("bilabial", "stop", 1),
+    "t": ("alveolar", "stop", 0), "d": ("alveolar", "stop", 1),
+    "k": ("velar", "stop", 0), "g": ("velar", "stop", 1),
+    "f": ("labiodental", "fricative", 0), "v": ("labiodental", "fricative", 1),
+    "θ": ("dental", "fricative", 0), "ð": ("dental", "fricative", 1),
+    "s": ("alveolar", "fricative", 0), "z": ("alveolar", "fricative", 1),
+    "ʃ": ("postalveolar", "fricative", 0), "ʒ": ("postalveolar", "fricative", 1),
+    "x": ("velar", "fricative", 0), "χ": ("uvular", "fricative", 0),
+    "ʁ": ("uvular", "fricative", 1), "h": ("glottal", "fricative", 0),
+    "m": ("bilabial", "nasal", 1), "n": ("alveolar", "nasal", 1),
+    "ɲ": ("palatal", "nasal", 1), "ŋ": ("velar", "nasal", 1),
+    "l": ("alveolar", "lateral", 1),
+    "r": ("alveolar", "trill", 1), "ɾ": ("alveolar", "trill", 1), "ɹ": ("alveolar", "approximant", 1),
+    "j": ("palatal", "approximant", 1), "ɥ": ("palatal", "approximant", 1), "w": ("velar", "approximant", 1),
+}
+# Glides and the vowels they are closest to
+GLIDE_VOWELS: Dict[str, str] = {"j": "i", "ɥ": "y", "w": "u"}
+
+INDEL_COST = 1.0
+# French schwa is often dropped or added in connected speech
+SCHWA_INDEL_COST = 0.5
+
+
+def segment(ipa: str) -> List[str]:
+    """
+    Split an IPA string into phonemes.
+
+    Combining diacritics (the nasal tilde in ɔ̃, ɑ̃, ...) stay attached to their
+    base symbol; spaces, stress, length marks and delimiters are dropped.
+    """
+    phonemes: List[str] = []
+    for ch in unicodedata.normalize("NFD", ipa):
+        if ch in IGNORED:
+            continue
+        if phonemes and (unicodedata.combining(ch) or ch in MODIFIERS):
+            phonemes[-1] += ch
+        else:
+            phonemes.append(ch)
+    return [CANONICAL.get(p, unicodedata.normalize("NFC", p)) for p in phonemes]
+
+
+def substitution_cost(a: str, b: str) -> float:
+    """Articulatory-feature distance between two phonemes, in [0, 1]."""
+    if a == b:
+        return 0.0
+    if a in VOWELS and b in VOWELS:
+        ha, ba, ra, na = VOWELS[a]
+        hb, bb, rb, nb = VOWELS[b]
+        d = 0.35 * abs(ha - hb) / 3 + 0.25 * abs(ba - bb) + 0.2 * abs(ra - rb) + 0.4 * abs(na - nb)
+        return min(1.0, 0.25 + 0.75 * d)
+    if a in CONSONANTS and b in CONSONANTS:
+        pa, ma, va = CONSONANTS[a]
+        pb, mb, vb = CONSONANTS[b]
+        d = (
+            0.4 * abs(PLACES.index(pa) - PLACES.index(pb)) / (len(PLACES) - 1)
+            + 0.4 * (ma != mb)
+            + 0.3 * (va != vb)
+        )
+        return min(1.0, 0.25 + 0.75 * d)
+    # A glide for its matching vowel (or the reverse) is a near miss
+    if GLIDE_VOWELS.get(a) == b or GLIDE_VOWELS.get(b) == a:
+        return 0.4
+    return 1.0
+
+
+class PhonemeInventory:
+    """
+    Maps phonemes to integer IDs and holds the matching cost tables.
+
+    The French inventory is fixed up front and its tables never change.
+    Symbols outside it get IDs past the table for one batch only (see
+    ``tables``): they match nothing but themselves, like in substitution_cost,
+    so unexpected model output still aligns without growing shared state.
+    """
+
+    def __init__(self, symbols: List[str]):
+        self.symbols: List[str] = list(dict.fromkeys(symbols))
+        self.index: Dict[str, int] = {s: i for i, s in enumerate(self.symbols)}
+        size = len(self.symbols)
+        self.substitution = np.empty((size, size), dtype=np.float64)
+        for i, a in enumerate(self.symbols):
+            for j, b in enumerate(self.symbols):
+                self.substitution[i, j] = substitution_cost(a, b)
+        self.indel = np.array(
+            [SCHWA_INDEL_COST if s == "ə" else INDEL_COST for s in self.symbols], dtype=np.float64
+        )
+
+    def encode(self, ipa: str, extra: Dict[str, int], max_length: int | None = None) -> np.ndarray:
+        """
+        Segment an IPA string and map it to phoneme IDs, keeping at most
+        ``max_length`` phonemes. Symbols outside the inventory are numbered
+        in ``extra``, which is shared by the sequences of one batch.
+        """
+        ids = []
+        for p in segment(ipa)[:max_length]:
+            i = self.index.get(p)
+            if i is None:
+                i = extra.setdefault(p, len(self.symbols) + len(extra))
+            ids.append(i)
+        return np.array(ids, dtype=np.int64)
+
+    def tables(self, extra: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """Substitution costs, indel costs and symbols covering the inventory plus a batch's ``extra`` symbols."""
+        if not extra:
+            return self.substitution, self.indel, self.symbols
+        known, size = len(self.symbols), len(self.symbols) + len(extra)
+        substitution = np.ones((size, size), dtype=np.float64)
+        substitution[:known, :known] = self.substitution
+        new = np.arange(known, size)
+        substitution[new, new] = 0.0
+        indel = np.concatenate([self.indel, np.full(len(extra), INDEL_COST)])
+        return substitution, indel, self.symbols + list(extra)
+
+
+FRENCH = PhonemeInventory(list(VOWELS) + list(CONSONANTS))
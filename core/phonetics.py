@@ -1,13 +1,130 @@
-from phonemizer import phonemize
+import re
+import threading
+import unicodedata
+from typing import Dict, Iterable, Iterator, List
+from phonemizer.backend import EspeakBackend
+from core.cache import LRUCache, SQLiteCache
 
 class Phonetics:
+    """
+    Text → IPA conversion with one long-lived espeak backend.
+
+    Results are cached in a bounded in-memory LRU backed by an on-disk SQLite
+    lexicon, so repeated words never reach espeak again, even after a restart.
+    """
+
+    def __init__(self, lexicon_path: str | None = "cache/lexicon.sqlite", memory_size: int = 10000):
+        self.backend = EspeakBackend("fr-fr", preserve_punctuation=False)
+        # The espeak library keeps global state: one caller at a time
+        self._backend_lock = threading.Lock()
+        self.memory = LRUCache(memory_size)
+        self.lexicon = SQLiteCache(lexicon_path, table="lexicon") if lexicon_path else None
+        self._stats_lock = threading.Lock()
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Cache key for a text: NFC, collapsed whitespace, no surrounding spaces."""
+        return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
     def text_to_ipa(self, text: str) -> str:
-        ipa = phonemize(
-            text,
-            language="fr-fr",
-            backend="espeak",
-            strip=True,
-            preserve_punctuation=False,
-            njobs=1,
-        )
-        return ipa
\ No newline at end of file
+        key = self.normalize(text)
+        if not key:
+            return ""
+        ipa = self.memory.get(key)
+        if ipa is not None:
+            return ipa
+        if self.lexicon is not None:
+            ipa = self.lexicon.get(key)
+            if ipa is not None:
+                with self._stats_lock:
+                    self.disk_hits += 1
+                self.memory.put(key, ipa)
+                return ipa
+
+        ipa = self._phonemize([key])[0]
+        with self._stats_lock:
+            self.misses += 1
+        self.memory.put(key, ipa)
+        if self.lexicon is not None:
+            self.lexicon.put(key, ipa)
+        return ipa
+
+    def text_to_ipa_many(self, texts: List[str], njobs: int = 4, chunk_size: int = 500) -> Iterator[str]:
+        """
+        Yield the IPA of each text in input order.
+
+        Texts are deduplicated and resolved from the caches first; the rest are
+        phonemized chunk by chunk, each chunk split across ``njobs`` espeak
+        worker processes. Results for a chunk are yielded as soon as it is done.
+        """
+        for start in range(0, len(texts), chunk_size):
+            keys = [self.normalize(t) for t in texts[start:start + chunk_size]]
+            resolved: Dict[str, str] = {"": ""}
+            for key in dict.fromkeys(keys):
+                if key not in resolved:
+                    ipa = self.memory.get(key)
+                    if ipa is not None:
+                        resolved[key] = ipa
+
+            unknown = [k for k in dict.fromkeys(keys) if k not in resolved]
+            if unknown and self.lexicon is not None:
+                known = self.lexicon.get_many(unknown)
+                with self._stats_lock:
+                    self.disk_hits += len(known)
+                for key, ipa in known.items():
+                    self.memory.put(key, ipa)
+                resolved.update(known)
+                unknown = [k for k in unknown if k not in known]
+
+            if unknown:
+                entries = list(zip(unknown, self._phonemize(unknown, njobs=njobs)))
+                with self._stats_lock:
+                    self.misses += len(entries)
+                for key, ipa in entries:
+                    self.memory.put(key, ipa)
+                if self.lexicon is not None:
+                    self.lexicon.put_many(entries)
+                resolved.update(entries)
+
+            for key in keys:
+                yield resolved[key]
+
+    def prewarm(self, texts: Iterable[str]) -> int:
+        """
+        Phonemize every text not yet in the lexicon in a single espeak call.
+        Returns the number of new entries.
+        """
+        keys = list(dict.fromkeys(k for k in map(self.normalize, texts) if k))
+        known = self.lexicon.get_many(keys) if self.lexicon is not None else {}
+        for key, ipa in known.items():
+            self.memory.put(key, ipa)
+        missing = [k for k in keys if k not in known and k not in self.memory]
+        if not missing:
+            return 0
+        entries = list(zip(missing, self._phonemize(missing)))
+        for key, ipa in entries:
+            self.memory.put(key, ipa)
+        if self.lexicon is not None:
+            self.lexicon.put_many(entries)
+        return len(entries)
+
+    def _phonemize(self, texts: List[str], njobs: int = 1) -> List[str]:
+        njobs = max(1, min(njobs, len(texts)))
+        if njobs > 1:
+            # phonemizer ships a copy of the backend to each worker process,
+            # so the shared in-process backend is not touched
+            return self.backend.phonemize(texts, strip=True, njobs=njobs)
+        with self._backend_lock:
+            return self.backend.phonemize(texts, strip=True, njobs=1)
+
+    def stats(self) -> dict:
+        memory = self.memory.stats()
+        with self._stats_lock:
+            return {
+                "memory": memory,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "lexicon_size": len(self.lexicon) if self.lexicon is not None else 0,
+            }
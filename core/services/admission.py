@@ -0,0 +1,83 @@
+import contextvars
+import math
+import threading
+import time
+from typing import Optional
+
+# Lower runs first when calls wait for the same model
+PRIORITIES = {"interactive": 0, "normal": 1, "background": 2}
+
+
+class Overloaded(RuntimeError):
+    """A call was turned away because it could not be served within its deadline."""
+
+    def __init__(self, message: str, retry_after_s: float):
+        super().__init__(message)
+        self.retry_after_s = retry_after_s
+
+    @property
+    def retry_after(self) -> int:
+        """Whole seconds, for a Retry-After header."""
+        return max(1, math.ceil(self.retry_after_s))
+
+
+class ClientDisconnected(RuntimeError):
+    """The client went away; its queued and in-flight work was cancelled."""
+
+
+class Ticket:
+    """
+    Scheduling context of one request: its priority, its deadline, and whether
+    the client has gone away. Executor calls made while the ticket is current
+    inherit all three.
+    """
+
+    def __init__(self, endpoint: str, priority: str = "normal", deadline_s: Optional[float] = None):
+        self.endpoint = endpoint
+        self.priority = PRIORITIES[priority]
+        self.started = time.monotonic()
+        self.deadline = self.started + deadline_s if deadline_s else None
+        self._cancelled = threading.Event()
+        self._on_cancel = []
+        self._lock = threading.Lock()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left until the deadline, or None without one."""
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Mark the request abandoned and cancel its pending calls. Thread safe."""
+        with self._lock:
+            self._cancelled.set()
+            callbacks, self._on_cancel = self._on_cancel, []
+        for callback in callbacks:
+            callback()
+
+    def on_cancel(self, callback):
+        """Run ``callback`` when the ticket is cancelled (at once if it already is)."""
+        with self._lock:
+            if not self._cancelled.is_set():
+                self._on_cancel.append(callback)
+                return
+        callback()
+
+    def discard(self, callback):
+        with self._lock:
+            if callback in self._on_cancel:
+                self._on_cancel.remove(callback)
+
+
+current_ticket: contextvars.ContextVar[Optional[Ticket]] = contextvars.ContextVar("current_ticket", default=None)
+
+
+def cancelled() -> bool:
+    """
+    Whether the request being served has been abandoned. Long model calls
+    (LLM generation) poll this to stop early; it works in executor threads too.
+    """
+    ticket = current_ticket.get()
+    return ticket is not None and ticket.cancelled
@@ -0,0 +1,324 @@
+import asyncio
+import contextvars
+import functools
+import heapq
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from core.services.admission import PRIORITIES, ClientDisconnected, Overloaded, Ticket, current_ticket
+
+# Concurrent calls allowed per model. Models that are not thread safe
+# (llama.cpp, streaming TTS state) must stay at 1.
+DEFAULT_LIMITS: Dict[str, int] = {
+    "audio": 4,
+    "cache": 4,
+    "phonemizer": 8,
+    "speech": 2,
+    "tts": 1,
+    "feedback": 1,
+}
+
+# Weight of the latest call in the service-time estimate
+EWMA_ALPHA = 0.2
+
+
+class _Call:
+    __slots__ = ("priority", "seq", "fn", "context", "ticket", "future")
+
+    def __init__(self, priority: int, seq: int, fn: Callable[[], Any], ticket: Optional[Ticket]):
+        self.priority = priority
+        self.seq = seq
+        self.fn = fn
+        # Executor threads see the caller's context vars, including its ticket
+        self.context = contextvars.copy_context()
+        self.ticket = ticket
+        self.future: Future = Future()
+
+    def __lt__(self, other: "_Call") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class _Lane:
+    """
+    The threads of one model. Waiting calls are taken by priority, then in
+    arrival order; threads are started on demand up to ``limit``.
+    """
+
+    def __init__(self, name: str, limit: int, max_queue: Optional[int]):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.service_s: Optional[float] = None
+        self._queue: List[_Call] = []
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._threads: List[threading.Thread] = []
+        self._idle = 0
+        self._running = 0
+        self._counters = {"completed": 0, "rejected": 0, "expired": 0, "cancelled": 0}
+        self._closed = False
+        # Threads don't survive fork; preforked workers start their own
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self._queue = []
+        self._cond = threading.Condition()
+        self._threads = []
+        self._idle = self._running = 0
+
+    def _expected_s(self, priority: int) -> float:
+        # Calls ahead of this one share ``limit`` threads, each taking about ``service_s``
+        ahead = self._running + sum(call.priority <= priority for call in self._queue)
+        waves = max(0, ahead + 1 - self.limit) / self.limit
+        return (waves + 1) * self.service_s
+
+    def _drain_s(self) -> float:
+        """Rough time until the current backlog has cleared, for Retry-After."""
+        return (len(self._queue) + self._running) / self.limit * (self.service_s or 1.0)
+
+    def check(self, ticket: Optional[Ticket]):
+        """Raise Overloaded if a call made now could not finish within ``ticket``'s deadline."""
+        with self._cond:
+            self._check(ticket)
+
+    def _check(self, ticket: Optional[Ticket]):
+        if self.max_queue is not None and len(self._queue) >= self.max_queue:
+            self._counters["rejected"] += 1
+            raise Overloaded(f"Too many calls queued for {self.name}", self._drain_s())
+        remaining = ticket.remaining() if ticket is not None else None
+        if remaining is None or self.service_s is None:
+            return
+        expected = self._expected_s(ticket.priority)
+        if expected > remaining:
+            self._counters["rejected"] += 1
+            raise Overloaded(
+                f"{self.name} would take about {expected:.1f}s, {max(remaining, 0):.1f}s left",
+                expected - self.service_s,
+            )
+
+    def submit(self, fn: Callable[[], Any], ticket: Optional[Ticket]) -> Future:
+        priority = ticket.priority if ticket is not None else PRIORITIES["normal"]
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"Executor {self.name} is shut down")
+            self._check(ticket)
+            call = _Call(priority, next(self._seq), fn, ticket)
+            heapq.heappush(self._queue, call)
+            if self._idle == 0 and len(self._threads) < self.limit:
+                thread = threading.Thread(
+                    target=self._work, name=f"{self.name}-worker-{len(self._threads)}", daemon=True
+                )
+                self._threads.append(thread)
+                thread.start()
+            else:
+                self._cond.notify()
+        return call.future
+
+    def _next(self) -> Optional[_Call]:
+        with self._cond:
+            while True:
+                self._idle += 1
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                self._idle -= 1
+                if not self._queue:
+                    return None
+                call = heapq.heappop(self._queue)
+                ticket = call.ticket
+                # Calls whose caller has gone are dropped without running
+                if not call.future.set_running_or_notify_cancel():
+                    self._counters["cancelled"] += 1
+                elif ticket is not None and ticket.cancelled:
+                    self._counters["cancelled"] += 1
+                    call.future.set_exception(ClientDisconnected("Client disconnected"))
+                elif ticket is not None and ticket.deadline is not None and ticket.remaining() <= 0:
+                    self._counters["expired"] += 1
+                    call.future.set_exception(
+                        Overloaded(f"Deadline passed while queued for {self.name}", self._drain_s())
+                    )
+                else:
+                    self._running += 1
+                    return call
+
+    def _work(self):
+        while (call := self._next()) is not None:
+            start = time.perf_counter()
+            try:
+                result = call.context.run(call.fn)
+            except BaseException as e:
+                call.future.set_exception(e)
+                measured = False
+            else:
+                call.future.set_result(result)
+                measured = call.ticket is None or not call.ticket.cancelled
+            elapsed = time.perf_counter() - start
+            with self._cond:
+                self._running -= 1
+                self._counters["completed"] += 1
+                # Failed and abandoned calls end early and would skew the estimate
+                if measured:
+                    self.service_s = elapsed if self.service_s is None else \
+                        self.service_s + EWMA_ALPHA * (elapsed - self.service_s)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                **self._counters,
+                "queued": len(self._queue),
+                "running": self._running,
+                "service_ms": round(self.service_s * 1000, 1) if self.service_s is not None else None,
+            }
+
+    def shutdown(self, wait: bool):
+        with self._cond:
+            self._closed = True
+            dropped, self._queue = self._queue, []
+            self._cond.notify_all()
+        for call in dropped:
+            call.future.cancel()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+
+class ModelExecutor:
+    """
+    Model-execution layer for the API.
+
+    Every model gets its own bounded set of threads so a slow call (LLM
+    feedback, TTS) only queues behind calls to the same model and never blocks
+    the event loop or the cheap endpoints.
+
+    Calls inherit the request's ticket (see core.services.admission): waiting
+    calls run in priority order, a call that cannot finish before its deadline
+    (judged from a moving average of the model's recent call times) or that
+    would overflow ``queue_limits`` raises Overloaded at once, and the calls
+    of a client that disconnected are dropped from the queue.
+    """
+
+    def __init__(self, limits: Dict[str, int] | None = None, queue_limits: Dict[str, int] | None = None):
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        queue_limits = queue_limits or {}
+        self._lanes = {
+            name: _Lane(name, limit, queue_limits.get(name))
+            for name, limit in self.limits.items()
+        }
+
+    def _lane(self, name: str) -> _Lane:
+        try:
+            return self._lanes[name]
+        except KeyError:
+            raise ValueError(f"Unknown executor: {name}") from None
+
+    def check(self, name: str):
+        """
+        Raise Overloaded if a call to ``name`` made now would be turned away.
+        Streaming endpoints check before they start answering.
+        """
+        self._lane(name).check(current_ticket.get())
+
+    async def run(self, name: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run ``fn`` on the threads reserved for ``name`` and await its result."""
+        ticket = current_ticket.get()
+        future = self._lane(name).submit(functools.partial(fn, *args, **kwargs), ticket)
+        return await _wait(future, ticket)
+
+    async def iterate(self, name: str, fn: Callable[..., Iterator[Any]], *args, **kwargs) -> AsyncIterator[Any]:
+        """
+        Run the generator ``fn(*args, **kwargs)`` on the threads reserved for
+        ``name`` and yield its items in the event loop as they are produced.
+
+        The whole stream holds one thread. If the consumer stops early or the
+        ticket is cancelled (e.g. the client disconnected) the generator is
+        closed in its thread.
+        """
+        loop = asyncio.get_running_loop()
+        ticket = current_ticket.get()
+        items: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        end = object()
+
+        def finish(error: Optional[BaseException] = None):
+            loop.call_soon_threadsafe(items.put_nowait, (end, error))
+
+        def produce():
+            if stop.is_set():
+                # The consumer left while this call was still queued
+                finish()
+                return
+            iterator = None
+            try:
+                iterator = iter(fn(*args, **kwargs))
+                for item in iterator:
+                    if stop.is_set() or (ticket is not None and ticket.cancelled):
+                        break
+                    loop.call_soon_threadsafe(items.put_nowait, (item, None))
+            except Exception as e:
+                finish(e)
+                return
+            finally:
+                close = getattr(iterator, "close", None)
+                if close is not None:
+                    close()
+            finish()
+
+        def dropped(call: Future):
+            # A call that never ran (expired or dropped in the queue) ends the stream with its error
+            if not call.cancelled() and call.exception() is not None:
+                finish(call.exception())
+
+        future = self._lane(name).submit(produce, ticket)
+        future.add_done_callback(dropped)
+        disconnected = functools.partial(finish, ClientDisconnected("Client disconnected"))
+        if ticket is not None:
+            ticket.on_cancel(disconnected)
+        try:
+            while True:
+                item, error = await items.get()
+                if item is end:
+                    if error is not None:
+                        raise error
+                    return
+                yield item
+        finally:
+            stop.set()
+            future.cancel()
+            if ticket is not None:
+                ticket.discard(disconnected)
+
+    def stats(self) -> dict:
+        return {name: lane.stats() for name, lane in self._lanes.items()}
+
+    def shutdown(self, wait: bool = True):
+        for lane in self._lanes.values():
+            lane.shutdown(wait)
+
+
+async def _wait(future: Future, ticket: Optional[Ticket]):
+    """
+    Await an executor future. Cancelling the ticket cancels the wait, and the
+    call too if it hasn't started yet.
+    """
+    waiter = asyncio.wrap_future(future)
+    if ticket is None:
+        return await waiter
+    loop = asyncio.get_running_loop()
+
+    def cancel():
+        loop.call_soon_threadsafe(waiter.cancel)
+
+    ticket.on_cancel(cancel)
+    try:
+        return await waiter
+    except asyncio.CancelledError:
+        task = asyncio.current_task()
+        # Only the ticket's cancellation becomes ClientDisconnected; the task's own is passed on
+        if ticket.cancelled and not getattr(task, "cancelling", lambda: 0)():
+            raise ClientDisconnected("Client disconnected") from None
+        raise
+    finally:
+        ticket.discard(cancel)
@@ -0,0 +1,74 @@
+import json
+import re
+import threading
+import unicodedata
+from typing import Dict, Optional
+from core.cache import LRUCache, SQLiteCache
+
+
+def normalize_ipa(ipa: str) -> str:
+    """NFC, no enclosing /slashes/ or [brackets], collapsed whitespace."""
+    ipa = unicodedata.normalize("NFC", ipa).strip().strip("/[]").strip()
+    return re.sub(r"\s+", " ", ipa)
+
+
+class FeedbackCache:
+    """
+    Two-tier memo cache for generated feedback: an in-process LRU in front of SQLite.
+
+    Entries are keyed by (strategy, model, word, expected IPA, attempt IPA) after
+    normalization, expire after ``ttl_s`` seconds, and hit rates are tracked per
+    strategy.
+    """
+
+    def __init__(
+        self,
+        path: str | None = "cache/feedback.sqlite",
+        memory_size: int = 2048,
+        max_entries: int = 100000,
+        ttl_s: float | None = 30 * 24 * 3600,
+    ):
+        self.memory = LRUCache(memory_size, ttl=ttl_s)
+        self.disk = SQLiteCache(path, table="feedback", ttl=ttl_s, max_entries=max_entries) if path else None
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def key(strategy: str, model_name: str | None, word: str, expected: str, attempt: str) -> str:
+        word = re.sub(r"\s+", " ", unicodedata.normalize("NFC", word)).strip().lower()
+        return json.dumps(
+            [strategy, model_name, word, normalize_ipa(expected), normalize_ipa(attempt)],
+            ensure_ascii=False,
+        )
+
+    def _count(self, strategy: str, outcome: str):
+        with self._lock:
+            counters = self._counters.setdefault(strategy, {"hits": 0, "misses": 0})
+            counters[outcome] += 1
+
+    def get(self, strategy: str, key: str, record: bool = True) -> Optional[str]:
+        """Return memoized feedback, or None. ``record=False`` leaves the hit-rate stats alone."""
+        feedback = self.memory.get(key)
+        if feedback is None and self.disk is not None:
+            feedback = self.disk.get(key)
+            if feedback is not None:
+                self.memory.put(key, feedback)
+        if record:
+            self._count(strategy, "hits" if feedback is not None else "misses")
+        return feedback
+
+    def put(self, key: str, feedback: str):
+        self.memory.put(key, feedback)
+        if self.disk is not None:
+            self.disk.put(key, feedback)
+
+    def stats(self) -> dict:
+        with self._lock:
+            strategies = {
+                name: {
+                    **counters,
+                    "hit_rate": round(counters["hits"] / (counters["hits"] + counters["misses"]), 3),
+                }
+                for name, counters in self._counters.items()
+            }
+        return {"memory_size": len(self.memory), "strategies": strategies}
@@ -0,0 +1,160 @@
+import asyncio
+import functools
+import itertools
+import time
+import uuid
+from typing import AsyncIterator, Callable, Dict, Optional
+
+FINISHED = ("done", "failed", "dropped")
+
+
+class FeedbackJob:
+    """
+    One background LLM feedback generation.
+
+    ``state`` goes pending → running (first token) → done, or to failed or
+    dropped; ``feedback`` holds the text generated so far.
+    """
+
+    def __init__(self, session: Optional[str], word: str):
+        self.id = uuid.uuid4().hex
+        self.session = session
+        self.word = word
+        self.state = "pending"
+        self.feedback = ""
+        self.error: Optional[str] = None
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.state in FINISHED
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "state": self.state,
+            "feedback": self.feedback,
+            "error": self.error,
+        }
+
+    def _notify(self):
+        # Wake current subscribers; later ones wait on a fresh event
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+
+class FeedbackJobs:
+    """
+    Background LLM feedback jobs that clients poll or subscribe to by ID.
+
+    Each learner session has at most one live job: when the session submits a
+    new attempt, or scores a different word, the previous job is dropped and
+    its generation stopped, since nobody will read it. Finished jobs are kept
+    for ``ttl_s`` seconds so a late poll still finds them. At most
+    ``max_jobs`` are kept: the oldest finished ones are forgotten first, and
+    when all of them are live a new job drops the oldest one. Must be used
+    from the event loop. Jobs live in this process only, so the app runs
+    tiered feedback with a single worker.
+    """
+
+    def __init__(self, ttl_s: float = 600, max_jobs: int = 1000):
+        self.ttl_s = ttl_s
+        self.max_jobs = max_jobs
+        self._jobs: Dict[str, FeedbackJob] = {}
+        self._sessions: Dict[str, FeedbackJob] = {}
+        self._counters = {"submitted": 0, "done": 0, "failed": 0, "dropped": 0}
+
+    def submit(
+        self,
+        session: Optional[str],
+        word: str,
+        tokens: Callable[[], AsyncIterator[str]],
+    ) -> FeedbackJob:
+        """Start a job that collects ``tokens()``, dropping the session's previous job."""
+        self._prune()
+        if session is not None and session in self._sessions:
+            self.drop(self._sessions[session])
+        job = FeedbackJob(session, word)
+        self._jobs[job.id] = job
+        if session is not None:
+            self._sessions[session] = job
+        job.task = asyncio.create_task(self._run(job, tokens))
+        job.task.add_done_callback(functools.partial(self._finish, job))
+        self._counters["submitted"] += 1
+        return job
+
+    def get(self, job_id: str) -> Optional[FeedbackJob]:
+        return self._jobs.get(job_id)
+
+    def drop(self, job: FeedbackJob):
+        """Stop a job that is no longer wanted. Finished jobs are left as they are."""
+        if not job.finished and job.task is not None:
+            job.task.cancel()
+
+    def moved_on(self, session: Optional[str], word: str):
+        """The session is now practising ``word``: drop its job for any other word."""
+        job = self._sessions.get(session) if session is not None else None
+        if job is not None and job.word != word:
+            self.drop(job)
+
+    async def updates(self, job: FeedbackJob) -> AsyncIterator[FeedbackJob]:
+        """Yield the job now and after every change, until it has finished."""
+        while True:
+            changed = job._changed
+            yield job
+            if job.finished:
+                return
+            await changed.wait()
+
+    async def _run(self, job: FeedbackJob, tokens: Callable[[], AsyncIterator[str]]):
+        # Cancelling closes the token stream, which stops the generation in its thread
+        async for token in tokens():
+            job.state = "running"
+            job.feedback += token
+            job._notify()
+        job.feedback = job.feedback.strip()
+
+    def _finish(self, job: FeedbackJob, task: asyncio.Task):
+        # A done callback also sees jobs cancelled before they ever ran
+        if task.cancelled():
+            job.state = "dropped"
+        elif task.exception() is not None:
+            job.state = "failed"
+            job.error = str(task.exception())
+        else:
+            job.state = "done"
+        job.finished_at = time.monotonic()
+        self._counters[job.state] += 1
+        if job.session is not None and self._sessions.get(job.session) is job:
+            del self._sessions[job.session]
+        job._notify()
+
+    def _prune(self):
+        now = time.monotonic()
+        for job in list(self._jobs.values()):
+            if job.finished and now - job.finished_at > self.ttl_s:
+                del self._jobs[job.id]
+        # Over the cap, forget the oldest finished jobs first
+        excess = len(self._jobs) - self.max_jobs + 1
+        if excess > 0:
+            finished = [job for job in self._jobs.values() if job.finished]
+            for job in itertools.islice(finished, excess):
+                del self._jobs[job.id]
+        # Still over it, drop the oldest live jobs; they are forgotten once they have stopped
+        live = [job for job in self._jobs.values() if not _stopping(job)]
+        for job in itertools.islice(live, max(0, len(live) - self.max_jobs + 1)):
+            self.drop(job)
+
+    def stats(self) -> dict:
+        return {
+            **self._counters,
+            "live": sum(not job.finished for job in self._jobs.values()),
+            "kept": len(self._jobs),
+        }
+
+
+def _stopping(job: FeedbackJob) -> bool:
+    """Whether the job has finished or has already been dropped."""
+    return job.finished or bool(getattr(job.task, "cancelling", lambda: 0)())
@@ -1,8 +1,94 @@
+import time
+from typing import Iterator, Optional
+from core.services.admission import cancelled
 from core.services.strategies.feedback.base_strategy import FeedbackStrategy
+from core.services.feedback_cache import FeedbackCache
 
 class FeedbackService:
-    def __init__(self, strategy: FeedbackStrategy):
+    def __init__(self, strategy: FeedbackStrategy, cache: FeedbackCache | None = None):
         self.strategy = strategy
+        self.cache = cache
+
+    def _cache_key(self, word: str, expected_phonemes: str, user_phonemes: str) -> str:
+        return FeedbackCache.key(
+            type(self.strategy).__name__,
+            self.strategy.model_name,
+            word,
+            expected_phonemes,
+            user_phonemes,
+        )
+
+    def lookup(self, word: str, expected_phonemes: str, user_phonemes: str) -> Optional[str]:
+        """Return memoized feedback for this attempt, without touching the model."""
+        if self.cache is None:
+            return None
+        key = self._cache_key(word, expected_phonemes, user_phonemes)
+        return self.cache.get(type(self.strategy).__name__, key)
 
     def get_feedback(self, word: str, expected_phonemes: str, user_phonemes: str):
-        return self.strategy.generate_feedback(word, expected_phonemes, user_phonemes)
\ No newline at end of file
+        feedback = self.lookup(word, expected_phonemes, user_phonemes)
+        if feedback is not None:
+            return feedback
+        return self.generate(word, expected_phonemes, user_phonemes)
+
+    def generate(self, word: str, expected_phonemes: str, user_phonemes: str) -> str:
+        """
+        Generate feedback with the strategy and memoize it. Callers normally tried
+        lookup() first; the quiet re-check catches an identical request that
+        finished while this one was queued.
+        """
+        if self.cache is None:
+            return self.strategy.generate_feedback(word, expected_phonemes, user_phonemes)
+        key = self._cache_key(word, expected_phonemes, user_phonemes)
+        feedback = self.cache.get(type(self.strategy).__name__, key, record=False)
+        if feedback is None:
+            feedback = self.strategy.generate_feedback(word, expected_phonemes, user_phonemes)
+            # A generation stopped for a client that went away may be cut short
+            if not cancelled():
+                self.cache.put(key, feedback)
+        return feedback
+
+    def stream_feedback(self, word: str, expected_phonemes: str, user_phonemes: str) -> Iterator[str]:
+        """
+        Yield feedback pieces as they are generated, logging time-to-first-token and tokens/sec.
+        A memoized answer is yielded in one piece; a completed stream is memoized,
+        unless it was cancelled.
+        Like generate(), this expects callers to have tried lookup() first.
+        """
+        key = self._cache_key(word, expected_phonemes, user_phonemes) if self.cache is not None else None
+        if key is not None:
+            cached = self.cache.get(type(self.strategy).__name__, key, record=False)
+            if cached is not None:
+                yield cached
+                return
+
+        start = time.time()
+        first_token_at = None
+        tokens = []
+        stream = self.strategy.stream_feedback(word, expected_phonemes, user_phonemes)
+        try:
+            for token in stream:
+                if first_token_at is None:
+                    first_token_at = time.time()
+                tokens.append(token)
+                yield token
+        finally:
+            stream.close()
+            end = time.time()
+            if first_token_at is None:
+                print(f"LLM feedback stream produced no tokens in {end - start:.2f} seconds")
+            else:
+                decode_time = end - first_token_at
+                rate = (len(tokens) - 1) / decode_time if len(tokens) > 1 and decode_time > 0 else 0.0
+                print(
+                    f"LLM feedback stream: first token after {first_token_at - start:.2f} seconds, "
+                    f"{len(tokens)} tokens in {end - start:.2f} seconds ({rate:.1f} tokens/s)"
+                )
+        if key is not None and tokens and not cancelled():
+            self.cache.put(key, "".join(tokens).strip())
+
+    def stats(self) -> dict:
+        stats = self.strategy.stats()
+        if self.cache is not None:
+            stats = {**stats, "cache": self.cache.stats()}
+        return stats
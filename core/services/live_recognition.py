@@ -0,0 +1,83 @@
+import threading
+import numpy as np
+from core.audio.ingest import StreamingDecoder
+from core.models.base import Transcription
+from core.models.wav2vec2_phonemizer import SAMPLE_RATE, Wav2Vec2Phonemizer
+
+
+class LiveRecognitionSession:
+    """
+    Incremental phoneme recognition over audio that is still being recorded.
+
+    Each ``update`` runs the model over a sliding window: ``lookback_s`` seconds
+    of already-recognized audio for left context, plus everything new. Frames
+    followed by at least ``right_context_s`` seconds of audio are committed and
+    never recomputed; the frames after them are a tentative tail that the next
+    update replaces. Every pass therefore costs about the same, however long
+    the learner speaks, and ``finish`` only has to redo the tail.
+    """
+
+    def __init__(
+        self,
+        model: Wav2Vec2Phonemizer,
+        decoder: StreamingDecoder,
+        lookback_s: float = 2.0,
+        right_context_s: float = 0.5,
+        hop_s: float = 0.3,
+    ):
+        self.model = model
+        self.decoder = decoder
+        frame = model.samples_per_frame
+        # Window edges stay on frame boundaries so frames from different passes line up
+        self.lookback = int(lookback_s * SAMPLE_RATE) // frame * frame
+        self.right_context = int(right_context_s * SAMPLE_RATE) // frame * frame
+        self.hop = int(hop_s * SAMPLE_RATE)
+        self._committed = np.zeros((0, model.vocab_size), dtype=np.float32)
+        self._committed_samples = 0
+        self._tentative = self._committed
+        self._processed_samples = 0
+        self._lock = threading.Lock()
+
+    def feed(self, data: bytes):
+        self.decoder.feed(data)
+
+    def due(self) -> bool:
+        """Whether enough new audio has been decoded to be worth another pass."""
+        return self.decoder.decoded().shape[0] - self._processed_samples >= self.hop
+
+    def update(self) -> str:
+        """Recognize newly decoded audio and return the partial phoneme hypothesis. Blocks."""
+        with self._lock:
+            self._advance(self.decoder.decoded(), final=False)
+            return self._transcription().phonemes
+
+    def finish(self) -> Transcription:
+        """Wait for the last audio and return the full transcription. Blocks."""
+        waveform = self.decoder.finish()
+        with self._lock:
+            self._advance(waveform, final=True)
+            return self._transcription()
+
+    def abort(self):
+        self.decoder.abort()
+
+    def _advance(self, waveform: np.ndarray, final: bool):
+        total = waveform.shape[0]
+        frame = self.model.samples_per_frame
+        commit_until = total if final else (total - self.right_context) // frame * frame
+        commit_until = max(commit_until, self._committed_samples)
+        window_start = max(0, self._committed_samples - self.lookback)
+        # The model needs a few frames of audio to produce any output
+        if total - window_start < 2 * frame:
+            self._processed_samples = total
+            return
+        log_probs = self.model.frame_log_probs(waveform[window_start:total])
+        first = (self._committed_samples - window_start) // frame
+        split = log_probs.shape[0] if final else (commit_until - window_start) // frame
+        self._committed = np.concatenate([self._committed, log_probs[first:split]])
+        self._tentative = log_probs[split:]
+        self._committed_samples = commit_until
+        self._processed_samples = total
+
+    def _transcription(self) -> Transcription:
+        return self.model.decode_log_probs(np.concatenate([self._committed, self._tentative]))
@@ -1,54 +1,118 @@
-from pathlib import Path
-import shutil
-import os
-import uuid
-from pydub import AudioSegment
-from core.models.wav2vec2_phonemizer import Wav2Vec2Phonemizer
+from typing import List
+import numpy as np
+from core.audio.ingest import PCMDecoder, StreamingDecoder
+from core.audio.vad import VoiceActivityTrimmer
+from core.ctc_alignment import align_phonemes, tokenize_reference
+from core.models.base import AudioInput, Transcription
+from core.models.cpu_backends import load_phoneme_model
+from core.models.wav2vec2_phonemizer import SAMPLE_RATE
+from core.services.live_recognition import LiveRecognitionSession
+from core.models.batched_phonemizer import BatchedPhonemeModel
 
 class PhonemizerService:
-    def __init__(self):
-        self.model = Wav2Vec2Phonemizer()
-
-    def webm_to_wav(self, webm_path: Path, wav_path: Path) -> Path:
-        """Convert a WebM audio file to WAV format."""
-        # this is a work around to handle chrome webm files
-        try:
-            audio = AudioSegment.from_file(webm_path, format="webm")
-            audio.export(wav_path, format="wav")
-            os.remove(webm_path)  # Remove the original webm after conversion
-            return wav_path
-        except Exception as e:
-            print(f"Error converting {webm_path} to WAV: {e}")
-            return webm_path
-
-    def audio_to_phonemes(self, file_path: Path) -> str:
-        """
-        Transcribe an audio file to phonemes.
-        """
-        phonemes = self.model.transcribe(str(file_path))
-        os.remove(file_path)  # Clean up the audio file after processing
-        return phonemes
-
-    def save_audio(self, file, save_dir: Path) -> Path:
-        """
-        Save uploaded audio file and convert if needed.
-        Returns the final file path (WAV if converted).
-        """
-        save_dir.mkdir(exist_ok=True, parents=True)
-        # Use random filename to avoid conflicts
-        ext = file.filename.split('.')[-1] if '.' in file.filename else 'webm'
-        random_name = f"{uuid.uuid4()}.{ext}"
-        save_path = save_dir / random_name
-
-        # Save uploaded file
-        with open(save_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-
-        # Auto-convert WebM to WAV
-        if save_path.suffix.lower() == ".webm":
-            wav_path = save_path.with_suffix(".wav")
-            print(f"the current save_path is {save_path}")
-            save_path = self.webm_to_wav(save_path, wav_path)
-            print(f"the new save_path is {save_path}")
-
-        return save_path
\ No newline at end of file
+    def __init__(
+        self,
+        batching: dict | None = None,
+        ingest: dict | None = None,
+        vad: dict | None = None,
+        chunking: dict | None = None,
+        live: dict | None = None,
+        backend: dict | None = None,
+    ):
+        # Optionally transcribe long recordings in overlapping windows to bound memory
+        chunking = chunking or {}
+        self.base_model = load_phoneme_model(
+            backend,
+            chunk_s=chunking.get("chunk_s", 20) if chunking.get("enabled", False) else None,
+            stride_s=chunking.get("stride_s", 2),
+        )
+        self.model = self.base_model
+        # Optionally group concurrent requests into one padded forward pass
+        if batching and batching.get("enabled", False):
+            self.model = BatchedPhonemeModel(
+                self.model,
+                max_batch_size=batching.get("max_batch_size", 8),
+                max_wait_ms=batching.get("max_wait_ms", 10),
+                max_padding_ratio=batching.get("max_padding_ratio", 0.25),
+            )
+        ingest = ingest or {}
+        self.max_upload_bytes = ingest.get("max_upload_bytes", 10 * 1024 * 1024)
+        self.max_duration_s = ingest.get("max_duration_s", 30)
+        # Optionally cut leading/trailing silence before the model sees the audio
+        self.vad = None
+        if vad and vad.get("enabled", False):
+            self.vad = VoiceActivityTrimmer(
+                frame_ms=vad.get("frame_ms", 20),
+                threshold_db=vad.get("threshold_db", -35),
+                zcr_threshold=vad.get("zcr_threshold", 0.25),
+                padding_ms=vad.get("padding_ms", 150),
+            )
+        self.live = live or {}
+
+    def decoder(self) -> StreamingDecoder:
+        """
+        Create an in-memory decoder for one upload, with the configured size and duration limits.
+        """
+        return StreamingDecoder(max_bytes=self.max_upload_bytes, max_seconds=self.max_duration_s)
+
+    def live_session(self, audio_format: str = "webm") -> LiveRecognitionSession:
+        """
+        Start incremental recognition of a recording that is still being streamed,
+        either as a compressed stream (``webm``, Ogg/Opus, ...) or as raw
+        16 kHz 16-bit mono ``pcm``.
+        """
+        decoder_class = PCMDecoder if audio_format == "pcm" else StreamingDecoder
+        return LiveRecognitionSession(
+            self.base_model,
+            decoder_class(max_bytes=self.max_upload_bytes, max_seconds=self.max_duration_s),
+            lookback_s=self.live.get("lookback_s", 2.0),
+            right_context_s=self.live.get("right_context_s", 0.5),
+            hop_s=self.live.get("hop_s", 0.3),
+        )
+
+    def audio_to_phonemes(self, audio: AudioInput) -> str:
+        """
+        Transcribe a decoded 16 kHz mono waveform (or an audio file) to phonemes.
+        """
+        if self.vad is not None:
+            if not isinstance(audio, np.ndarray):
+                audio = self.base_model.load_audio(audio)
+            audio = self.vad.trim(audio)
+        return self.model.transcribe(audio)
+
+    def transcribe(self, audio: AudioInput) -> Transcription:
+        """
+        Like ``audio_to_phonemes``, but keep the CTC log-probabilities for ``align``.
+        """
+        offset = 0
+        if self.vad is not None:
+            if not isinstance(audio, np.ndarray):
+                audio = self.base_model.load_audio(audio)
+            offset, end = self.vad.trim_bounds(audio)
+            audio = audio[offset:end]
+        return self.model.transcribe_with_logprobs(audio)._replace(offset=offset / SAMPLE_RATE)
+
+    def align(self, transcription: Transcription, reference_ipa: str) -> List[dict]:
+        """
+        Force-align the expected phonemes to a transcription's log-probabilities.
+        Gives per-phoneme timing and goodness-of-pronunciation from the same forward pass.
+        """
+        return align_phonemes(
+            transcription.log_probs,
+            tokenize_reference(reference_ipa, self.base_model.vocab),
+            blank=self.base_model.blank_id,
+            frame_duration=transcription.frame_duration,
+            offset=transcription.offset,
+        )
+
+    def warmup(self):
+        """Run one second of silence through the model so the first request is not slow."""
+        self.model.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32))
+
+    def stats(self) -> dict:
+        stats = {}
+        if self.vad is not None:
+            stats["vad"] = self.vad.stats()
+        if isinstance(self.model, BatchedPhonemeModel):
+            stats["batching"] = self.model.batcher.stats()
+        return stats
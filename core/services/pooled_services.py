@@ -0,0 +1,106 @@
+from typing import Iterator, List
+import numpy as np
+from core.models.base import AudioInput, Transcription
+from core.services.phonemizer_service import PhonemizerService
+from core.services.process_pool import ProcessPool
+from core.services.speech_service import SpeechService
+
+# How long /stats waits for the workers to report
+STATS_TIMEOUT_S = 2.0
+
+
+def build_worker_services(lexicon: dict | None, phonemizer: dict, threads: int | None):
+    """
+    Runs in each pool worker: build the speech service (ready within a second),
+    then the phonemizer, with torch using the worker's own cores. The
+    phonemizer is warmed up before it is reported ready, so a restarted
+    worker never serves a cold first request.
+    """
+    yield "speech", SpeechService(lexicon), None
+
+    backend = dict(phonemizer.get("backend") or {})
+    if threads and not backend.get("intra_op_threads"):
+        backend["intra_op_threads"] = threads
+    service = PhonemizerService(**{**phonemizer, "backend": backend})
+    service.warmup()
+    model = service.base_model
+    yield "phonemizer", service, {
+        "samples_per_frame": model.samples_per_frame,
+        "frame_duration": model.frame_duration,
+        "vocab_size": model.vocab_size,
+        "vocab": model.vocab,
+        "blank_id": model.blank_id,
+    }
+
+
+class _PooledModel:
+    """The parts of the phoneme model that live recognition and alignment use, run in the pool."""
+
+    def __init__(self, pool: ProcessPool, info: dict):
+        self.pool = pool
+        self.samples_per_frame = info["samples_per_frame"]
+        self.frame_duration = info["frame_duration"]
+        self.vocab_size = info["vocab_size"]
+        self.vocab = info["vocab"]
+        self.blank_id = info["blank_id"]
+
+    def frame_log_probs(self, waveform: np.ndarray) -> np.ndarray:
+        return self.pool.call("phonemizer.base_model.frame_log_probs", waveform)
+
+    def decode_log_probs(self, log_probs: np.ndarray) -> Transcription:
+        return self.pool.call("phonemizer.base_model.decode_log_probs", log_probs)
+
+
+class PooledPhonemizerService(PhonemizerService):
+    """
+    PhonemizerService whose model runs in the pool's worker processes.
+
+    Uploads are still decoded here, and forced alignment runs here on the
+    returned log-probabilities; only recognition crosses the process boundary.
+    """
+
+    def __init__(self, pool: ProcessPool, ingest: dict | None = None, live: dict | None = None):
+        self.pool = pool
+        self.base_model = self.model = _PooledModel(pool, pool.info("phonemizer"))
+        ingest = ingest or {}
+        self.max_upload_bytes = ingest.get("max_upload_bytes", 10 * 1024 * 1024)
+        self.max_duration_s = ingest.get("max_duration_s", 30)
+        self.vad = None
+        self.live = live or {}
+
+    def audio_to_phonemes(self, audio: AudioInput) -> str:
+        return self.pool.call("phonemizer.audio_to_phonemes", audio)
+
+    def transcribe(self, audio: AudioInput) -> Transcription:
+        return self.pool.call("phonemizer.transcribe", audio)
+
+    def warmup(self):
+        """Workers warm up their own model before taking requests."""
+
+    def stats(self) -> dict:
+        return {"pool": self.pool.stats(), "workers": self.pool.broadcast("phonemizer.stats", timeout=STATS_TIMEOUT_S)}
+
+
+class PooledSpeechService(SpeechService):
+    """SpeechService whose espeak G2P and lexicon lookups run in the pool's worker processes."""
+
+    def __init__(self, pool: ProcessPool):
+        self.pool = pool
+
+    def get_ipa(self, word: str) -> str:
+        return self.pool.call("speech.get_ipa", word)
+
+    def get_ipa_many(self, texts: List[str], njobs: int = 4, chunk_size: int = 500) -> Iterator[str]:
+        # Chunks are spread over the workers at once and yielded back in order
+        futures = [
+            self.pool.submit("speech.get_ipa_many", texts[start:start + chunk_size], njobs=njobs, chunk_size=chunk_size)
+            for start in range(0, len(texts), chunk_size)
+        ]
+        for future in futures:
+            yield from future.result()
+
+    def prewarm(self, word_list) -> int:
+        return self.pool.call("speech.prewarm", word_list)
+
+    def stats(self) -> dict:
+        return {"workers": self.pool.broadcast("speech.stats", timeout=STATS_TIMEOUT_S)}
@@ -0,0 +1,425 @@
+"""
+Run services in dedicated worker processes, off the API process's GIL and event loop.
+
+Calls are sent to the least-loaded worker over a pipe. Large NumPy arrays in the
+arguments and results (waveforms, log-probabilities) are not pickled into the
+pipe: the sender copies them into a ``multiprocessing.shared_memory`` block and
+sends its name, and the receiver reads the block and unlinks it.
+"""
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+# Arrays smaller than this are cheaper to pickle than to put in shared memory
+MIN_SHARED_BYTES = 64 * 1024
+
+
+class WorkerCrashed(RuntimeError):
+    """The worker process running a call exited before answering."""
+
+
+class _SharedArray:
+    """Pickled in place of a NumPy array that travels through shared memory."""
+
+    def __init__(self, name: str, shape: tuple, dtype: str):
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+
+
+def _pack(value: Any, names: List[str]) -> Any:
+    """Move large arrays in ``value`` into shared memory blocks, recording their names."""
+    import numpy as np
+
+    if isinstance(value, np.ndarray) and value.nbytes >= MIN_SHARED_BYTES:
+        shm = shared_memory.SharedMemory(create=True, size=value.nbytes)
+        np.ndarray(value.shape, dtype=value.dtype, buffer=shm.buf)[...] = value
+        names.append(shm.name)
+        shared = _SharedArray(shm.name, value.shape, value.dtype.str)
+        shm.close()
+        return shared
+    if isinstance(value, tuple) and hasattr(value, "_fields"):
+        return type(value)(*(_pack(item, names) for item in value))
+    if isinstance(value, (list, tuple)):
+        return type(value)(_pack(item, names) for item in value)
+    if isinstance(value, dict):
+        return {key: _pack(item, names) for key, item in value.items()}
+    if isinstance(value, Iterator):
+        return [_pack(item, names) for item in value]
+    return value
+
+
+def _unpack(value: Any, opened: Optional[List[shared_memory.SharedMemory]] = None) -> Any:
+    """
+    Restore arrays packed by ``_pack``. With ``opened``, arrays are views of the
+    shared blocks, which the caller must release; otherwise they are copied out
+    and the blocks unlinked at once.
+    """
+    import numpy as np
+
+    if isinstance(value, _SharedArray):
+        shm = shared_memory.SharedMemory(name=value.name)
+        array = np.ndarray(value.shape, dtype=np.dtype(value.dtype), buffer=shm.buf)
+        if opened is not None:
+            opened.append(shm)
+            return array
+        array = array.copy()
+        _release(shm)
+        return array
+    if isinstance(value, tuple) and hasattr(value, "_fields"):
+        return type(value)(*(_unpack(item, opened) for item in value))
+    if isinstance(value, (list, tuple)):
+        return type(value)(_unpack(item, opened) for item in value)
+    if isinstance(value, dict):
+        return {key: _unpack(item, opened) for key, item in value.items()}
+    return value
+
+
+def _release(shm: shared_memory.SharedMemory):
+    try:
+        shm.close()
+    except BufferError:
+        # An array still views the block; the mapping goes away with it
+        pass
+    try:
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _unlink(names: Sequence[str]):
+    """Free blocks whose receiver never got to them."""
+    for name in names:
+        try:
+            _release(shared_memory.SharedMemory(name=name))
+        except FileNotFoundError:
+            pass
+
+
+def _resolve(services: Dict[str, Any], target: str) -> Callable:
+    """``"phonemizer.base_model.frame_log_probs"`` → that bound method."""
+    name, *path = target.split(".")
+    obj = services[name]
+    for attribute in path:
+        obj = getattr(obj, attribute)
+    return obj
+
+
+def _worker_main(conn, build: Callable, build_args: tuple, cpus: Optional[List[int]], concurrency: int):
+    if cpus:
+        os.sched_setaffinity(0, cpus)
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            conn.send(message)
+
+    services: Dict[str, Any] = {}
+    # ``build`` yields (name, service, info) one service at a time, so cheap
+    # services are available before the heavy ones have loaded
+    try:
+        for name, service, info in build(*build_args):
+            services[name] = service
+            send(("ready", name, info))
+    except Exception:
+        send(("failed", traceback.format_exc()))
+        os._exit(1)
+
+    def handle(call_id: int, target: str, args: tuple, kwargs: dict):
+        opened: List[shared_memory.SharedMemory] = []
+        names: List[str] = []
+        try:
+            result = _resolve(services, target)(*_unpack(args, opened), **_unpack(kwargs, opened))
+            reply = (call_id, True, _pack(result, names))
+        except Exception as e:
+            reply = (call_id, False, e)
+        finally:
+            for shm in opened:
+                _release(shm)
+        try:
+            send(reply)
+        except Exception as e:
+            # The exception (or result) could not be pickled
+            _unlink(names)
+            send((call_id, False, RuntimeError(f"{type(e).__name__}: {e}")))
+
+    pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="pool-call")
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        pool.submit(handle, *message)
+    os._exit(0)
+
+
+class _Worker:
+    def __init__(self, index: int, cpus: Optional[List[int]]):
+        self.index = index
+        self.cpus = cpus
+        self.process = None
+        self.conn = None
+        self.ready: Dict[str, Any] = {}
+        self.pending: Dict[int, tuple] = {}
+        self.send_lock = threading.Lock()
+        self.restarts = 0
+        self.failed = False
+
+
+class ProcessPool:
+    """
+    A fixed set of worker processes, each building its own copies of the services.
+
+    ``build(*build_args, threads)`` runs in every worker and yields ``(name,
+    service, info)`` for each service as soon as it is built; ``threads`` is
+    the number of cores the worker should use (``threads_per_worker``, or the
+    size of its core group), and ``info`` (picklable) is passed back to the
+    API process, available from ``info(name)``. Each worker
+    handles up to ``concurrency`` calls at once, so batching inside a worker
+    still sees concurrent requests. Workers are started with ``spawn`` and
+    pinned to their own group of cores; a worker that exits is restarted and
+    its in-flight calls fail with ``WorkerCrashed``.
+    """
+
+    def __init__(
+        self,
+        build: Callable,
+        build_args: tuple = (),
+        workers: int = 2,
+        concurrency: int = 4,
+        pin_cpus: bool = True,
+        threads_per_worker: Optional[int] = None,
+    ):
+        self.build = build
+        self.build_args = build_args
+        self.concurrency = concurrency
+        self.threads_per_worker = threads_per_worker
+        self._context = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._ids = itertools.count()
+        self._next = itertools.count()
+        self._closing = False
+        self._error: Optional[str] = None
+        self._calls = 0
+        self._crashes = 0
+
+        cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+        per_worker = len(cpus) // workers
+        self._workers = [
+            _Worker(i, cpus[i * per_worker:(i + 1) * per_worker] if pin_cpus and per_worker else None)
+            for i in range(workers)
+        ]
+        self._started = False
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for worker in self._workers:
+            self._spawn(worker)
+
+    def _spawn(self, worker: _Worker):
+        parent_conn, child_conn = self._context.Pipe()
+        threads = self.threads_per_worker or (len(worker.cpus) if worker.cpus else None)
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, self.build, (*self.build_args, threads), worker.cpus, self.concurrency),
+            name=f"pool-worker-{worker.index}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        worker.process, worker.conn, worker.ready = process, parent_conn, {}
+        reader = threading.Thread(
+            target=self._read, args=(worker, parent_conn), name=f"pool-reader-{worker.index}", daemon=True
+        )
+        reader.start()
+
+    def _read(self, worker: _Worker, conn):
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                break
+            if message[0] == "ready":
+                _, name, info = message
+                with self._ready:
+                    worker.ready[name] = info
+                    self._ready.notify_all()
+                continue
+            if message[0] == "failed":
+                # Building the services failed: restarting would only fail again
+                print(f"Pool worker {worker.index} failed to start:\n{message[1]}")
+                with self._ready:
+                    worker.failed = True
+                    self._error = message[1].strip().splitlines()[-1]
+                    self._ready.notify_all()
+                continue
+            call_id, ok, value = message
+            with self._lock:
+                future, _ = worker.pending.pop(call_id, (None, None))
+            if future is None:
+                # Nobody waits for this answer any more (a broadcast timed out)
+                if ok:
+                    _unpack(value)
+                continue
+            try:
+                if ok:
+                    future.set_result(_unpack(value))
+                else:
+                    future.set_exception(value)
+            except Exception as e:
+                future.set_exception(e)
+        self._crashed(worker)
+
+    def _crashed(self, worker: _Worker):
+        worker.process.join()
+        exitcode = worker.process.exitcode
+        with self._ready:
+            pending, worker.pending = worker.pending, {}
+            # A worker that dies before building anything would only die again
+            if not worker.ready and not worker.failed and not self._closing:
+                worker.failed = True
+                self._error = f"worker {worker.index} exited with code {exitcode} during startup"
+                self._ready.notify_all()
+            worker.ready = {}
+            restart = not (self._closing or worker.failed)
+            if restart:
+                self._crashes += 1
+                worker.restarts += 1
+        for future, names in pending.values():
+            _unlink(names)
+            future.set_exception(WorkerCrashed(f"Worker {worker.index} exited with code {exitcode}"))
+        if restart:
+            print(f"Pool worker {worker.index} exited with code {exitcode}; restarting")
+            time.sleep(1)
+            self._spawn(worker)
+
+    def wait_ready(self, name: str, timeout: Optional[float] = None) -> bool:
+        """
+        Block until at least one worker has built service ``name``.
+        Raises RuntimeError if no worker has it and building failed.
+        """
+        with self._ready:
+            ready = self._ready.wait_for(
+                lambda: any(name in w.ready for w in self._workers) or self._error is not None,
+                timeout,
+            )
+            if not any(name in w.ready for w in self._workers):
+                if self._error is not None:
+                    raise RuntimeError(f"Pool workers failed to start: {self._error}")
+                return False
+            return ready
+
+    def info(self, name: str) -> Any:
+        self.wait_ready(name)
+        with self._lock:
+            return next(w.ready[name] for w in self._workers if name in w.ready)
+
+    def submit(self, target: str, *args, **kwargs) -> Future:
+        """Call ``target`` (``"service.method"``) on the least-loaded worker that has the service."""
+        service = target.split(".", 1)[0]
+        self.wait_ready(service)
+        future: Future = Future()
+        names: List[str] = []
+        message = (next(self._ids), target, _pack(args, names), _pack(kwargs, names))
+        with self._lock:
+            candidates = [w for w in self._workers if service in w.ready]
+            # Least loaded first; ties rotate so idle workers share the load
+            start = next(self._next)
+            worker = min(
+                candidates,
+                key=lambda w: (len(w.pending), (w.index - start) % len(self._workers)),
+            )
+            worker.pending[message[0]] = (future, names)
+            self._calls += 1
+            conn = worker.conn
+        try:
+            with worker.send_lock:
+                conn.send(message)
+        except (OSError, ValueError) as e:
+            with self._lock:
+                worker.pending.pop(message[0], None)
+            _unlink(names)
+            future.set_exception(WorkerCrashed(str(e)))
+        return future
+
+    def call(self, target: str, *args, **kwargs) -> Any:
+        return self.submit(target, *args, **kwargs).result()
+
+    def broadcast(self, target: str, *args, timeout: Optional[float] = None, **kwargs) -> List[Any]:
+        """
+        Call ``target`` once on every worker that has the service, e.g. for
+        warm-ups or stats. Workers that haven't built the service yet, that
+        can't be reached, or that don't answer within ``timeout`` are left out.
+        """
+        service = target.split(".", 1)[0]
+        with self._lock:
+            workers = [w for w in self._workers if service in w.ready]
+        futures = []
+        for worker in workers:
+            future: Future = Future()
+            names: List[str] = []
+            message = (next(self._ids), target, _pack(args, names), _pack(kwargs, names))
+            with self._lock:
+                worker.pending[message[0]] = (future, names)
+            try:
+                with worker.send_lock:
+                    worker.conn.send(message)
+            except (OSError, ValueError):
+                # The worker is going away; its reader restarts it
+                with self._lock:
+                    worker.pending.pop(message[0], None)
+                _unlink(names)
+                continue
+            futures.append((worker, message[0], future))
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        results = []
+        for worker, call_id, future in futures:
+            remaining = max(0.0, deadline - time.monotonic()) if deadline is not None else None
+            try:
+                results.append(future.result(remaining))
+            except FutureTimeout:
+                # A late answer finds no pending call and is dropped
+                with self._lock:
+                    worker.pending.pop(call_id, None)
+            except WorkerCrashed:
+                pass
+        return results
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self._calls,
+                "crashes": self._crashes,
+                "workers": [
+                    {
+                        "pid": w.process.pid if w.process else None,
+                        "cpus": w.cpus,
+                        "in_flight": len(w.pending),
+                        "ready": sorted(w.ready),
+                        "restarts": w.restarts,
+                    }
+                    for w in self._workers
+                ],
+            }
+
+    def close(self):
+        with self._lock:
+            self._closing = True
+        for worker in self._workers:
+            try:
+                with worker.send_lock:
+                    worker.conn.send(None)
+            except (OSError, ValueError, AttributeError):
+                pass
@@ -0,0 +1,121 @@
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, Optional
+
+
+class ModelNotReady(RuntimeError):
+    """The requested model is still loading, warming up, or failed to load."""
+
+
+class _Entry:
+    def __init__(self, name: str, load: Callable[[], Any], warmup: Optional[Callable[[Any], None]]):
+        self.name = name
+        self.load = load
+        self.warmup = warmup
+        self.value: Any = None
+        self.state = "pending"
+        self.error: Optional[str] = None
+        self.load_s: Optional[float] = None
+        self.warmup_s: Optional[float] = None
+        self.done = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+
+class ModelRegistry:
+    """
+    Loads models in background threads and tracks their readiness.
+
+    Each registered model is loaded on its own thread, so a 7B LLM and a TTS
+    model load side by side instead of one after the other, and the API can
+    serve model-free endpoints meanwhile. After loading, the optional warm-up
+    runs on the same thread; a model only counts as ready once it is warm.
+
+    ``start(warmup=False)`` stops after loading. A preloading parent process
+    uses it before forking workers, which then call ``start()`` again to
+    run the warm-ups in their own process.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, load: Callable[[], Any], warmup: Optional[Callable[[Any], None]] = None):
+        with self._lock:
+            self._entries[name] = _Entry(name, load, warmup)
+
+    def start(self, warmup: bool = True):
+        """
+        Start loading (and warming up) every registered model that is not
+        loading yet, or warm up models that were loaded without it. Returns immediately.
+        """
+        with self._lock:
+            for entry in self._entries.values():
+                if entry.state == "pending" or (warmup and entry.state == "loaded"):
+                    entry.done.clear()
+                    entry.thread = threading.Thread(
+                        target=self._load, args=(entry, warmup), name=f"load-{entry.name}", daemon=True
+                    )
+                    entry.state = "loading" if entry.state == "pending" else "warming"
+                    entry.thread.start()
+
+    def _load(self, entry: _Entry, warmup: bool):
+        try:
+            value = entry.value
+            if entry.state == "loading":
+                start = time.perf_counter()
+                value = entry.value = entry.load()
+                entry.load_s = round(time.perf_counter() - start, 2)
+                if not warmup:
+                    entry.state = "loaded"
+                    print(f"{entry.name} loaded in {entry.load_s}s")
+                    return
+            if entry.warmup is not None:
+                entry.state = "warming"
+                start = time.perf_counter()
+                try:
+                    entry.warmup(value)
+                except Exception as e:
+                    # A failed warm-up only means the first request is slow
+                    print(f"Warm-up of {entry.name} failed: {e}")
+                entry.warmup_s = round(time.perf_counter() - start, 2)
+            entry.state = "ready"
+            print(f"{entry.name} ready (loaded in {entry.load_s}s, warmed up in {entry.warmup_s or 0}s)")
+        except Exception as e:
+            entry.state = "failed"
+            entry.error = str(e)
+            traceback.print_exc()
+        finally:
+            entry.done.set()
+
+    def get(self, name: str) -> Any:
+        """Return a ready model, or raise ModelNotReady."""
+        entry = self._entries[name]
+        if entry.state != "ready":
+            detail = f": {entry.error}" if entry.error else ""
+            raise ModelNotReady(f"Model '{name}' is {entry.state}{detail}")
+        return entry.value
+
+    def is_ready(self, name: str | None = None) -> bool:
+        """Whether one model, or every model when ``name`` is None, is ready."""
+        entries = [self._entries[name]] if name else self._entries.values()
+        return all(entry.state == "ready" for entry in entries)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until every started model has finished loading (or failed). Returns is_ready()."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for entry in list(self._entries.values()):
+            if entry.thread is not None:
+                entry.done.wait(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        return self.is_ready()
+
+    def status(self) -> Dict[str, dict]:
+        return {
+            name: {
+                "state": entry.state,
+                "error": entry.error,
+                "load_s": entry.load_s,
+                "warmup_s": entry.warmup_s,
+            }
+            for name, entry in self._entries.items()
+        }
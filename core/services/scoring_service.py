@@ -1,12 +1,36 @@
-import Levenshtein
+from typing import List, Sequence, Tuple
+from core import alignment
 
 class ScoringService:
+    """
+    Phoneme-level pronunciation scoring.
+
+    IPA strings are split into phonemes (nasal vowels and other diacritics stay
+    whole) and compared with a weighted edit distance whose substitution costs
+    come from articulatory features, so /e/ for /ɛ/ costs less than /k/ for /ɛ/.
+    """
+
     @staticmethod
     def score(correct: str, attempt: str) -> float:
-        correct = correct.strip()
-        attempt = attempt.strip()
-        if not correct:
-            return 0.0
-        distance = Levenshtein.distance(correct, attempt)
-        max_len = max(len(correct), len(attempt))
-        return max(0.0, 1 - distance / max_len)
\ No newline at end of file
+        return alignment.score(correct.strip(), attempt.strip())
+
+    @staticmethod
+    def score_many(pairs: Sequence[Tuple[str, str]]) -> List[float]:
+        return alignment.score_many([(correct.strip(), attempt.strip()) for correct, attempt in pairs])
+
+    @staticmethod
+    def align(correct: str, attempt: str) -> List[alignment.AlignmentOp]:
+        """Per-phoneme alignment: ("equal" | "sub" | "del" | "ins", expected, produced)."""
+        return list(alignment.align(correct.strip(), attempt.strip())[1])
+
+    @staticmethod
+    def score_prefix(correct: str, attempt: str) -> float:
+        """
+        Score an attempt that may still be in progress: expected phonemes after
+        the last one the attempt reached are not counted as missing.
+        """
+        ops = list(alignment.align(correct.strip(), attempt.strip())[1])
+        while ops and ops[-1][0] == "del":
+            ops.pop()
+        prefix = "".join(expected for _, expected, _ in ops if expected is not None)
+        return alignment.align(prefix, attempt.strip())[0]
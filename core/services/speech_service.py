@@ -1,3 +1,5 @@
+from pathlib import Path
+from typing import Iterator, List
 from core.phonetics import Phonetics
 
 class SpeechService:
@@ -5,11 +7,37 @@ class SpeechService:
     Service layer for text-based speech operations.
     Handles text -> IPA conversion.
     """
-    def __init__(self):
-        self.phonetics = Phonetics()
+    def __init__(self, lexicon: dict | None = None):
+        lexicon = lexicon or {}
+        self.phonetics = Phonetics(
+            lexicon_path=lexicon.get("path", "cache/lexicon.sqlite"),
+            memory_size=lexicon.get("memory_size", 10000),
+        )
+        prewarm_file = lexicon.get("prewarm_file")
+        if prewarm_file:
+            self.prewarm(Path(prewarm_file))
 
     def get_ipa(self, word: str) -> str:
         """
         Return IPA transcription of the given word.
         """
-        return self.phonetics.text_to_ipa(word)
\ No newline at end of file
+        return self.phonetics.text_to_ipa(word)
+
+    def get_ipa_many(self, texts: List[str], njobs: int = 4, chunk_size: int = 500) -> Iterator[str]:
+        """
+        Yield the IPA transcription of each text, in input order.
+        Duplicates are phonemized once; misses run on parallel espeak workers.
+        """
+        return self.phonetics.text_to_ipa_many(texts, njobs=njobs, chunk_size=chunk_size)
+
+    def prewarm(self, word_list: Path) -> int:
+        """
+        Fill the lexicon from a word list (one word or phrase per line).
+        """
+        with open(word_list, encoding="utf-8") as f:
+            added = self.phonetics.prewarm(line for line in f if line.strip())
+        print(f"Lexicon prewarmed with {added} new entries from {word_list}")
+        return added
+
+    def stats(self) -> dict:
+        return self.phonetics.stats()
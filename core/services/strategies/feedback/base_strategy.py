@@ -1,6 +1,27 @@
 from abc import ABC, abstractmethod
+from typing import Iterator
 
 class FeedbackStrategy(ABC):
+    # Identifies the model behind the feedback, used as part of the feedback cache key
+    model_name: str | None = None
+
     @abstractmethod
     def generate_feedback(self, word: str, expected: str, attempt: str) -> str:
-        pass
\ No newline at end of file
+        pass
+
+    def stream_feedback(self, word: str, expected: str, attempt: str) -> Iterator[str]:
+        """
+        Yield the feedback text piece by piece as it is generated.
+        Strategies that cannot stream yield the whole text at once.
+        """
+        yield self.generate_feedback(word, expected, attempt)
+
+    def warmup(self):
+        """
+        Run a throwaway request so the first real one is not slow.
+        Called in the background once the model has loaded.
+        """
+
+    def stats(self) -> dict:
+        """Runtime counters exposed at GET /stats."""
+        return {}
@@ -1,94 +1,212 @@
-from llama_cpp import Llama
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, List
+from llama_cpp import Llama, StoppingCriteriaList
+from core.services.admission import ClientDisconnected, cancelled
 from core.services.strategies.feedback.base_strategy import FeedbackStrategy
+from core.services.strategies.feedback.prompts import FIELD_BYTES, PREFIX_MESSAGES, build_messages, user_turn
+
+class _CountingLlama(Llama):
+    """Llama that records how many tokens each eval call pushes through the model."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.eval_sizes: List[int] = []
+
+    def eval(self, tokens):
+        self.eval_sizes.append(len(tokens))
+        super().eval(tokens)
+
+class _FeedbackContext:
+    """
+    One llama.cpp context with its own KV cache and snapshot of the shared prompt prefix.
+    Weights are memory-mapped, so every context of the same GGUF file shares them.
+    """
+
+    def __init__(self, model_path: str, n_ctx: int, n_threads: int | None):
+        self.llm = _CountingLlama(
+            model_path=model_path,
+            n_ctx=n_ctx,
+            n_threads=n_threads,
+            use_mmap=True,
+        )
+        self.prefix_tokens: List[int] = []
+        self.prefix_state = None
+
+    def _prompt_tokens(self, word: str) -> List[int]:
+        """Tokens of a full feedback prompt, as built by the chat handler."""
+        self.llm.create_chat_completion(
+            messages=PREFIX_MESSAGES + [user_turn(word, "/bɔ̃ʒuʁ/", "/bonʒuʁ/")],
+            max_tokens=1,
+        )
+        return self.llm.input_ids[:self.llm.n_tokens].tolist()
+
+    def cache_prefix(self):
+        """
+        Evaluate the shared prompt prefix and snapshot the context state.
+
+        The prefix is found by tokenizing two prompts that differ only in the
+        last user turn; everything they have in common is the same for every
+        request and never needs to be evaluated again.
+        """
+        first = self._prompt_tokens("bonjour")
+        second = self._prompt_tokens("merci")
+        length = 0
+        while length < min(len(first), len(second)) and first[length] == second[length]:
+            length += 1
+        self.llm.reset()
+        self.llm.eval(first[:length])
+        self.prefix_tokens = first[:length]
+        self.prefix_state = self.llm.save_state()
+
+    def restore_prefix(self):
+        """
+        Put the context back in the cached prefix state unless it still holds the prefix.
+        llama.cpp then only evaluates the tokens after the longest common prefix.
+        """
+        if self.prefix_state is None:
+            return
+        length = len(self.prefix_tokens)
+        if self.llm.n_tokens < length or self.llm.input_ids[:length].tolist() != self.prefix_tokens:
+            self.llm.load_state(self.prefix_state)
 
 class LLamaCppFeedbackStrategy(FeedbackStrategy):
     def __init__(
         self,
         model_path: str = "models/Lucie-7B-Instruct-v1.1-q4_k_m.gguff",
         max_tokens: int = 512,
+        n_contexts: int = 1,
+        n_threads: int | None = None,
+        n_ctx: int | None = None,
     ):
         """
-        Initialize llama.cpp Llama model for local inference.
+        Initialize a pool of llama.cpp contexts for local inference.
+
+        Each context serves one request at a time; all of them map the same
+        GGUF weights, so extra contexts only cost their KV cache.
         """
-        self.llm = Llama(
-            model_path=model_path
-        )
+        self.model_name = model_path
         self.max_tokens = max_tokens
-        # Initial dummy request to warm up model
+        self.n_ctx = n_ctx or self._fit_context(model_path, max_tokens)
+
+        self._pool: "queue.Queue[_FeedbackContext]" = queue.Queue()
+        self.contexts: List[_FeedbackContext] = []
+        for _ in range(n_contexts):
+            context = _FeedbackContext(model_path, self.n_ctx, n_threads)
+            # Evaluate the system message and few-shot examples once, up front
+            try:
+                context.cache_prefix()
+            except Exception as e:
+                print(f"Could not cache the feedback prompt prefix: {e}")
+            self.contexts.append(context)
+            self._pool.put(context)
+        print(
+            f"llama.cpp pool ready: {n_contexts} contexts, n_ctx={self.n_ctx}, "
+            f"{len(self.contexts[0].prefix_tokens)} prefix tokens cached"
+        )
+
+        self._stats_lock = threading.Lock()
+        self._requests = 0
+        self._prompt_tokens_evaluated = 0
+        self.last_prompt_tokens_evaluated = 0
+        self._queue_wait_total = 0.0
+        self._queue_wait_max = 0.0
+
+    @staticmethod
+    def _fit_context(model_path: str, max_tokens: int, margin: int = 128) -> int:
+        """
+        Size the context window to the longest feedback prompt plus the
+        completion, rounded up to a multiple of 256, instead of the library
+        default. The input fields are clipped to FIELD_BYTES and take at most
+        one token per byte, so any request fits.
+        """
+        vocab = Llama(model_path=model_path, vocab_only=True, verbose=False)
+        messages = build_messages("", "", "")
+        text = "".join(message["content"] for message in messages)
+        # The chat template adds a handful of marker tokens around each message
+        prompt = len(vocab.tokenize(text.encode("utf-8"), add_bos=True, special=True)) + 8 * len(messages)
+        # A field can also break a merge with the text around it: one extra token at each end
+        prompt += sum(FIELD_BYTES.values()) + 2 * len(FIELD_BYTES)
+        del vocab
+        return -(-(prompt + margin + max_tokens) // 256) * 256
+
+    @contextmanager
+    def checkout(self) -> Iterator[_FeedbackContext]:
+        """Borrow a free context for the duration of one request."""
+        start = time.perf_counter()
+        context = self._pool.get()
+        wait = time.perf_counter() - start
+        with self._stats_lock:
+            self._queue_wait_total += wait
+            self._queue_wait_max = max(self._queue_wait_max, wait)
         try:
-            self.generate_feedback("bonjour", "/bɔ̃ʒuʁ/", "/bonʒuʁ/")
-        except Exception:
-            pass
+            yield context
+        finally:
+            self._pool.put(context)
 
     def generate_feedback(self, word: str, expected_phonemes: str, user_phonemes: str) -> str:
         """
         Generate beginner-friendly pronunciation feedback in English and French.
         """
-        messages = [
-                {
-                    "role": "system",
-                    "content": (
-                        "You are a friendly French pronunciation coach for beginners. "
-                        "Give clear, simple feedback, explain how to pronounce words using English approximations, "
-                        "give one short example, and tips to improve. Do not focus only on phonetic symbols."
-                    )
-                },
-                # Example 1
-                {
-                    "role": "user",
-                    "content": (
-                        "The user said: 'merci'\n"
-                        "Expected pronunciation (IPA): /mɛʁsi/\n"
-                        "User pronunciation (IPA): /mursi/\n"
-                        "Identify any pronunciation mistakes and give concise, beginner-friendly feedback "
-                        "using English approximations, with one example and tips to improve. Only provide the feedback text."
-                    )
-                },
-                {
-                    "role": "assistant",
-                    "content": (
-                        "Good attempt! In 'merci', the first vowel should sound like 'eh' in 'bed' (/ɛ/), "
-                        "but you made it closer to 'oo' (/u/). Try 'mehr-see' instead of 'moor-see'. "
-                        "Tip: open your mouth slightly more for the 'eh' sound."
-                    )
-                },
-                # Example 2
-                {
-                    "role": "user",
-                    "content": (
-                        "The user said: 'bonjour'\n"
-                        "Expected pronunciation (IPA): /bɔ̃ʒuʁ/\n"
-                        "User pronunciation (IPA): /bonʒuʁ/\n"
-                        "Identify any pronunciation mistakes and give concise, beginner-friendly feedback "
-                        "using English approximations, with one example and tips to improve. Only provide the feedback text."
-                    )
-                },
-                {
-                    "role": "assistant",
-                    "content": (
-                        "Nice try! In 'bonjour', the 'on' is nasal (/ɔ̃/), but you pronounced it like a normal 'on'. "
-                        "Think of 'bohn' but let the sound come through your nose: 'bõn-zhoor'. "
-                        "Tip: practice by humming while saying 'on'."
-                    )
-                },
-                # Actual user input
-                {
-                    "role": "user",
-                    "content": (
-                        f"The user said: '{word}'\n"
-                        f"Expected pronunciation (IPA): {expected_phonemes}\n"
-                        f"User pronunciation (IPA): {user_phonemes}\n"
-                        f"Identify any pronunciation mistakes and give concise, beginner-friendly feedback "
-                        f"using English approximations, with one example and tips to improve. Only provide the feedback text."
-                    )
-                }
-            ]
-
-        # Run chat completion
-        response = self.llm.create_chat_completion(
-            messages=messages,
-            max_tokens=self.max_tokens,
-        )
-        # Extract the text safely
-        feedback_text = response["choices"][0]["message"]["content"].strip()
-        return feedback_text
\ No newline at end of file
+        return "".join(self.stream_feedback(word, expected_phonemes, user_phonemes)).strip()
+
+    def stream_feedback(self, word: str, expected_phonemes: str, user_phonemes: str) -> Iterator[str]:
+        """
+        Yield feedback tokens as llama.cpp decodes them.
+        """
+        messages = build_messages(word, expected_phonemes, user_phonemes)
+
+        with self.checkout() as context:
+            llm = context.llm
+            context.restore_prefix()
+            llm.eval_sizes = []
+            stream = llm.create_chat_completion(
+                messages=messages,
+                max_tokens=self.max_tokens,
+                stream=True,
+                # Checked after every token: stop decoding for a client that went away
+                stopping_criteria=StoppingCriteriaList([lambda input_ids, logits: cancelled()]),
+            )
+            started = False
+            try:
+                for chunk in stream:
+                    token = chunk["choices"][0]["delta"].get("content")
+                    if not token:
+                        continue
+                    # Strip leading whitespace like the non-streaming completion did
+                    if not started:
+                        token = token.lstrip()
+                        if not token:
+                            continue
+                        started = True
+                    yield token
+                # The stopping criterion ends a cancelled generation like a finished one;
+                # report it as cut off, so it is never memoized
+                if cancelled():
+                    raise ClientDisconnected("Client disconnected during LLM feedback generation")
+            finally:
+                # Stops decoding when the consumer goes away early
+                stream.close()
+                # The first eval of a request processes the uncached part of the prompt
+                evaluated = llm.eval_sizes[0] if llm.eval_sizes else 0
+                with self._stats_lock:
+                    self.last_prompt_tokens_evaluated = evaluated
+                    self._requests += 1
+                    self._prompt_tokens_evaluated += evaluated
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            requests = self._requests
+            return {
+                "requests": requests,
+                "contexts": len(self.contexts),
+                "contexts_free": self._pool.qsize(),
+                "n_ctx": self.n_ctx,
+                "prefix_tokens": len(self.contexts[0].prefix_tokens),
+                "last_prompt_tokens_evaluated": self.last_prompt_tokens_evaluated,
+                "mean_prompt_tokens_evaluated": round(self._prompt_tokens_evaluated / requests, 1) if requests else 0.0,
+                "mean_queue_wait_s": round(self._queue_wait_total / requests, 3) if requests else 0.0,
+                "max_queue_wait_s": round(self._queue_wait_max, 3),
+            }
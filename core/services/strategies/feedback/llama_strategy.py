@@ -1,85 +1,127 @@
+import contextvars
+import threading
+from typing import Dict, Iterator, List
 import torch
-from transformers import pipeline
+from transformers import pipeline, StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
+from core.batching import MicroBatcher
+from core.services.admission import ClientDisconnected, cancelled
 from core.services.strategies.feedback.base_strategy import FeedbackStrategy
+from core.services.strategies.feedback.prompts import build_messages
+
+class _StopWhen(StoppingCriteria):
+    """Stop generating, for every sequence, as soon as ``should_stop()`` is true."""
+
+    def __init__(self, should_stop):
+        self.should_stop = should_stop
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return torch.full((input_ids.shape[0],), self.should_stop(), dtype=torch.bool, device=input_ids.device)
+
 
 class LlamaFeedbackStrategy(FeedbackStrategy):
-    def __init__(self, model_name="meta-llama/Llama-3.2-3B-Instruct"):
+    def __init__(self, model_name="meta-llama/Llama-3.2-3B-Instruct", batching: dict | None = None):
+        self.model_name = model_name
         self.generator = pipeline(
             "text-generation",
             model=model_name,
             torch_dtype=torch.bfloat16,
             device_map="auto",
         )
+        self.max_new_tokens = 200
+        # Decoder-only models must be left-padded so every prompt ends where generation starts
+        tokenizer = self.generator.tokenizer
+        tokenizer.padding_side = "left"
+        if tokenizer.pad_token_id is None:
+            tokenizer.pad_token = tokenizer.eos_token
+        # Batched and streamed generation take turns on the model
+        self._model_lock = threading.Lock()
+        # Concurrent requests are coalesced into one generate call
+        batching = batching or {}
+        self.batcher = MicroBatcher(
+            self._generate_batch,
+            max_batch_size=batching.get("max_batch_size", 4),
+            max_wait_ms=batching.get("max_wait_ms", 50),
+            name="feedback-batcher",
+        )
+
+    def warmup(self):
         # Initial dummy request to warm up model
-        try:
-            self.generate_feedback("bonjour", "/bɔ̃ʒuʁ/", "/bonʒuʁ/")
-        except Exception:
-            pass
+        self.generate_feedback("bonjour", "/bɔ̃ʒuʁ/", "/bonʒuʁ/")
 
     def generate_feedback(self, word: str, expected_phonemes: str, user_phonemes: str) -> str:
-        messages = [
-            {
-                "role": "system",
-                "content": (
-                    "You are a friendly French pronunciation coach for beginners. "
-                    "Give clear, simple feedback, explain how to pronounce words using English approximations, "
-                    "give one short example, and tips to improve. Do not focus only on phonetic symbols."
-                )
-            },
-            # Example 1
-            {
-                "role": "user",
-                "content": (
-                    "The user said: 'merci'\n"
-                    "Expected pronunciation (IPA): /mɛʁsi/\n"
-                    "User pronunciation (IPA): /mursi/\n"
-                    "Identify any pronunciation mistakes and give concise, beginner-friendly feedback "
-                    "using English approximations, with one example and tips to improve. Only provide the feedback text."
-                )
-            },
-            {
-                "role": "assistant",
-                "content": (
-                    "Good attempt! In 'merci', the first vowel should sound like 'eh' in 'bed' (/ɛ/), "
-                    "but you made it closer to 'oo' (/u/). Try 'mehr-see' instead of 'moor-see'. "
-                    "Tip: open your mouth slightly more for the 'eh' sound."
-                )
-            },
-            # Example 2
-            {
-                "role": "user",
-                "content": (
-                    "The user said: 'bonjour'\n"
-                    "Expected pronunciation (IPA): /bɔ̃ʒuʁ/\n"
-                    "User pronunciation (IPA): /bonʒuʁ/\n"
-                    "Identify any pronunciation mistakes and give concise, beginner-friendly feedback "
-                    "using English approximations, with one example and tips to improve. Only provide the feedback text."
-                )
-            },
-            {
-                "role": "assistant",
-                "content": (
-                    "Nice try! In 'bonjour', the 'on' is nasal (/ɔ̃/), but you pronounced it like a normal 'on'. "
-                    "Think of 'bohn' but let the sound come through your nose: 'bõn-zhoor'. "
-                    "Tip: practice by humming while saying 'on'."
-                )
-            },
-            # Actual user input
-            {
-                "role": "user",
-                "content": (
-                    f"The user said: '{word}'\n"
-                    f"Expected pronunciation (IPA): {expected_phonemes}\n"
-                    f"User pronunciation (IPA): {user_phonemes}\n"
-                    f"Identify any pronunciation mistakes and give concise, beginner-friendly feedback "
-                    f"using English approximations, with one example and tips to improve. Only provide the feedback text."
-                )
-            }
+        return self.batcher(build_messages(word, expected_phonemes, user_phonemes))
+
+    def _generate_batch(self, conversations: List[List[Dict[str, str]]]) -> List[str]:
+        """
+        Generate feedback for several conversations in a single left-padded generate call.
+        """
+        tokenizer = self.generator.tokenizer
+        model = self.generator.model
+        prompts = [
+            tokenizer.apply_chat_template(messages, add_generation_prompt=True, tokenize=False)
+            for messages in conversations
         ]
+        # The chat template already contains the special tokens
+        inputs = tokenizer(prompts, return_tensors="pt", padding=True, add_special_tokens=False).to(model.device)
+
+        with self._model_lock, torch.no_grad():
+            output_ids = model.generate(
+                **inputs,
+                max_new_tokens=self.max_new_tokens,
+                pad_token_id=tokenizer.pad_token_id,
+            )
+
+        completions = output_ids[:, inputs["input_ids"].shape[1]:]
+        return [text.strip() for text in tokenizer.batch_decode(completions, skip_special_tokens=True)]
+
+    def stream_feedback(self, word: str, expected_phonemes: str, user_phonemes: str) -> Iterator[str]:
+        """
+        Yield decoded text as the model generates it, using a TextIteratorStreamer.
 
-        outputs = self.generator(messages, max_new_tokens=200)
+        A stream has the model to itself, so it waits for any running batch and
+        batches wait for it. Generation stops when the consumer closes the
+        stream or the request is cancelled.
+        """
+        tokenizer = self.generator.tokenizer
+        model = self.generator.model
+        input_ids = tokenizer.apply_chat_template(
+            build_messages(word, expected_phonemes, user_phonemes),
+            add_generation_prompt=True,
+            return_tensors="pt",
+        ).to(model.device)
+        streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+        stop = threading.Event()
 
-        # Extract from Hugging Face pipeline output
-        generated_text = outputs[0]["generated_text"][-1]['content']
+        with self._model_lock:
+            # The generation thread sees this request's ticket, so cancelled() works there
+            thread = threading.Thread(
+                target=contextvars.copy_context().run,
+                args=(model.generate,),
+                kwargs={
+                    "input_ids": input_ids,
+                    "attention_mask": torch.ones_like(input_ids),
+                    "max_new_tokens": self.max_new_tokens,
+                    "streamer": streamer,
+                    "stopping_criteria": StoppingCriteriaList([_StopWhen(lambda: stop.is_set() or cancelled())]),
+                },
+                daemon=True,
+            )
+            thread.start()
+            try:
+                started = False
+                for text in streamer:
+                    if not started:
+                        text = text.lstrip()
+                        if not text:
+                            continue
+                        started = True
+                    yield text
+                # Cut short for a client that went away; never memoized
+                if cancelled():
+                    raise ClientDisconnected("Client disconnected during LLM feedback generation")
+            finally:
+                stop.set()
+                thread.join()
 
-        return generated_text.strip()
\ No newline at end of file
+    def stats(self) -> dict:
+        return {"batching": self.batcher.stats()}
@@ -0,0 +1,65 @@
+from typing import Dict, List
+
+SYSTEM_PROMPT = (
+    "You are a friendly French pronunciation coach for beginners. "
+    "Give clear, simple feedback, explain how to pronounce words using English approximations, "
+    "give one short example, and tips to improve. Do not focus only on phonetic symbols."
+)
+
+INSTRUCTION = (
+    "Identify any pronunciation mistakes and give concise, beginner-friendly feedback "
+    "using English approximations, with one example and tips to improve. Only provide the feedback text."
+)
+
+# Longest value of each input field put in a prompt, in UTF-8 bytes; longer input is cut.
+# A tokenizer never makes more tokens than bytes, so these also bound the prompt's length.
+FIELD_BYTES = {"word": 128, "expected_phonemes": 192, "user_phonemes": 192}
+
+
+def clip(value: str, max_bytes: int) -> str:
+    """Cut ``value`` to at most ``max_bytes`` of UTF-8, on a character boundary."""
+    return value.encode("utf-8")[:max_bytes].decode("utf-8", "ignore")
+
+
+def user_turn(word: str, expected_phonemes: str, user_phonemes: str) -> Dict[str, str]:
+    word = clip(word, FIELD_BYTES["word"])
+    expected_phonemes = clip(expected_phonemes, FIELD_BYTES["expected_phonemes"])
+    user_phonemes = clip(user_phonemes, FIELD_BYTES["user_phonemes"])
+    return {
+        "role": "user",
+        "content": (
+            f"The user said: '{word}'\n"
+            f"Expected pronunciation (IPA): {expected_phonemes}\n"
+            f"User pronunciation (IPA): {user_phonemes}\n"
+            f"{INSTRUCTION}"
+        )
+    }
+
+# System message and few-shot exchanges shared by every feedback request
+PREFIX_MESSAGES: List[Dict[str, str]] = [
+    {"role": "system", "content": SYSTEM_PROMPT},
+    # Example 1
+    user_turn("merci", "/mɛʁsi/", "/mursi/"),
+    {
+        "role": "assistant",
+        "content": (
+            "Good attempt! In 'merci', the first vowel should sound like 'eh' in 'bed' (/ɛ/), "
+            "but you made it closer to 'oo' (/u/). Try 'mehr-see' instead of 'moor-see'. "
+            "Tip: open your mouth slightly more for the 'eh' sound."
+        )
+    },
+    # Example 2
+    user_turn("bonjour", "/bɔ̃ʒuʁ/", "/bonʒuʁ/"),
+    {
+        "role": "assistant",
+        "content": (
+            "Nice try! In 'bonjour', the 'on' is nasal (/ɔ̃/), but you pronounced it like a normal 'on'. "
+            "Think of 'bohn' but let the sound come through your nose: 'bõn-zhoor'. "
+            "Tip: practice by humming while saying 'on'."
+        )
+    },
+]
+
+def build_messages(word: str, expected_phonemes: str, user_phonemes: str) -> List[Dict[str, str]]:
+    """Few-shot chat prompt asking for feedback on one attempt."""
+    return PREFIX_MESSAGES + [user_turn(word, expected_phonemes, user_phonemes)]
@@ -1,22 +1,13 @@
 from __future__ import annotations
-from difflib import SequenceMatcher
-from typing import List, Tuple, Dict
-from abc import ABC
-import unicodedata
+from typing import Tuple, Dict
 
 from core.services.feedback_service import FeedbackStrategy  # your abstract
-
-def _nfkc(s: str) -> str:
-    return unicodedata.normalize("NFKC", s)
-
-def _tokenize_ipa(ipa: str) -> List[str]:
-    ipa = _nfkc(ipa.strip())
-    return [p for p in ipa.split() if p]
+from core.services.scoring_service import ScoringService
 
 class RuleBasedFeedbackStrategy(FeedbackStrategy):
     """
     Enhanced rule-based French pronunciation feedback.
-    Works on IPA sequences (space-separated).
+    Works on the same phoneme alignment the scorer uses.
     """
 
     SUB_MAP: Dict[Tuple[str, str], str] = {
@@ -88,29 +79,9 @@ class RuleBasedFeedbackStrategy(FeedbackStrategy):
         "v": "v in **vin**",
     }
 
-    def _align(self, expected: List[str], produced: List[str]):
-        sm = SequenceMatcher(a=expected, b=produced, autojunk=False)
-        return sm.get_opcodes()
-
-    def _human_patch(self, expected_tokens: List[str], produced_tokens: List[str]):
-        ops = self._align(expected_tokens, produced_tokens)
-        issues = []
-        for tag, i1, i2, j1, j2 in ops:
-            if tag == "equal":
-                continue
-            if tag == "replace":
-                for k in range(max(i2-i1, j2-j1)):
-                    exp = expected_tokens[i1+k] if i1+k < i2 else None
-                    got = produced_tokens[j1+k] if j1+k < j2 else None
-                    if exp and got:
-                        issues.append(("sub", exp, got))
-            elif tag == "insert":
-                for got in produced_tokens[j1:j2]:
-                    issues.append(("ins", None, got))
-            elif tag == "delete":
-                for exp in expected_tokens[i1:i2]:
-                    issues.append(("del", exp, None))
-        return issues
+    def _human_patch(self, expected: str, attempt: str):
+        # Memoized by the scorer, so an attempt that was just scored is not re-aligned
+        return [op for op in ScoringService.align(expected, attempt) if op[0] != "equal"]
 
     def _tip_for_issue(self, kind: str, exp: str | None, got: str | None) -> str:
         if kind == "sub" and exp and got:
@@ -128,9 +99,7 @@ class RuleBasedFeedbackStrategy(FeedbackStrategy):
         return "Minor mismatch. Slow down and match each sound."
 
     def generate_feedback(self, word: str, expected: str, attempt: str) -> str:
-        exp_tokens = _tokenize_ipa(expected)
-        got_tokens = _tokenize_ipa(attempt)
-        issues = self._human_patch(exp_tokens, got_tokens)
+        issues = self._human_patch(expected, attempt)
         if not issues:
             return f"Great! Your pronunciation of “{word}” is very close. 👏"
         tips = [self._tip_for_issue(k, e, g) for k, e, g in issues]
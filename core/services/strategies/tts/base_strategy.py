@@ -1,8 +1,47 @@
 # services/strategies/tts/base_strategy.py
+import io
 from abc import ABC, abstractmethod
+from typing import Iterator
+import numpy as np
+import soundfile as sf
+
+def encode_wav(waveform: np.ndarray, sample_rate: int) -> bytes:
+    """Encode a mono float waveform as 16-bit PCM WAV bytes."""
+    buffer = io.BytesIO()
+    sf.write(buffer, np.clip(waveform, -1.0, 1.0), sample_rate, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+def decode_wav(audio: bytes) -> np.ndarray:
+    """Decode WAV bytes to a mono float32 waveform."""
+    waveform, _ = sf.read(io.BytesIO(audio), dtype="float32")
+    return waveform if waveform.ndim == 1 else waveform.mean(axis=1)
 
 class TTSSynthesisStrategy(ABC):
+    # Identify the audio a strategy produces, used as part of the TTS cache key
+    model_name: str | None = None
+    voice: str | None = None
+    # Sample rate of the PCM yielded by synthesize_stream
+    sample_rate: int = 16000
+
     @abstractmethod
-    def synthesize(self, text: str) -> str:
-        """Generate speech audio from text. Returns path to WAV file."""
-        pass
\ No newline at end of file
+    def synthesize(self, text: str) -> bytes:
+        """Generate speech audio from text. Returns WAV-encoded bytes."""
+        pass
+
+    def synthesize_stream(self, text: str) -> Iterator[np.ndarray]:
+        """
+        Yield mono float32 PCM chunks as soon as they are generated.
+        Strategies that cannot stream yield the whole utterance at once.
+        """
+        yield decode_wav(self.synthesize(text))
+
+    def warmup(self):
+        """
+        Run a throwaway synthesis so the first real one is not slow.
+        Called in the background once the model has loaded.
+        """
+        self.synthesize("Bonjour.")
+
+    def stats(self) -> dict:
+        """Runtime counters exposed at GET /stats."""
+        return {}
@@ -1,15 +1,19 @@
-import tempfile
-import torch
+import threading
+import numpy as np
 from TTS.api import TTS  # from coqui-tts
-from core.services.strategies.tts.base_strategy import TTSSynthesisStrategy
+from core.services.strategies.tts.base_strategy import TTSSynthesisStrategy, encode_wav
 
 class CoquiTTSStrategy(TTSSynthesisStrategy):
     def __init__(self, model_name="tts_models/fr/css10/vits"):
         print(f"Loading Coqui TTS model: {model_name}")
+        self.model_name = model_name
         self.tts = TTS(model_name)
+        self.sample_rate = self.tts.synthesizer.output_sample_rate
+        # The synthesizer is not thread safe; the tts executor may run several calls at once
+        self._lock = threading.Lock()
         print("Coqui TTS loaded!")
 
-    def synthesize(self, text: str) -> str:
-        tmp_file = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-        self.tts.tts_to_file(text=text, file_path=tmp_file.name)
-        return tmp_file.name
\ No newline at end of file
+    def synthesize(self, text: str) -> bytes:
+        with self._lock:
+            waveform = np.asarray(self.tts.tts(text=text), dtype=np.float32)
+        return encode_wav(waveform, self.sample_rate)
@@ -1,26 +1,81 @@
-import tempfile
+import re
+import time
+from typing import Iterator, List
+import numpy as np
 import torch
 from transformers import VitsModel, AutoTokenizer
-from core.services.strategies.tts.base_strategy import TTSSynthesisStrategy
-import soundfile as sf
+from core.batching import MicroBatcher
+from core.services.strategies.tts.base_strategy import TTSSynthesisStrategy, encode_wav
+
+# Split after sentence or clause punctuation so each piece can be voiced on its own
+CLAUSE_BOUNDARY = re.compile(r"(?<=[.!?;:,…])\s+")
 
 class HuggingStrategy(TTSSynthesisStrategy):
-    def __init__(self, model_name="facebook/mms-tts-fra"):
+    """
+    VITS text-to-speech from Hugging Face.
+
+    Texts requested within ``max_wait_ms`` of each other are padded into one
+    forward pass and each output waveform is cut back to its own length, so
+    many learners asking for reference audio at once share the model's time.
+    All model calls go through the batching thread, so the strategy is safe
+    to call from several threads.
+    """
+
+    def __init__(self, model_name="facebook/mms-tts-fra", batching: dict | None = None):
         print(f"Loading Hugging Face VITS model: {model_name}")
+        self.model_name = model_name
         self.model = VitsModel.from_pretrained(model_name)
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
         self.model.eval()
+        self.sample_rate = self.model.config.sampling_rate
+
+        batching = batching or {}
+        self.batcher = MicroBatcher(
+            self._generate_batch,
+            max_batch_size=batching.get("max_batch_size", 8),
+            max_wait_ms=batching.get("max_wait_ms", 20),
+            size_of=len,
+            max_padding_ratio=batching.get("max_padding_ratio", 0.5),
+            name="tts-batcher",
+        )
+        self._audio_s = 0.0
+        self._compute_s = 0.0
         print("Hugging Face VITS loaded!")
 
-    def synthesize(self, text: str) -> str:
-        inputs = self.tokenizer(text, return_tensors="pt")
+    def _generate_batch(self, texts: List[str]) -> List[np.ndarray]:
+        start = time.perf_counter()
+        inputs = self.tokenizer(texts, return_tensors="pt", padding=True)
 
         with torch.no_grad():
             outputs = self.model(**inputs)
-            waveform = outputs.waveform.squeeze().cpu().numpy()
+        waveforms = outputs.waveform.cpu().numpy()
+        # Padded items produce trailing noise past their own length
+        lengths = outputs.sequence_lengths.tolist()
+
+        self._compute_s += time.perf_counter() - start
+        self._audio_s += sum(lengths) / self.sample_rate
+        return [waveform[:length] for waveform, length in zip(waveforms, lengths)]
+
+    def _generate(self, text: str) -> np.ndarray:
+        return self.batcher(text)
+
+    def synthesize(self, text: str) -> bytes:
+        return encode_wav(self._generate(text), self.sample_rate)
+
+    @staticmethod
+    def split_clauses(text: str) -> List[str]:
+        return [clause for clause in CLAUSE_BOUNDARY.split(text.strip()) if clause]
 
-        # Save to temp wav file
-        tmp_file = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-        sf.write(tmp_file.name, waveform, self.model.config.sampling_rate)
+    def synthesize_stream(self, text: str) -> Iterator[np.ndarray]:
+        # The first clause is playing while the next one is generated
+        for clause in self.split_clauses(text):
+            yield self._generate(clause)
 
-        return tmp_file.name
\ No newline at end of file
+    def stats(self) -> dict:
+        return {
+            "batching": self.batcher.stats(),
+            "audio_s": round(self._audio_s, 1),
+            "compute_s": round(self._compute_s, 1),
+            # Seconds of speech synthesized per second of model time
+            "speed": round(self._audio_s / self._compute_s, 2) if self._compute_s else 0.0,
+        }
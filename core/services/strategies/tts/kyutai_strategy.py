@@ -1,36 +1,69 @@
 # services/strategies/tts/kyutai_strategy.py
-import tempfile
+import queue
+import threading
+from typing import Iterator
 import torch
-import sphn
 import numpy as np
 from moshi.models.loaders import CheckpointInfo
 from moshi.models.tts import DEFAULT_DSM_TTS_REPO, TTSModel
-from core.services.strategies.tts.base_strategy import TTSSynthesisStrategy
+from core.services.strategies.tts.base_strategy import TTSSynthesisStrategy, encode_wav
+
+class _StopGeneration(Exception):
+    """Raised from the frame callback when the consumer went away."""
 
 class KyutaiTTSStrategy(TTSSynthesisStrategy):
-    def __init__(self, device="mps" if torch.backends.mps.is_available() else "cuda" if torch.cuda.is_available() else "cpu"):
+    def __init__(self, device="mps" if torch.backends.mps.is_available() else "cuda" if torch.cuda.is_available() else "cpu", voice="cml-tts/fr/10087_11650_000028-0002.wav"):
         print("Loading Kyutai TTS model...")
         print(DEFAULT_DSM_TTS_REPO)
+        self.model_name = DEFAULT_DSM_TTS_REPO
+        self.voice = voice
         checkpoint_info = CheckpointInfo.from_hf_repo(DEFAULT_DSM_TTS_REPO)
         self.model = TTSModel.from_checkpoint_info(
             checkpoint_info, n_q=32, temp=0.6, device=device
         )
-        voice_path = self.model.get_voice_path("cml-tts/fr/10087_11650_000028-0002.wav")
+        voice_path = self.model.get_voice_path(voice)
         self.condition_attributes = self.model.make_condition_attributes([voice_path], cfg_coef=2.0)
+        self.sample_rate = self.model.mimi.sample_rate
+        # Mimi keeps streaming state on the model: one generation at a time
+        self._lock = threading.Lock()
         print("TTS model loaded!")
 
-    def synthesize(self, text: str) -> str:
+    def synthesize(self, text: str) -> bytes:
+        pcm = np.concatenate(list(self.synthesize_stream(text)), axis=-1)
+        return encode_wav(pcm, self.sample_rate)
+
+    def synthesize_stream(self, text: str) -> Iterator[np.ndarray]:
+        """
+        Decode each Mimi frame as soon as the model produces it and yield its PCM.
+        """
         entries = self.model.prepare_script([text], padding_between=1)
-        result = self.model.generate([entries], [self.condition_attributes])
+        chunks: "queue.Queue" = queue.Queue()
+        stop = threading.Event()
 
-        with self.model.mimi.streaming(1), torch.no_grad():
-            pcms = []
-            for frame in result.frames[self.model.delay_steps:]:
+        def on_frame(frame):
+            if stop.is_set():
+                raise _StopGeneration()
+            # Frames still inside the acoustic delay contain -1 placeholders
+            if (frame != -1).all():
                 pcm = self.model.mimi.decode(frame[:, 1:, :]).cpu().numpy()
-                pcms.append(pcm[0, 0])
-            pcm = np.concatenate(pcms, axis=-1)
+                chunks.put(pcm[0, 0])
+
+        def run():
+            try:
+                with self._lock, self.model.mimi.streaming(1), torch.no_grad():
+                    self.model.generate([entries], [self.condition_attributes], on_frame=on_frame)
+            except _StopGeneration:
+                pass
+            except Exception as e:
+                chunks.put(e)
+            finally:
+                chunks.put(None)
 
-        tmp_file = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-        sphn.write_wav(tmp_file.name, pcm, self.model.mimi.sample_rate)
-        tmp_file.flush()
-        return tmp_file.name
\ No newline at end of file
+        threading.Thread(target=run, name="kyutai-tts", daemon=True).start()
+        try:
+            while (chunk := chunks.get()) is not None:
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+        finally:
+            stop.set()
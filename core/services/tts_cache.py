@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+
+class TTSCache:
+    """
+    Content-addressed on-disk cache for synthesized audio.
+
+    Entries are named after a hash of (strategy, model, voice, normalized text)
+    and evicted least-recently-used first once the directory exceeds
+    ``max_bytes``. The LRU order survives restarts through file mtimes.
+    """
+
+    def __init__(self, directory: str = "cache/tts", max_bytes: int = 256 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+        files = sorted(self.directory.glob("*.wav"), key=lambda p: p.stat().st_mtime)
+        for path in files:
+            size = path.stat().st_size
+            self._entries[path.stem] = size
+            self._total_bytes += size
+        self._evict()
+
+    @staticmethod
+    def key(strategy: str, model_name: str | None, voice: str | None, text: str) -> str:
+        normalized = re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+        payload = json.dumps([strategy, model_name, voice, normalized], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.wav"
+
+    def get(self, key: str, record: bool = True) -> Optional[bytes]:
+        """Return the cached audio, or None. ``record=False`` leaves the hit/miss counters alone."""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += record
+                return None
+            self._entries.move_to_end(key)
+            self.hits += record
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            # Removed behind our back: treat as a miss
+            with self._lock:
+                self._total_bytes -= self._entries.pop(key, 0)
+                self.hits -= record
+                self.misses += record
+            return None
+        return data
+
+    def put(self, key: str, data: bytes):
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._total_bytes += len(data) - self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self._evict()
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
@@ -1,11 +1,78 @@
 # services/tts_service.py
-from core.services.strategies.tts.base_strategy import TTSSynthesisStrategy
+from typing import Iterator, Optional
+import numpy as np
+from core.services.strategies.tts.base_strategy import TTSSynthesisStrategy, decode_wav, encode_wav
+from core.services.tts_cache import TTSCache
 
 class TTSService:
-    def __init__(self, strategy: TTSSynthesisStrategy):
+    def __init__(self, strategy: TTSSynthesisStrategy, cache: TTSCache | None = None):
         if strategy is None:
             raise ValueError("TTSService requires a strategy, none provided.")
         self.strategy = strategy
+        self.cache = cache
 
-    def synthesize(self, text: str) -> str:
-        return self.strategy.synthesize(text)
\ No newline at end of file
+    def _cache_key(self, text: str, streamed: bool = False) -> str:
+        # Streamed audio may be synthesized piece by piece (clause by clause with
+        # the hf strategy), so it never stands in for a whole-text synthesis
+        strategy = type(self.strategy).__name__
+        return TTSCache.key(
+            f"{strategy}/stream" if streamed else strategy,
+            self.strategy.model_name,
+            self.strategy.voice,
+            text,
+        )
+
+    def lookup(self, text: str) -> Optional[bytes]:
+        """Return cached WAV audio for the text, without touching the model."""
+        if self.cache is None:
+            return None
+        return self.cache.get(self._cache_key(text))
+
+    def synthesize(self, text: str) -> bytes:
+        """Return WAV audio for the text, from the cache when possible."""
+        if self.cache is None:
+            return self.strategy.synthesize(text)
+        key = self._cache_key(text)
+        # Callers usually tried lookup() already; this catches a concurrent
+        # request for the same text that finished while we were queued.
+        audio = self.cache.get(key, record=False)
+        if audio is not None:
+            return audio
+        audio = self.strategy.synthesize(text)
+        self.cache.put(key, audio)
+        return audio
+
+    def synthesize_stream(self, text: str) -> Iterator[np.ndarray]:
+        """
+        Yield mono float32 PCM chunks at ``sample_rate`` as soon as they are ready.
+        A cache hit is yielded as a single chunk; a complete miss is cached once
+        the stream has finished, apart from whole-text syntheses.
+        """
+        key = self._cache_key(text, streamed=True) if self.cache is not None else None
+        if key is not None:
+            # A whole-text synthesis is as good for a stream; the reverse doesn't hold
+            audio = self.cache.get(self._cache_key(text), record=False) or self.cache.get(key)
+            if audio is not None:
+                yield decode_wav(audio)
+                return
+
+        chunks = []
+        stream = self.strategy.synthesize_stream(text)
+        try:
+            for chunk in stream:
+                chunks.append(chunk)
+                yield chunk
+        finally:
+            stream.close()
+        if key is not None and chunks:
+            self.cache.put(key, encode_wav(np.concatenate(chunks), self.sample_rate))
+
+    @property
+    def sample_rate(self) -> int:
+        return self.strategy.sample_rate
+
+    def stats(self) -> dict:
+        stats = self.strategy.stats()
+        if self.cache is not None:
+            stats = {**stats, "cache": self.cache.stats()}
+        return stats
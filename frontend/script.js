@@ -16,9 +16,37 @@ const textInput = document.getElementById("text");
 const toggleFeedback = document.getElementById("toggleFeedback");
 
 let mediaRecorder;
+// Lets the server drop LLM feedback for words this learner has moved on from
+const sessionId = crypto.randomUUID();
+let liveSocket = null;
 let audioForSubmit = null;
 let audioForShow = null;
 
+// Live recognition: stream recorder chunks to the server while the learner speaks.
+// Chunks recorded before the socket opens (including the WebM header) are sent on open.
+function openLiveRecognition(text, recordedChunks) {
+    const protocol = location.protocol === "https:" ? "wss" : "ws";
+    const socket = new WebSocket(`${protocol}://${location.host}/ws/recognize?text=${encodeURIComponent(text)}`);
+    socket.onopen = () => recordedChunks.forEach(chunk => socket.send(chunk));
+    socket.onmessage = (event) => {
+        const data = JSON.parse(event.data);
+        feedbackSection.style.display = "block";
+        if (data.type === "partial") {
+            scoreBox.textContent = data.score !== undefined ? `Listening… Score so far: ${data.score}` : "Listening…";
+            feedbackBox.innerHTML = `<p><strong>Your Attempt IPA:</strong> ${data.attempt_ipa}</p>`;
+        } else if (data.type === "final") {
+            scoreBox.textContent = data.score !== undefined ? `Score: ${data.score}` : "";
+            feedbackBox.innerHTML = `
+                <p><strong>Correct IPA:</strong> ${data.correct_ipa ?? ""}</p>
+                <p><strong>Your Attempt IPA:</strong> ${data.attempt_ipa}</p>
+            `;
+        } else if (data.type === "error") {
+            console.error("Live recognition failed:", data.detail);
+        }
+    };
+    return socket;
+}
+
 // Update submit button state
 function updateSubmitState() {
     if (recordRadio.checked) {
@@ -68,8 +96,15 @@ recordBtn.onclick = async () => {
     mediaRecorder = new MediaRecorder(stream);
     const audioChunks = [];
 
-    mediaRecorder.ondataavailable = e => audioChunks.push(e.data);
+    liveSocket = textInput.value ? openLiveRecognition(textInput.value, audioChunks) : null;
+
+    mediaRecorder.ondataavailable = e => {
+        audioChunks.push(e.data);
+        if (liveSocket && liveSocket.readyState === WebSocket.OPEN) liveSocket.send(e.data);
+    };
     mediaRecorder.onstop = () => {
+        if (liveSocket && liveSocket.readyState === WebSocket.OPEN) liveSocket.send("stop");
+        liveSocket = null;
         const newBlob = new Blob(audioChunks, { type: "audio/webm" });
         audioForSubmit = newBlob;
         audioForShow = newBlob;
@@ -79,7 +114,8 @@ recordBtn.onclick = async () => {
         updateSubmitState();
     };
 
-    mediaRecorder.start();
+    // Deliver audio every 250 ms so recognition can run while recording
+    mediaRecorder.start(250);
     recordBtn.classList.add("recording");
     stopBtn.classList.add("active");
     recordBtn.disabled = true;
@@ -110,7 +146,8 @@ fileInput.onchange = () => {
     updateSubmitState();
 };
 
-// Form submit → fast scoring + TTS + LLM feedback
+// Form submit → one /practice request; score, reference audio and LLM feedback
+// are streamed back as NDJSON lines and shown as each one arrives
 form.onsubmit = async (e) => {
     e.preventDefault();
     submitBtn.textContent = "Submitting...";
@@ -118,7 +155,10 @@ form.onsubmit = async (e) => {
 
     const text = textInput.value;
     const formData = new FormData();
+    // Text goes first so the server can start TTS while the audio uploads
     formData.append("text", text);
+    formData.append("feedback", toggleFeedback.checked ? "true" : "false");
+    formData.append("session", sessionId);
 
     if (audioForSubmit) {
         formData.append("file", new File([audioForSubmit], "recording.webm", { type: "audio/webm" }));
@@ -128,27 +168,12 @@ form.onsubmit = async (e) => {
         return;
     }
 
-    try {
-        // 1️⃣ Call fast scoring API
-        const response = await fetch("/audio-score", { method: "POST", body: formData });
-        const data = await response.json();
-
-        feedbackSection.style.display = "block";
-        scoreBox.textContent = `Score: ${data.score}`;
-        feedbackBox.innerHTML = `
-            <p><strong>Correct IPA:</strong> ${data.correct_ipa}</p>
-            <p><strong>Your Attempt IPA:</strong> ${data.attempt_ipa}</p>
-        `;
-
-        if (data.score !== 1) {
-            // 2️⃣ Call TTS API
-            const ttsForm = new FormData();
-            ttsForm.append("text", text);
-
-            const ttsRes = await fetch("/tts", { method: "POST", body: ttsForm });
-            const ttsBlob = await ttsRes.blob();
-            const ttsUrl = URL.createObjectURL(ttsBlob);
-
+    let score = null;
+    let ttsUrl = null;
+    let feedback = null;
+    let feedbackTier = null;
+    const render = () => {
+        if (score && score.score !== 1 && ttsUrl && !feedbackBox.querySelector(".audio-comparison")) {
             // Display student vs correct audio
             const audioCompareDiv = document.createElement("div");
             audioCompareDiv.classList.add("audio-comparison");
@@ -160,24 +185,58 @@ form.onsubmit = async (e) => {
                 <audio controls src="${ttsUrl}"></audio>
             `;
             feedbackBox.appendChild(audioCompareDiv);
-
-            // 3️⃣ Call LLM feedback only if toggle is checked
-            if (toggleFeedback.checked) {
-                const llmForm = new FormData();
-                llmForm.append("text", text);
-                llmForm.append("correct_ipa", data.correct_ipa);
-                llmForm.append("attempt_ipa", data.attempt_ipa);
-                llmForm.append("score", data.score);
-
-                const llmRes = await fetch("/llm-feedback", { method: "POST", body: llmForm });
-                const llmData = await llmRes.json();
-
-                const llmDiv = document.createElement("div");
+        }
+        if (score && score.score !== 1 && feedback) {
+            // Tiered feedback: the LLM's answer replaces the rule-based tips when it arrives
+            let llmDiv = feedbackBox.querySelector(".llm-feedback");
+            if (!llmDiv) {
+                llmDiv = document.createElement("div");
                 llmDiv.classList.add("llm-feedback");
-                llmDiv.innerHTML = `<strong>LLM Feedback:</strong> ${llmData.feedback}`;
                 feedbackBox.appendChild(llmDiv);
             }
+            const label = feedbackTier === "rule-based" ? "Quick Tips" : "LLM Feedback";
+            llmDiv.innerHTML = `<strong>${label}:</strong> ${feedback.replaceAll("\n", "<br>")}`;
         }
+    };
+
+    try {
+        const response = await fetch("/practice", { method: "POST", body: formData });
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffered = "";
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffered += decoder.decode(value, { stream: true });
+            const lines = buffered.split("\n");
+            buffered = lines.pop();
+            for (const line of lines.filter(Boolean)) {
+                const data = JSON.parse(line);
+                if (data.type === "score") {
+                    score = data;
+                    feedbackSection.style.display = "block";
+                    scoreBox.textContent = `Score: ${data.score}`;
+                    feedbackBox.innerHTML = `
+                        <p><strong>Correct IPA:</strong> ${data.correct_ipa}</p>
+                        <p><strong>Your Attempt IPA:</strong> ${data.attempt_ipa}</p>
+                    `;
+                } else if (data.type === "tts") {
+                    const bytes = Uint8Array.from(atob(data.audio), c => c.charCodeAt(0));
+                    ttsUrl = URL.createObjectURL(new Blob([bytes], { type: data.media_type }));
+                } else if (data.type === "feedback") {
+                    // Never let late rule-based tips overwrite LLM feedback
+                    if (data.tier !== "rule-based" || feedbackTier !== "llm") {
+                        feedback = data.feedback;
+                        feedbackTier = data.tier ?? "llm";
+                    }
+                } else if (data.type === "error") {
+                    console.error(`Practice ${data.part} failed:`, data.detail);
+                }
+                render();
+            }
+        }
+        if (!score) throw new Error("No score in response");
 
         audioForSubmit = null;
         updateSubmitState();
@@ -189,4 +248,4 @@ form.onsubmit = async (e) => {
     } finally {
         submitBtn.textContent = "Submit";
     }
-};
\ No newline at end of file
+};
@@ -0,0 +1,127 @@
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+from core import alignment
+from core.phonemes import FRENCH, INDEL_COST, SCHWA_INDEL_COST, segment, substitution_cost
+from core.services.scoring_service import ScoringService
+
+
+def reference_distance(ref, hyp):
+    """Textbook O(n·m) weighted edit distance over phoneme strings."""
+    d = np.zeros((len(ref) + 1, len(hyp) + 1))
+    indel = lambda p: SCHWA_INDEL_COST if p == "ə" else INDEL_COST
+    for i in range(1, len(ref) + 1):
+        d[i, 0] = d[i - 1, 0] + indel(ref[i - 1])
+    for j in range(1, len(hyp) + 1):
+        d[0, j] = d[0, j - 1] + indel(hyp[j - 1])
+    for i, j in itertools.product(range(1, len(ref) + 1), range(1, len(hyp) + 1)):
+        d[i, j] = min(
+            d[i - 1, j - 1] + substitution_cost(ref[i - 1], hyp[j - 1]),
+            d[i - 1, j] + indel(ref[i - 1]),
+            d[i, j - 1] + indel(hyp[j - 1]),
+        )
+    return d[-1, -1]
+
+
+def random_ipa(rng, symbols, max_length=12):
+    return "".join(rng.choice(symbols) for _ in range(rng.randint(0, max_length)))
+
+
+def test_segment_keeps_nasal_vowels_whole():
+    assert segment("bɔ̃ʒuʁ") == ["b", "ɔ̃", "ʒ", "u", "ʁ"]
+    assert segment("/ˈmɛʁ.si/") == ["m", "ɛ", "ʁ", "s", "i"]
+    # Alternative spellings map onto the inventory
+    assert segment("ɡã") == ["g", "ɑ̃"]
+
+
+def test_substitution_cost_follows_features():
+    assert substitution_cost("e", "e") == 0
+    assert substitution_cost("e", "ɛ") < substitution_cost("e", "k")
+    assert substitution_cost("p", "b") < substitution_cost("p", "ʁ")
+    assert substitution_cost("j", "i") == 0.4
+
+
+def test_score_is_one_for_a_perfect_attempt():
+    assert alignment.score("bɔ̃ʒuʁ", "bɔ̃ʒuʁ") == 1.0
+    assert alignment.score("", "a") == 0.0
+
+
+def test_near_miss_scores_higher_than_a_wrong_phoneme():
+    assert alignment.score("kafe", "kafɛ") > alignment.score("kafe", "kafk")
+
+
+def test_distances_match_reference_dp():
+    rng = random.Random(0)
+    symbols = FRENCH.symbols + ["ɒ", "ɜ"]
+    pairs = [(random_ipa(rng, symbols), random_ipa(rng, symbols)) for _ in range(100)]
+    extra = {}
+    refs = [FRENCH.encode(ref, extra) for ref, _ in pairs]
+    hyps = [FRENCH.encode(hyp, extra) for _, hyp in pairs]
+    substitution, indel, _ = FRENCH.tables(extra)
+    batched = alignment.distances(refs, hyps, substitution, indel)
+    expected = [reference_distance(segment(ref), segment(hyp)) for ref, hyp in pairs]
+    np.testing.assert_allclose(batched, expected)
+
+
+def test_score_many_matches_single_scores():
+    rng = random.Random(1)
+    pairs = [(random_ipa(rng, FRENCH.symbols), random_ipa(rng, FRENCH.symbols)) for _ in range(50)]
+    np.testing.assert_allclose(
+        alignment.score_many(pairs),
+        [alignment.align(expected, attempt)[0] for expected, attempt in pairs],
+    )
+    assert alignment.score_many([]) == []
+
+
+def test_align_reports_each_operation():
+    _, ops = alignment.align("bɔ̃ʒuʁ", "bonʒu")
+    assert ops == (
+        ("equal", "b", "b"),
+        ("sub", "ɔ̃", "o"),
+        ("ins", None, "n"),
+        ("equal", "ʒ", "ʒ"),
+        ("equal", "u", "u"),
+        ("del", "ʁ", None),
+    )
+
+
+def test_backtrace_cost_equals_distance():
+    rng = random.Random(2)
+    for _ in range(50):
+        expected, attempt = random_ipa(rng, FRENCH.symbols), random_ipa(rng, FRENCH.symbols)
+        ref, hyp = segment(expected), segment(attempt)
+        _, ops = alignment.align(expected, attempt)
+        cost = sum(
+            substitution_cost(e, p) if op in ("equal", "sub")
+            else SCHWA_INDEL_COST if (e or p) == "ə" else INDEL_COST
+            for op, e, p in ops
+        )
+        assert cost == pytest.approx(reference_distance(ref, hyp))
+        assert [e for _, e, _ in ops if e is not None] == ref
+        assert [p for _, _, p in ops if p is not None] == hyp
+
+
+def test_unknown_symbols_only_match_themselves():
+    size = len(FRENCH.symbols)
+    assert alignment.score("aɒ", "aɒ") == 1.0
+    assert alignment.score("aɒ", "aɜ") == 0.5
+    # Unknown symbols are numbered per batch; the shared inventory never grows
+    assert len(FRENCH.symbols) == size
+    assert FRENCH.substitution.shape == (size, size)
+
+
+def test_long_input_is_cut_at_max_phonemes():
+    long = "a" * (alignment.MAX_PHONEMES + 100)
+    assert alignment.score(long, "a" * alignment.MAX_PHONEMES) == 1.0
+
+
+def test_scoring_service_strips_and_scores_prefixes():
+    service = ScoringService()
+    assert service.score(" mɛʁsi ", "mɛʁsi") == 1.0
+    assert service.score_many([("mɛʁsi", "mɛʁsi"), ("mɛʁsi", "")]) == [1.0, 0.0]
+    # Phonemes the learner hasn't reached yet don't count as missing
+    assert service.score_prefix("bɔ̃ʒuʁ", "bɔ̃ʒ") == 1.0
+    assert service.score("bɔ̃ʒuʁ", "bɔ̃ʒ") < 1.0
@@ -0,0 +1,120 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core.batching import MicroBatcher
+
+TIMEOUT_S = 5
+
+
+def test_concurrent_items_share_a_batch():
+    batches = []
+
+    def process(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(process, max_batch_size=4, max_wait_ms=200)
+    futures = [batcher.submit(i) for i in range(4)]
+    assert [f.result(TIMEOUT_S) for f in futures] == [0, 2, 4, 6]
+    assert batches == [[0, 1, 2, 3]]
+    assert batcher.stats() == {"batches": 1, "items": 4, "mean_batch_size": 4.0, "pending": 0}
+
+
+def test_blocking_calls_from_many_threads():
+    batcher = MicroBatcher(lambda items: [item + 1 for item in items], max_batch_size=8, max_wait_ms=5)
+    with ThreadPoolExecutor(16) as pool:
+        assert list(pool.map(batcher, range(100))) == list(range(1, 101))
+    assert batcher.stats()["items"] == 100
+
+
+def test_size_of_splits_batches_to_limit_padding():
+    batches = []
+
+    def process(items):
+        batches.append(sorted(items, key=len))
+        return items
+
+    batcher = MicroBatcher(process, max_batch_size=8, max_wait_ms=200, size_of=len, max_padding_ratio=0.2)
+    items = ["a" * 100, "a" * 90, "a" * 10, "a" * 8]
+    futures = [batcher.submit(item) for item in items]
+    assert [f.result(TIMEOUT_S) for f in futures] == items
+    # Short items are not padded to the long ones
+    assert sorted([len(item) for item in batch] for batch in batches) == [[8, 10], [90, 100]]
+
+
+def test_a_failed_batch_fails_only_its_items():
+    def process(items):
+        if "bad" in items:
+            raise ValueError("bad item")
+        return items
+
+    batcher = MicroBatcher(process, max_batch_size=1, max_wait_ms=1)
+    bad, good = batcher.submit("bad"), batcher.submit("good")
+    with pytest.raises(ValueError):
+        bad.result(TIMEOUT_S)
+    assert good.result(TIMEOUT_S) == "good"
+    # The worker thread is still serving
+    assert batcher.submit("later").result(TIMEOUT_S) == "later"
+
+
+def test_a_short_result_fails_the_batch():
+    batcher = MicroBatcher(lambda items: items[:-1], max_batch_size=2, max_wait_ms=200)
+    futures = [batcher.submit(1), batcher.submit(2)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="returned 1 results"):
+            future.result(TIMEOUT_S)
+
+
+def test_a_failing_size_of_fails_the_round_not_the_thread():
+    batcher = MicroBatcher(lambda items: items, max_wait_ms=1, size_of=len)
+    with pytest.raises(TypeError):
+        batcher.submit(3).result(TIMEOUT_S)
+    assert batcher.submit("ok").result(TIMEOUT_S) == "ok"
+
+
+def test_cancelled_items_are_skipped():
+    seen = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def process(items):
+        seen.extend(items)
+        started.set()
+        release.wait(TIMEOUT_S)
+        return items
+
+    batcher = MicroBatcher(process, max_batch_size=1, max_wait_ms=1)
+    first = batcher.submit("first")
+    assert started.wait(TIMEOUT_S)
+    # Queued behind the running batch, then given up on
+    second = batcher.submit("second")
+    assert second.cancel()
+    release.set()
+    assert first.result(TIMEOUT_S) == "first"
+    assert batcher.submit("third").result(TIMEOUT_S) == "third"
+    assert seen == ["first", "third"]
+
+
+def test_max_batch_size_must_be_positive():
+    with pytest.raises(ValueError):
+        MicroBatcher(lambda items: items, max_batch_size=0)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_a_forked_child_starts_its_own_thread():
+    batcher = MicroBatcher(lambda items: [item * 2 for item in items], max_wait_ms=1)
+    assert batcher(1) == 2
+    pid = os.fork()
+    if pid == 0:
+        # The parent's worker thread does not exist here
+        try:
+            code = 0 if batcher.submit(2).result(TIMEOUT_S) == 4 else 1
+        except BaseException:
+            code = 1
+        os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert batcher(3) == 6
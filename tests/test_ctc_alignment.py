@@ -0,0 +1,100 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from core.ctc_alignment import align_phonemes, tokenize_reference, viterbi
+
+BLANK = 0
+
+
+def log_probs_for(frames, vocab_size=5, sharpness=5.0):
+    """Log-probabilities whose most likely token on each frame is ``frames[t]``."""
+    logits = np.zeros((len(frames), vocab_size))
+    logits[np.arange(len(frames)), frames] = sharpness
+    return logits - np.logaddexp.reduce(logits, axis=1, keepdims=True)
+
+
+def path_score(log_probs, tokens, path):
+    return sum(log_probs[t, tokens[i] if i >= 0 else BLANK] for t, i in enumerate(path))
+
+
+def brute_force(log_probs, tokens):
+    """Best valid CTC path by enumerating every frame labelling."""
+    best, best_path = -np.inf, None
+    choices = [-1] + list(range(len(tokens)))
+    for path in itertools.product(choices, repeat=log_probs.shape[0]):
+        # Each token is emitted by exactly one run of frames, in order
+        runs = [i for k, i in enumerate(path) if i >= 0 and (k == 0 or path[k - 1] != i)]
+        if runs != list(range(len(tokens))):
+            continue
+        # A repeated token needs a blank between its two runs
+        valid = all(
+            not (a >= 0 and b >= 0 and a != b and tokens[a] == tokens[b])
+            for a, b in zip(path, path[1:])
+        )
+        score = path_score(log_probs, tokens, path)
+        if valid and score > best:
+            best, best_path = score, path
+    return best, best_path
+
+
+def test_viterbi_follows_the_frames():
+    log_probs = log_probs_for([0, 1, 1, 0, 2, 0])
+    path = viterbi(log_probs, [1, 2], BLANK)
+    assert path.tolist() == [-1, 0, 0, -1, 1, -1]
+
+
+def test_viterbi_needs_a_blank_between_repeated_tokens():
+    # "1 1" cannot be read from two adjacent frames of token 1
+    assert viterbi(log_probs_for([1, 1]), [1, 1], BLANK) is None
+    path = viterbi(log_probs_for([1, 1, 1]), [1, 1], BLANK)
+    assert path.tolist() == [0, -1, 1]
+
+
+def test_viterbi_is_optimal():
+    rng = np.random.default_rng(0)
+    for tokens in ([1], [1, 2], [1, 1], [2, 1, 2]):
+        for _ in range(5):
+            log_probs = np.log(rng.dirichlet(np.ones(4), size=5))
+            best, _ = brute_force(log_probs, tokens)
+            path = viterbi(log_probs, tokens, BLANK)
+            assert path_score(log_probs, tokens, path) == pytest.approx(best)
+
+
+def test_viterbi_rejects_references_longer_than_the_audio():
+    assert viterbi(log_probs_for([1, 2]), [1, 2, 3], BLANK) is None
+    assert viterbi(log_probs_for([]), [1], BLANK) is None
+
+
+def test_tokenize_reference_uses_whole_phonemes_then_characters():
+    vocab = {"<pad>": 0, "b": 1, "ɔ̃": 2, "ʒ": 3, "u": 4, "ʁ": 5, "ɛ": 6, "\u0303": 7}
+    reference = tokenize_reference("bɔ̃ʒuʁ", vocab)
+    assert reference == [("b", [1]), ("ɔ̃", [2]), ("ʒ", [3]), ("u", [4]), ("ʁ", [5])]
+    # ɛ̃ has no token of its own: spelled as ɛ plus the combining tilde
+    assert tokenize_reference("ɛ̃", vocab) == [("ɛ̃", [6, 7])]
+    # Nor does ɑ̃, and ɑ isn't in the vocabulary either
+    assert tokenize_reference("ɑ̃", vocab) == [("ɑ̃", [])]
+
+
+def test_align_phonemes_times_and_scores_each_phoneme():
+    # Frames: blank, b, b, blank, a, a
+    log_probs = log_probs_for([0, 1, 1, 0, 2, 2])
+    reference = [("b", [1]), ("a", [2]), ("x", [])]
+    aligned = align_phonemes(log_probs, reference, BLANK, frame_duration=0.02, offset=1.0)
+    assert [r["phoneme"] for r in aligned] == ["b", "a", "x"]
+    # A phoneme lasts until the next one starts
+    assert (aligned[0]["start"], aligned[0]["end"]) == (1.02, 1.08)
+    assert (aligned[1]["start"], aligned[1]["end"]) == (1.08, 1.12)
+    # The expected token was the most likely one on each of its frames
+    assert aligned[0]["gop"] == 0 and aligned[0]["score"] == 1
+    assert aligned[2] == {"phoneme": "x", "start": None, "end": None, "gop": None, "score": None}
+
+
+def test_align_phonemes_scores_a_wrong_sound_lower():
+    # The model hears token 3 where the reference expects token 2
+    log_probs = log_probs_for([1, 1, 3, 3], sharpness=2.0)
+    aligned = align_phonemes(log_probs, [("b", [1]), ("a", [2])], BLANK, frame_duration=0.02)
+    assert aligned[1]["gop"] < 0
+    assert aligned[1]["score"] < aligned[0]["score"]
+
@@ -0,0 +1,146 @@
+import asyncio
+
+import pytest
+
+from core.services.feedback_jobs import FeedbackJobs
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def stream(*tokens, gate=None):
+    """A ``tokens()`` factory yielding ``tokens``, waiting on ``gate`` before the last one."""
+
+    async def generate():
+        for index, token in enumerate(tokens):
+            if gate is not None and index == len(tokens) - 1:
+                await gate.wait()
+            yield token
+
+    return generate
+
+
+async def settle():
+    # A cancelled task needs a few loop iterations to finish and run its done callbacks
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def never():
+    async def generate():
+        await asyncio.Event().wait()
+        yield ""
+
+    return generate
+
+
+def test_job_collects_the_tokens():
+    async def scenario():
+        jobs = FeedbackJobs()
+        job = jobs.submit("s1", "bonjour", stream(" Try ", "the ", "nasal"))
+        assert job.state == "pending"
+        states = [update.state async for update in jobs.updates(job)]
+        assert states[-1] == "done"
+        assert job.to_dict() == {"job_id": job.id, "state": "done", "feedback": "Try the nasal", "error": None}
+        assert jobs.get(job.id) is job
+        assert jobs.stats()["done"] == 1
+
+    run(scenario())
+
+
+def test_failed_generation_is_reported():
+    async def scenario():
+        async def broken():
+            yield "Try"
+            raise RuntimeError("model crashed")
+
+        jobs = FeedbackJobs()
+        job = jobs.submit(None, "merci", lambda: broken())
+        async for _ in jobs.updates(job):
+            pass
+        assert (job.state, job.error) == ("failed", "model crashed")
+        assert jobs.stats()["failed"] == 1
+
+    run(scenario())
+
+
+def test_a_new_attempt_drops_the_sessions_previous_job():
+    async def scenario():
+        jobs = FeedbackJobs()
+        first = jobs.submit("s1", "bonjour", never())
+        other = jobs.submit("s2", "bonjour", never())
+        second = jobs.submit("s1", "bonjour", stream("ok"))
+        async for _ in jobs.updates(second):
+            pass
+        assert (first.state, second.state, other.state) == ("dropped", "done", "pending")
+        other.task.cancel()
+        await settle()
+
+    run(scenario())
+
+
+def test_moving_on_to_another_word_drops_the_job():
+    async def scenario():
+        jobs = FeedbackJobs()
+        job = jobs.submit("s1", "bonjour", never())
+        jobs.moved_on("s1", "bonjour")
+        await settle()
+        assert not job.finished
+        jobs.moved_on("s1", "merci")
+        await settle()
+        assert job.state == "dropped"
+        assert jobs.stats()["dropped"] == 1
+
+    run(scenario())
+
+
+def test_subscribers_see_each_token():
+    async def scenario():
+        gate = asyncio.Event()
+        jobs = FeedbackJobs()
+        job = jobs.submit(None, "merci", stream("a", "b", gate=gate))
+        seen = []
+        async for update in jobs.updates(job):
+            seen.append((update.state, update.feedback))
+            if update.feedback == "a":
+                gate.set()
+        assert seen[0] == ("pending", "")
+        assert ("running", "a") in seen
+        assert seen[-1] == ("done", "ab")
+
+    run(scenario())
+
+
+def test_finished_jobs_expire_after_the_ttl():
+    async def scenario():
+        jobs = FeedbackJobs(ttl_s=0)
+        job = jobs.submit(None, "merci", stream("ok"))
+        async for _ in jobs.updates(job):
+            pass
+        await asyncio.sleep(0.01)
+        jobs.submit(None, "merci", stream("ok"))
+        assert jobs.get(job.id) is None
+
+    run(scenario())
+
+
+@pytest.mark.parametrize("finished", [0, 2])
+def test_max_jobs_bounds_live_jobs(finished):
+    async def scenario():
+        jobs = FeedbackJobs(max_jobs=2)
+        for _ in range(finished):
+            done = jobs.submit(None, "merci", stream("ok"))
+            async for _ in jobs.updates(done):
+                pass
+        live = [jobs.submit(None, "merci", never()) for _ in range(4)]
+        await settle()
+        # Finished jobs are forgotten first, then the oldest live ones are dropped
+        assert [job.state for job in live] == ["dropped", "dropped", "pending", "pending"]
+        stats = jobs.stats()
+        assert (stats["live"], stats["dropped"]) == (2, 2)
+        for job in live:
+            job.task.cancel()
+        await settle()
+
+    run(scenario())
@@ -0,0 +1,115 @@
+import os
+import time
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from core.services.process_pool import MIN_SHARED_BYTES, ProcessPool, WorkerCrashed, _pack, _SharedArray, _unpack
+
+Pair = namedtuple("Pair", "waveform label")
+
+
+def large(value=1.0):
+    return np.full(MIN_SHARED_BYTES // 4, value, dtype=np.float32)
+
+
+class Echo:
+    """A service for the pool tests; it must be importable by spawned workers."""
+
+    def double(self, array):
+        return array * 2
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+        return os.getpid()
+
+    def crash(self):
+        os._exit(3)
+
+
+def build_echo(threads):
+    yield "echo", Echo(), {"threads": threads}
+
+
+def test_small_values_are_sent_as_they_are():
+    names = []
+    value = {"text": "bonjour", "array": np.arange(4)}
+    packed = _pack(value, names)
+    assert names == []
+    assert packed["array"] is value["array"]
+
+
+def test_large_arrays_go_through_shared_memory():
+    names = []
+    value = Pair(large(3.0), "a")
+    packed = _pack([value, (large(), 1)], names)
+    assert len(names) == 2
+    assert isinstance(packed[0].waveform, _SharedArray)
+    assert isinstance(packed[0], Pair)
+
+    unpacked = _unpack(packed)
+    assert isinstance(unpacked[0], Pair) and unpacked[0].label == "a"
+    np.testing.assert_array_equal(unpacked[0].waveform, large(3.0))
+    assert unpacked[0].waveform.dtype == np.float32
+    # Copied out, so the blocks are gone
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+
+def test_unpacked_views_stay_valid_until_released():
+    names, opened = [], []
+    view = _unpack(_pack(large(5.0), names), opened)
+    assert len(opened) == 1
+    np.testing.assert_array_equal(view, large(5.0))
+    del view
+    for shm in opened:
+        shm.close()
+        shm.unlink()
+
+
+def test_iterators_are_packed_as_lists():
+    assert _pack(iter([1, 2]), []) == [1, 2]
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = ProcessPool(build_echo, workers=2, concurrency=2, pin_cpus=False)
+    pool.start()
+    assert pool.wait_ready("echo", timeout=60)
+    yield pool
+    pool.close()
+
+
+def test_calls_round_trip_large_arrays(pool):
+    np.testing.assert_array_equal(pool.call("echo.double", large(2.0)), large(4.0))
+    assert pool.info("echo") == {"threads": None}
+
+
+def test_broadcast_reaches_every_ready_worker(pool):
+    deadline = time.monotonic() + 60
+    while len(pool.broadcast("echo.sleep", 0, timeout=5)) < 2 and time.monotonic() < deadline:
+        time.sleep(0.1)
+    assert len(set(pool.broadcast("echo.sleep", 0, timeout=5))) == 2
+
+
+def test_broadcast_leaves_out_slow_workers(pool):
+    start = time.monotonic()
+    assert pool.broadcast("echo.sleep", 2, timeout=0.2) == []
+    assert time.monotonic() - start < 1.5
+    # The late answers are dropped, not left pending
+    time.sleep(2.5)
+    assert all(worker["in_flight"] == 0 for worker in pool.stats()["workers"])
+
+
+def test_broadcast_of_a_service_nobody_has_built_is_empty(pool):
+    assert pool.broadcast("missing.stats", timeout=0.2) == []
+
+
+def test_a_crashed_worker_fails_its_call_and_restarts(pool):
+    with pytest.raises(WorkerCrashed):
+        pool.call("echo.crash")
+    assert pool.stats()["crashes"] == 1
+    np.testing.assert_array_equal(pool.call("echo.double", large(1.0)), large(2.0))
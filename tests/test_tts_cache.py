@@ -0,0 +1,72 @@
+import os
+
+from core.services.tts_cache import TTSCache
+
+
+def test_key_normalizes_the_text():
+    key = TTSCache.key("hf", "mms", None, "Bonjour   le\tmonde ")
+    assert key == TTSCache.key("hf", "mms", None, "Bonjour le monde")
+    # Composed and decomposed accents are the same text
+    assert TTSCache.key("hf", "mms", None, "caf\u00e9") == TTSCache.key("hf", "mms", None, "cafe\u0301")
+    assert key != TTSCache.key("coqui", "mms", None, "Bonjour le monde")
+    assert key != TTSCache.key("hf", "mms", "female", "Bonjour le monde")
+
+
+def test_get_returns_what_was_put(tmp_path):
+    cache = TTSCache(tmp_path, max_bytes=1000)
+    assert cache.get("a") is None
+    cache.put("a", b"audio")
+    assert cache.get("a") == b"audio"
+    assert cache.get("b", record=False) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"], stats["bytes"]) == (1, 1, 1, 5)
+    # No temporary files are left behind
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.wav"]
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = TTSCache(tmp_path, max_bytes=25)
+    cache.put("a", b"x" * 10)
+    cache.put("b", b"x" * 10)
+    cache.get("a")
+    cache.put("c", b"x" * 10)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert not (tmp_path / "b.wav").exists()
+    assert cache.stats()["bytes"] == 20
+
+
+def test_an_entry_larger_than_the_cache_is_kept_alone(tmp_path):
+    cache = TTSCache(tmp_path, max_bytes=10)
+    cache.put("a", b"x" * 5)
+    cache.put("big", b"x" * 50)
+    assert cache.get("a") is None
+    assert cache.get("big") == b"x" * 50
+
+
+def test_replacing_an_entry_counts_its_size_once(tmp_path):
+    cache = TTSCache(tmp_path, max_bytes=100)
+    cache.put("a", b"x" * 10)
+    cache.put("a", b"x" * 30)
+    assert cache.stats()["bytes"] == 30
+
+
+def test_lru_order_survives_a_restart(tmp_path):
+    cache = TTSCache(tmp_path, max_bytes=100)
+    for age, key in enumerate(["old", "new"]):
+        cache.put(key, b"x" * 10)
+        os.utime(tmp_path / f"{key}.wav", (1000 + age, 1000 + age))
+
+    reopened = TTSCache(tmp_path, max_bytes=15)
+    assert reopened.get("new") is not None
+    assert reopened.get("old") is None
+    assert not (tmp_path / "old.wav").exists()
+
+
+def test_a_file_removed_behind_the_cache_is_a_miss(tmp_path):
+    cache = TTSCache(tmp_path, max_bytes=100)
+    cache.put("a", b"audio")
+    os.remove(tmp_path / "a.wav")
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["bytes"]) == (0, 1, 0)